@@ -1,47 +1,206 @@
 import streamlit as st
-import json
-import os
-from werkzeug.security import generate_password_hash, check_password_hash
+import secrets
+import string
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
 
-# Path to the user data file
-USER_DATA_FILE = 'data/users.json'
+from app.utils.hashing import HashPoolBusy, hash_password, needs_rehash, verify_password
+from app.utils.token_store import get_token_store
+from app.utils.user_store import get_user_store
 
-# Ensure the data directory exists
-os.makedirs('data', exist_ok=True)
+# How long a password reset token stays valid
+RESET_TOKEN_TTL = timedelta(hours=1)
 
-# Load user data
-def load_users():
-    if os.path.exists(USER_DATA_FILE):
-        with open(USER_DATA_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+# User records kept in memory, shared by every session in this process
+USER_CACHE_SIZE = 10000
 
-# Save user data
-def save_users(users):
-    with open(USER_DATA_FILE, 'w') as f:
-        json.dump(users, f)
+
+class AuthService:
+    """The single entry point for accounts, shared across Streamlit sessions.
+
+    User records are cached in memory and the whole cache is dropped whenever
+    the store's version changes, which catches writes from this process and
+    from any other replica sharing the same data directory. Checking the
+    version is a stat() call or a one-row read, so repeated page loads no
+    longer read user data.
+    """
+
+    def __init__(self, store=None, tokens=None, cache_size=USER_CACHE_SIZE):
+        self.store = store or get_user_store()
+        self.tokens = tokens or get_token_store()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _cached(self, key):
+        with self._lock:
+            version = self.store.version()
+            if version != self._version:
+                self._cache.clear()
+                self._version = version
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return True, self._cache[key], version
+            return False, None, version
+
+    def get_user(self, email):
+        """Get a user by email"""
+        key = email.lower()
+        hit, user, version = self._cached(key)
+        if not hit:
+            user = self.store.get_user(email)
+            with self._lock:
+                # Skip caching if the store changed while we were reading it
+                if version == self._version:
+                    self._cache[key] = user
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return dict(user) if user else None
+
+    def user_exists(self, email):
+        """Check if a user with the given email exists"""
+        return self.get_user(email) is not None
+
+    def register_user(self, full_name, email, password):
+        """Register a new user"""
+        # Check if user already exists before paying for the password hash
+        if self.user_exists(email):
+            return False, "A user with this email already exists."
+
+        # Create new user
+        try:
+            hashed = hash_password(password)
+        except HashPoolBusy as e:
+            return False, str(e)
+        new_user = {
+            "full_name": full_name,
+            "email": email.lower(),
+            "password": hashed,
+            "created_at": datetime.now().isoformat(),
+        }
+
+        # The unique email index still guards against a concurrent registration
+        if not self.store.add_user(new_user):
+            return False, "A user with this email already exists."
+        return True, "Registration successful! Please log in."
+
+    def authenticate_user(self, email, password):
+        """Authenticate a user"""
+        user = self.get_user(email)
+        if not user:
+            return False, "User not found."
+
+        try:
+            if not verify_password(user["password"], password):
+                return False, "Incorrect password."
+        except HashPoolBusy as e:
+            return False, str(e)
+
+        # Upgrade older hashes (including werkzeug ones) while we have the plaintext
+        if needs_rehash(user["password"]):
+            try:
+                user["password"] = hash_password(password)
+                self.store.update_user(email, password=user["password"])
+            except HashPoolBusy:
+                pass  # Try again on the next login
+        return True, user
+
+    def set_password(self, email, new_password):
+        """Replace a user's password and revoke their reset tokens"""
+        try:
+            hashed = hash_password(new_password)
+        except HashPoolBusy as e:
+            return False, str(e)
+
+        if not self.store.update_user(email, password=hashed):
+            return False, "User not found."
+        self.tokens.delete_for_email(email.lower())
+        return True, "Password has been reset successfully."
+
+    def generate_reset_token(self, email):
+        """Generate a password reset token"""
+        if not self.user_exists(email):
+            return False, "User not found."
+
+        # Generate a secure token
+        alphabet = string.ascii_letters + string.digits
+        token = ''.join(secrets.choice(alphabet) for _ in range(32))
+
+        # Store the token with expiration
+        self.tokens.put(token, email.lower(), RESET_TOKEN_TTL.total_seconds())
+
+        return True, token
+
+    def verify_reset_token(self, token):
+        """Verify if a reset token is valid"""
+        token_data = self.tokens.get(token)
+
+        if not token_data:
+            return False, "Invalid or expired token."
+
+        # Check if token has expired but has not been swept yet
+        if time.time() > token_data["expires_at"]:
+            # Remove expired token
+            self.tokens.delete(token)
+            return False, "Token has expired."
+
+        return True, token_data["email"]
+
+    def reset_password(self, token, new_password):
+        """Reset a user's password using a valid token"""
+        valid, email = self.verify_reset_token(token)
+        if not valid:
+            return False, email  # Email contains error message in this case
+        return self.set_password(email, new_password)
+
+
+@st.cache_resource
+def get_auth_service():
+    """Return the auth service shared by every session in this process"""
+    return AuthService()
+
+
+def current_user_email():
+    """Email of the signed-in user, or "guest" when nobody has signed in"""
+    user = st.session_state.get("user")
+    if isinstance(user, dict):
+        return user["email"]
+    return (user or st.session_state.get("username") or "guest").lower()
+
+
+# Email/password flow used by the login page
+def register_user(full_name, email, password):
+    return get_auth_service().register_user(full_name, email, password)
+
+def authenticate_user(email, password):
+    return get_auth_service().authenticate_user(email, password)
+
+def generate_reset_token(email):
+    return get_auth_service().generate_reset_token(email)
+
+def verify_reset_token(token):
+    return get_auth_service().verify_reset_token(token)
+
+def reset_password_with_token(token, new_password):
+    return get_auth_service().reset_password(token, new_password)
+
+# Username/password flow used by the simple sign in, sign up and reset pages;
+# the username is stored as the account email
 
 # Sign up function
 def signup(username, password):
-    users = load_users()
-    if username in users:
-        return False  # User already exists
-    users[username] = generate_password_hash(password)
-    save_users(users)
-    return True
+    success, _ = get_auth_service().register_user(username, username, password)
+    return success
 
 # Sign in function
 def signin(username, password):
-    users = load_users()
-    if username in users and check_password_hash(users[username], password):
-        return True  # Successful sign-in
-    return False  # Failed sign-in
+    success, _ = get_auth_service().authenticate_user(username, password)
+    return success
 
 # Reset password function
 def reset_password(username, new_password):
-    users = load_users()
-    if username in users:
-        users[username] = generate_password_hash(new_password)
-        save_users(users)
-        return True
-    return False 
\ No newline at end of file
+    success, _ = get_auth_service().set_password(username, new_password)
+    return success
@@ -0,0 +1 @@
+# This file makes the components directory a Python package
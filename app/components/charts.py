@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.io as pio
+import streamlit as st
+
+# Memory held by cached figures (measured as their JSON), shared by every session in this process
+FIGURE_CACHE_MB = float(os.environ.get("FIGURE_CACHE_MB", 64))
+
+
+class FigureCache:
+    """LRU cache of built Plotly figures, capped by the total size of their JSON in bytes.
+
+    Figures are shared between sessions, so they must not be modified once cached.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._figures = OrderedDict()  # key -> (figure, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._figures.get(key)
+            if entry is None:
+                return None
+            self._figures.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, figure, size):
+        with self._lock:
+            if key in self._figures:
+                self._bytes -= self._figures.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._figures[key] = (figure, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._figures.popitem(last=False)
+                self._bytes -= evicted
+
+    def size(self):
+        """Number of figures and bytes currently held"""
+        with self._lock:
+            return len(self._figures), self._bytes
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_figure_cache():
+    """Return the figure cache shared by every page and session"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FigureCache(int(FIGURE_CACHE_MB * 1024 * 1024))
+        return _cache
+
+
+def data_hash(frame):
+    """Digest of a DataFrame's values, index, column names and dtypes"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(zip(frame.columns, map(str, frame.dtypes)))).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def memo_figure(build, data, **params):
+    """build(data, **params), cached on a hash of the data and params.
+
+    `build` must be a named function (px.bar, or one defined in the page), since
+    its qualified name is part of the key.
+    """
+    key = (f"{build.__module__}.{build.__qualname__}", data_hash(data),
+           json.dumps(params, sort_keys=True, default=str))
+    cache = get_figure_cache()
+    figure = cache.get(key)
+    if figure is None:
+        figure = build(data, **params)
+        cache.put(key, figure, len(pio.to_json(figure, validate=False)))
+    return figure
+
+
+def plotly_chart(build, data, use_container_width=True, **params):
+    """st.plotly_chart for build(data, **params), reusing the cached figure.
+
+    A built figure passes straight through st.plotly_chart without being
+    validated again, so an unchanged chart costs one hash of its input frame
+    and one serialization instead of a rebuild.
+    """
+    return st.plotly_chart(memo_figure(build, data, **params), use_container_width=use_container_width)
@@ -0,0 +1,33 @@
+import pandas as pd
+
+TAG_CHIP_STYLE = "background-color: #e1e1e1; padding: 2px 8px; border-radius: 12px; margin-right: 5px;"
+
+
+def _escape(values):
+    """HTML-escape a Series of strings, quotes included, as html.escape() does"""
+    return (values.fillna("").astype(str)
+            .str.replace("&", "&amp;", regex=False)
+            .str.replace("<", "&lt;", regex=False)
+            .str.replace(">", "&gt;", regex=False)
+            .str.replace('"', "&quot;", regex=False)
+            .str.replace("'", "&#x27;", regex=False))
+
+
+def event_cards(events):
+    """Markdown body of each event's card (title, details, tag chips), in order.
+
+    The page only passes the events on screen, and they are formatted
+    together with pandas string operations, so each card is rendered as a
+    single markdown element.
+    """
+    if not events:
+        return []
+    frame = pd.DataFrame(events)
+    tags = frame["tags"].explode().dropna()
+    chips = (f'<span style="{TAG_CHIP_STYLE}">' + _escape(tags) + "</span>").groupby(level=0).agg(" ".join)
+    chips = chips.reindex(frame.index, fill_value="")
+    return ("### " + _escape(frame["title"]) +
+            "\n\n**Date & Time:** " + _escape(frame["date"]) + " at " + _escape(frame["time"]) +
+            "  \n**Location:** " + _escape(frame["location"]) +
+            "  \n**Description:** " + _escape(frame["description"]) +
+            "\n\n" + chips).tolist()
@@ -0,0 +1,12 @@
+import streamlit as st
+
+
+def lazy_tabs(labels, key):
+    """Tab bar that only runs the selected tab's code; returns the selected label.
+
+    st.tabs executes every tab body on each rerun and hides the inactive
+    ones in the browser. This renders a horizontal radio instead, so callers
+    branch on the returned label and only build what is on screen.
+    """
+    return st.radio("Section", labels, key=key, horizontal=True, label_visibility="collapsed")
+
@@ -0,0 +1 @@
+# This file makes the models directory a Python package
@@ -0,0 +1,185 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, HashingVectorizer
+
+# Answers kept, across every subject and topic, and for how long
+ANSWER_CACHE_SIZE = int(os.environ.get("TUTOR_ANSWER_CACHE_SIZE", 5000))
+ANSWER_CACHE_TTL = float(os.environ.get("TUTOR_ANSWER_CACHE_TTL", 7 * 24 * 3600))
+
+# Cosine similarity at which two questions count as the same question
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("TUTOR_ANSWER_CACHE_THRESHOLD", 0.9))
+
+# Words that flip or narrow what a question asks, kept although the usual English stop list drops them
+NEGATIONS = frozenset({"not", "no", "nor", "never", "none", "nothing", "neither", "nobody", "nowhere", "without"})
+QUANTIFIERS = frozenset({"all", "every", "each", "some", "any", "only", "few", "more", "less", "most", "least"})
+
+# Words that carry no meaning in a question, beyond the usual English ones
+QUESTION_STOP_WORDS = (ENGLISH_STOP_WORDS - NEGATIONS - QUANTIFIERS) | {
+    "explain", "please", "help", "understand", "tell", "know"}
+
+# Weight of word pairs against character n-grams in a question's vector; pairs keep word order
+BIGRAM_WEIGHT = 0.6
+
+_TOKEN = re.compile(r"[\w^*/+\-=.()|]+")
+_FORMULA = re.compile(r"[\d^*/+=()|]")
+_NOT = re.compile(r"\b(?:can)?n[o']t\b|n't\b")
+_ROMAN = re.compile(r"^(?=[ivxlcdm]+$)m{0,3}(?:c[md]|d?c{0,3})(?:x[cl]|l?x{0,3})(?:i[xv]|v?i{0,3})$")
+
+
+def normalize_question(question):
+    """Lowercased content words of a question, in order.
+
+    Negations ("isn't" becomes "is not"), quantifiers and roman numerals
+    stay. "I" counts as a numeral only after a content word ("World War I"),
+    not as the pronoun in "how do I".
+    """
+    text = _NOT.sub(" not", question.lower())
+    words = []
+    previous = ""
+    for word in (w.strip(".") for w in _TOKEN.findall(text)):
+        if word and (word not in QUESTION_STOP_WORDS or (_ROMAN.match(word) and previous)):
+            words.append(word)
+        previous = word if word and word not in QUESTION_STOP_WORDS else ""
+    return words
+
+
+def exact_terms(words):
+    """Words two questions must share to count as the same: formulas, numerals and whether they negate"""
+    terms = {w for w in words if _FORMULA.search(w) or _ROMAN.match(w)}
+    if any(w in NEGATIONS for w in words):
+        terms.add("not")
+    return frozenset(terms)
+
+
+class SemanticAnswerCache:
+    """Tutor answers, looked up by questions that mean the same thing.
+
+    A question is embedded as hashed character n-grams of its content words,
+    which tolerates rewording and typos ("how do i integrate x^2" matches
+    "How can I integrate x^2?") while "integrate" and "differentiate" stay
+    far apart, plus its word pairs, so "is every continuous function
+    differentiable" and its converse differ. Lookups compare against the
+    questions already answered for the same subject and topic with one
+    sparse matrix product. Formulas (words with a digit or a symbol such as
+    ^ or parentheses), roman numerals and negation must also match exactly,
+    so "x^2" never gets the answer for "x^3", "World War I" for "World
+    War II", or "why is it not" for "why is it". Entries are evicted least
+    recently used first, and expire after `ttl` seconds.
+    """
+
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL,
+                 clock=time.time):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._vectorizer = HashingVectorizer(analyzer="char_wb", ngram_range=(3, 5), n_features=2 ** 18,
+                                             alternate_sign=False)
+        self._bigrams = HashingVectorizer(analyzer="word", ngram_range=(2, 2), token_pattern=r"\S+",
+                                          lowercase=False, n_features=2 ** 16, alternate_sign=False)
+        self._entries = OrderedDict()  # id -> entry, least recently used first
+        self._by_age = deque()         # ids in the order they were stored, for expiry
+        self._buckets = {}             # (subject, topic) -> {"ids": [...], "matrix": stacked vectors or None}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evicted = self.expired = 0
+
+    def _embed(self, question):
+        words = normalize_question(question)
+        text = [" ".join(words)]
+        chars, pairs = self._vectorizer.transform(text), self._bigrams.transform(text)
+        # Both parts are unit length, so the weighted whole is rescaled to unit length directly
+        scale = 1 / np.sqrt(1 + BIGRAM_WEIGHT ** 2) if pairs.nnz else 1.0
+        data = np.concatenate([chars.data * scale, pairs.data * (BIGRAM_WEIGHT * scale)])
+        indices = np.concatenate([chars.indices, pairs.indices + chars.shape[1]])
+        vector = sp.csr_matrix((data, indices, [0, len(data)]), shape=(1, chars.shape[1] + pairs.shape[1]))
+        return vector, exact_terms(words)
+
+    def lookup(self, subject, topic, question):
+        """{"answer", "question", "similarity"} for the closest earlier question, or None"""
+        vector, formulas = self._embed(question)
+        with self._lock:
+            self._expire()
+            bucket = self._buckets.get((subject, topic))
+            if bucket and vector.nnz:
+                if bucket["matrix"] is None:
+                    bucket["matrix"] = sp.vstack([self._entries[i]["vector"] for i in bucket["ids"]]).tocsr()
+                similarity = (bucket["matrix"] @ vector.T).toarray().ravel()
+                for j in np.argsort(-similarity)[:5]:
+                    if similarity[j] < self.threshold:
+                        break
+                    entry_id = bucket["ids"][j]
+                    entry = self._entries[entry_id]
+                    if entry["formulas"] == formulas:
+                        self._entries.move_to_end(entry_id)
+                        self.hits += 1
+                        return {"answer": entry["answer"], "question": entry["question"],
+                                "similarity": float(similarity[j])}
+            self.misses += 1
+            return None
+
+    def store(self, subject, topic, question, answer):
+        vector, formulas = self._embed(question)
+        if not vector.nnz:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {"bucket": (subject, topic), "question": question, "answer": answer,
+                                       "vector": vector, "formulas": formulas, "stored_at": self.clock()}
+            self._by_age.append(entry_id)
+            bucket = self._buckets.setdefault((subject, topic), {"ids": [], "matrix": None})
+            bucket["ids"].append(entry_id)
+            bucket["matrix"] = None
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evicted += 1
+            if len(self._by_age) > 2 * self.max_entries:
+                # Drop ids that were evicted before they expired
+                self._by_age = deque(i for i in self._by_age if i in self._entries)
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        bucket = self._buckets[entry["bucket"]]
+        bucket["ids"].remove(entry_id)
+        bucket["matrix"] = None
+        if not bucket["ids"]:
+            del self._buckets[entry["bucket"]]
+
+    def _expire(self):
+        cutoff = self.clock() - self.ttl
+        while self._by_age:
+            entry_id = self._by_age[0]
+            entry = self._entries.get(entry_id)
+            if entry is not None and entry["stored_at"] > cutoff:
+                break
+            self._by_age.popleft()
+            if entry is not None:
+                self._remove(entry_id)
+                self.expired += 1
+
+    def stats(self):
+        """Hit and eviction counts since startup, and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "entries": len(self._entries), "evicted": self.evicted, "expired": self.expired}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """Return the answer cache shared by every session in this process"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticAnswerCache()
+        return _cache
@@ -0,0 +1,381 @@
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from app.utils.storage import file_lock
+
+COURSE_INDEX_DIR = "data/course_index"
+
+# Vector width; each chunk costs EMBEDDING_DIM * 4 bytes on disk and in the page cache
+EMBEDDING_DIM = 512
+
+# Characters per chunk, and how much consecutive chunks share so no sentence is cut off from its context
+CHUNK_CHARS = 1000
+CHUNK_OVERLAP = 200
+
+# Chunks embedded and appended per write while ingesting
+INGEST_BATCH_SIZE = int(os.environ.get("COURSE_INGEST_BATCH_SIZE", 256))
+
+# Seconds the background ingester sleeps when there is nothing queued
+INGEST_POLL_INTERVAL = float(os.environ.get("COURSE_INGEST_POLL_INTERVAL", 5))
+
+# Seconds a running job is held without a heartbeat before another ingester takes it over, and how
+# many times a job is started before it is given up on (an upload that crashes the ingester every time)
+INGEST_LEASE = float(os.environ.get("COURSE_INGEST_LEASE", 600))
+INGEST_MAX_ATTEMPTS = int(os.environ.get("COURSE_INGEST_MAX_ATTEMPTS", 3))
+
+MATERIAL_TYPES = ["pdf", "txt", "md"]
+
+
+def extract_text(path):
+    """Plain text of a PDF (needs pypdf) or a text/Markdown file"""
+    if path.lower().endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise ValueError("Reading PDFs needs pypdf (pip install pypdf).") from None
+        return "\n\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def chunk_text(text, size=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """Split text into chunks of about `size` characters, ending at sentence or word boundaries"""
+    text = re.sub(r"\s+", " ", text).strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = text.rfind(". ", start + size // 2, end)
+            if cut == -1:
+                cut = text.rfind(" ", start + size // 2, end)
+            if cut != -1:
+                end = cut + 1
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        # Step back by the overlap, then forward to the start of a word
+        start = max(end - overlap, start + 1)
+        space = text.find(" ", start, end)
+        start = space + 1 if space != -1 else start
+    return [c for c in chunks if c]
+
+
+_vectorizer = HashingVectorizer(n_features=EMBEDDING_DIM, ngram_range=(1, 2), stop_words="english", norm=None)
+
+
+def embed(texts):
+    """Unit-length float32 vectors for `texts`, one row each.
+
+    Words and word pairs are hashed into EMBEDDING_DIM signed buckets, which
+    keeps dot products close to those of the full bag of words, with counts
+    damped logarithmically so a repeated word does not dominate a chunk.
+    """
+    counts = _vectorizer.transform(texts).toarray().astype(np.float32)
+    vectors = np.sign(counts) * np.log1p(np.abs(counts))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _slug(subject):
+    return re.sub(r"[^a-z0-9]+", "-", subject.lower()).strip("-") or "subject"
+
+
+class CourseIndex:
+    """Course material per subject, chunked and embedded for retrieval.
+
+    Each subject's vectors are rows of a float32 file read through
+    np.memmap, so a search is one matrix-vector product over pages the OS
+    already has cached, and the index never has to fit in Python objects.
+    The chunk texts and the committed row count live in SQLite. Appends
+    take a file lock, write vectors and texts past the committed rows, then
+    commit the rows, so a crashed ingest leaves nothing visible and is
+    overwritten by the next one.
+
+    Uploads become ingest jobs in the same database. A background thread
+    (or `python -m app.models.course_index ingest`) works through them, so
+    pages never wait on PDF parsing or embedding. A job holds its subject's
+    lock from its first batch to its last and commits its rows together with
+    its "done" status, so searches see all of an upload or none of it. A
+    running job renews a lease after every batch; one whose ingester died
+    is taken over once the lease runs out.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS subjects (
+        subject TEXT PRIMARY KEY,
+        rows INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS chunks (
+        subject TEXT NOT NULL,
+        row INTEGER NOT NULL,
+        source TEXT NOT NULL,
+        text TEXT NOT NULL,
+        PRIMARY KEY (subject, row)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS ingest_jobs (
+        id INTEGER PRIMARY KEY,
+        subject TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        path TEXT NOT NULL,
+        status TEXT NOT NULL,
+        chunks INTEGER NOT NULL DEFAULT 0,
+        error TEXT NOT NULL DEFAULT '',
+        created_at TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        lease_until REAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS ingest_jobs_status_idx ON ingest_jobs (status, id);
+    CREATE INDEX IF NOT EXISTS ingest_jobs_subject_idx ON ingest_jobs (subject, id);
+    """
+
+    def __init__(self, directory=COURSE_INDEX_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, "index.db")
+        self._local = threading.local()
+        self._matrices = {}  # subject -> (rows, memmap)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._wake = threading.Event()
+        os.makedirs(os.path.join(directory, "uploads"), exist_ok=True)
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(ingest_jobs)")}
+        for column in ("attempts INTEGER NOT NULL DEFAULT 0", "lease_until REAL NOT NULL DEFAULT 0"):
+            if column.split()[0] not in columns:  # Index created before jobs had leases
+                conn.execute(f"ALTER TABLE ingest_jobs ADD COLUMN {column}")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _vectors_path(self, subject):
+        return os.path.join(self.directory, _slug(subject) + ".f32")
+
+    def rows(self, subject):
+        """Number of chunks indexed for `subject`"""
+        row = self._connect().execute("SELECT rows FROM subjects WHERE subject = ?", (subject,)).fetchone()
+        return row["rows"] if row else 0
+
+    def _write(self, subject, start, source, texts):
+        """Embed chunks and write them at rows `start`.. of `subject`; call with the subject locked.
+
+        Rows past the committed count are invisible to searches, so nothing
+        written here shows until the caller commits the new count.
+        """
+        vectors = embed(texts)
+        path = self._vectors_path(subject)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(start * EMBEDDING_DIM * 4)
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO chunks (subject, row, source, text) VALUES (?, ?, ?, ?)",
+                             [(subject, start + i, source, text) for i, text in enumerate(texts)])
+        return start + len(texts)
+
+    def add(self, subject, source, texts):
+        """Embed and append chunks of `source` to `subject`'s index"""
+        if not texts:
+            return
+        with file_lock(self._vectors_path(subject) + ".lock"):
+            rows = self._write(subject, self.rows(subject), source, texts)
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO subjects (subject, rows) VALUES (?, ?)", (subject, rows))
+
+    def _matrix(self, subject):
+        """Memory-mapped (rows, EMBEDDING_DIM) vectors of `subject`, reopened when rows are added"""
+        rows = self.rows(subject)
+        with self._lock:
+            cached = self._matrices.get(subject)
+            if cached is None or cached[0] != rows:
+                matrix = None
+                if rows:
+                    matrix = np.memmap(self._vectors_path(subject), dtype=np.float32, mode="r",
+                                       shape=(rows, EMBEDDING_DIM))
+                cached = self._matrices[subject] = (rows, matrix)
+            return cached[1]
+
+    def search(self, subject, query, k=4, min_score=0.1):
+        """The `k` chunks of `subject` closest to `query` as [{"source", "text", "score"}], best first"""
+        matrix = self._matrix(subject)
+        if matrix is None:
+            return []
+        scores = matrix @ embed([query])[0]
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = [int(i) for i in top[np.argsort(-scores[top])] if scores[i] >= min_score]
+        if not top:
+            return []
+        placeholders = ",".join("?" * len(top))
+        rows = self._connect().execute(
+            f"SELECT row, source, text FROM chunks WHERE subject = ? AND row IN ({placeholders})", [subject, *top]
+        ).fetchall()
+        by_row = {row["row"]: row for row in rows}
+        return [{"source": by_row[i]["source"], "text": by_row[i]["text"], "score": float(scores[i])}
+                for i in top if i in by_row]
+
+    # Ingest jobs
+
+    def submit(self, subject, filename, data):
+        """Queue an uploaded file for ingestion and return the job id"""
+        conn = self._connect()
+        with conn:
+            job_id = conn.execute(
+                "INSERT INTO ingest_jobs (subject, filename, path, status, created_at) VALUES (?, ?, '', 'queued', ?)",
+                (subject, filename, datetime.now().isoformat()),
+            ).lastrowid
+            safe_name = re.sub(r"[^\w.-]+", "_", filename)
+            path = os.path.join(self.directory, "uploads", f"{job_id}-{safe_name}")
+            with open(path, "wb") as f:
+                f.write(data)
+            conn.execute("UPDATE ingest_jobs SET path = ? WHERE id = ?", (path, job_id))
+        self._wake.set()
+        return job_id
+
+    def jobs(self, subject, limit=10):
+        """Most recent ingest jobs for `subject`"""
+        rows = self._connect().execute(
+            "SELECT id, filename, status, chunks, error, created_at FROM ingest_jobs WHERE subject = ? "
+            "ORDER BY id DESC LIMIT ?", (subject, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _claim(self, lease=INGEST_LEASE, max_attempts=INGEST_MAX_ATTEMPTS):
+        """Take the oldest queued job, or a running one whose lease ran out, and return it"""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM ingest_jobs WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY id LIMIT 1", (time.time(),),
+                ).fetchone()
+                if row is None or row["attempts"] < max_attempts:
+                    break
+                conn.execute("UPDATE ingest_jobs SET status = 'failed', error = ? WHERE id = ?",
+                             (f"Stopped after {row['attempts']} attempts", row["id"]))
+            if row is None:
+                return None
+            conn.execute("UPDATE ingest_jobs SET status = 'running', chunks = 0, attempts = ?, lease_until = ? "
+                         "WHERE id = ?", (row["attempts"] + 1, time.time() + lease, row["id"]))
+        return {**dict(row), "attempts": row["attempts"] + 1}
+
+    def _heartbeat(self, job, chunks, lease=INGEST_LEASE):
+        """Record progress and renew the job's lease; False if another ingester has taken the job over"""
+        conn = self._connect()
+        with conn:
+            return conn.execute(
+                "UPDATE ingest_jobs SET chunks = ?, lease_until = ? WHERE id = ? AND attempts = ?",
+                (chunks, time.time() + lease, job["id"], job["attempts"]),
+            ).rowcount == 1
+
+    def _ingest(self, job, batch_size):
+        """Index a job's file and mark it done, committing its rows only with that status"""
+        chunks = chunk_text(extract_text(job["path"]))
+        subject = job["subject"]
+        with file_lock(self._vectors_path(subject) + ".lock"):
+            start = rows = self.rows(subject)
+            for i in range(0, len(chunks), batch_size):
+                rows = self._write(subject, rows, job["filename"], chunks[i:i + batch_size])
+                if not self._heartbeat(job, rows - start):
+                    return
+            conn = self._connect()
+            with conn:
+                owned = conn.execute("UPDATE ingest_jobs SET status = 'done', error = '' WHERE id = ? AND attempts = ?",
+                                     (job["id"], job["attempts"])).rowcount == 1
+                if owned:
+                    conn.execute("INSERT OR REPLACE INTO subjects (subject, rows) VALUES (?, ?)", (subject, rows))
+
+    def run_pending(self, batch_size=INGEST_BATCH_SIZE):
+        """Ingest every queued job, in order; returns how many ran"""
+        ran = 0
+        while (job := self._claim()) is not None:
+            ran += 1
+            try:
+                self._ingest(job, batch_size)
+            except Exception as e:
+                conn = self._connect()
+                with conn:
+                    conn.execute("UPDATE ingest_jobs SET status = 'failed', error = ? WHERE id = ? AND attempts = ?",
+                                 (str(e), job["id"], job["attempts"]))
+        return ran
+
+    def start_worker(self, interval=INGEST_POLL_INTERVAL):
+        """Run queued ingest jobs from a daemon thread, waking on submit() or every `interval` seconds"""
+        if self._worker is not None:
+            return
+
+        def run():
+            while True:
+                self._wake.wait(interval)
+                self._wake.clear()
+                try:
+                    self.run_pending()
+                except sqlite3.Error:
+                    pass  # Database busy; try again on the next wake
+
+        self._worker = threading.Thread(target=run, name="course-ingester", daemon=True)
+        self._worker.start()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_course_index():
+    """Return the course index shared by every session, starting its ingester on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = CourseIndex()
+            _index.start_worker()
+        return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the course material index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Index files for a subject now, without the app")
+    ingest.add_argument("--subject", required=True)
+    ingest.add_argument("files", nargs="+")
+    search = commands.add_parser("search", help="Show the chunks a question retrieves")
+    search.add_argument("--subject", required=True)
+    search.add_argument("-k", type=int, default=4)
+    search.add_argument("query")
+    args = parser.parse_args()
+
+    index = CourseIndex()
+    if args.command == "ingest":
+        for path in args.files:
+            with open(path, "rb") as f:
+                index.submit(args.subject, os.path.basename(path), f.read())
+        start = time.perf_counter()
+        index.run_pending()
+        for job in reversed(index.jobs(args.subject, limit=len(args.files))):
+            print(f"{job['filename']}: {job['status']}, {job['chunks']} chunks {job['error']}".rstrip())
+        print(f"{index.rows(args.subject)} chunks indexed for {args.subject} ({time.perf_counter() - start:.1f}s)")
+    else:
+        for hit in index.search(args.subject, args.query, k=args.k):
+            print(f"[{hit['score']:.2f}] {hit['source']}: {hit['text'][:200]}")
+
+
+if __name__ == "__main__":
+    # python -m app.models.course_index ingest --subject "MATH 101" notes.pdf week1.md
+    main()
@@ -0,0 +1,192 @@
+import hashlib
+import os
+import re
+import threading
+
+# "openai" talks to any OpenAI-compatible chat API, "local" batches questions to a local model server,
+# and "stub" answers locally and deterministically
+TUTOR_PROVIDER = os.environ.get("TUTOR_PROVIDER", "openai" if os.environ.get("OPENAI_API_KEY") else "stub")
+TUTOR_MODEL = os.environ.get("TUTOR_MODEL", "gpt-3.5-turbo")
+
+# Point at a self-hosted or proxy endpoint; the client's own OPENAI_BASE_URL applies otherwise
+TUTOR_BASE_URL = os.environ.get("TUTOR_BASE_URL") or None
+
+TUTOR_MAX_TOKENS = int(os.environ.get("TUTOR_MAX_TOKENS", 800))
+TUTOR_TIMEOUT = float(os.environ.get("TUTOR_TIMEOUT", 60))
+
+# Conversations a local model server is sent in one call ("local" provider only)
+TUTOR_BATCH_SIZE = int(os.environ.get("TUTOR_BATCH_SIZE", 8))
+
+SYSTEM_PROMPT = (
+    "You are a patient tutor for a university student taking {subject}, currently studying {topic}. "
+    "Explain step by step, check understanding, and prefer hints over handing out full solutions to "
+    "graded work. Use Markdown, and LaTeX between $ signs for maths."
+)
+
+
+class TutorError(Exception):
+    """The tutor could not produce an answer; the message is safe to show the student"""
+
+
+def build_messages(subject, topic, question, context="", history=(), sources=(), summary=""):
+    """Chat messages for a question, after any earlier turns of the same conversation.
+
+    `sources` are course material chunks ({"source", "text"}) to ground the answer in, and
+    `summary` stands in for turns of the conversation older than `history`.
+    """
+    system = SYSTEM_PROMPT.format(subject=subject, topic=topic)
+    if summary:
+        system += "\n\nEarlier in this conversation:\n" + summary
+    if sources:
+        system += ("\n\nExcerpts from the course material follow. Base your answer on them where they apply, "
+                   "and say which one you used.\n\n" +
+                   "\n\n".join(f"[{i}] {s['source']}:\n{s['text']}" for i, s in enumerate(sources, 1)))
+    messages = [{"role": "system", "content": system}]
+    messages += list(history)
+    content = question.strip()
+    if context.strip():
+        content += "\n\nContext:\n" + context.strip()
+    messages.append({"role": "user", "content": content})
+    return messages
+
+
+class TutorProvider:
+    """A model the tutor can ask; stream() yields the answer's text as it is generated"""
+
+    name = "base"
+
+    # Conversations stream_batch() can answer with one model call
+    max_batch_size = 1
+
+    def stream(self, messages):
+        raise NotImplementedError
+
+    def stream_batch(self, conversations):
+        """Yield (i, text) for several conversations, i indexing `conversations`"""
+        for i, messages in enumerate(conversations):
+            for text in self.stream(messages):
+                yield i, text
+
+
+class OpenAIProvider(TutorProvider):
+    """Streams chat completions from the OpenAI API or any compatible server"""
+
+    name = "openai"
+
+    def __init__(self, model=TUTOR_MODEL, base_url=TUTOR_BASE_URL, max_tokens=TUTOR_MAX_TOKENS,
+                 timeout=TUTOR_TIMEOUT, api_key=None):
+        import httpx
+        import openai
+
+        self._openai = openai
+        # Our own httpx client: the one openai 1.3 builds passes `proxies`, which httpx 0.28 removed
+        self.client = openai.OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=1,
+                                    http_client=httpx.Client(timeout=timeout))
+        self.model = model
+        self.max_tokens = max_tokens
+
+    def stream(self, messages):
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model, messages=messages, max_tokens=self.max_tokens, temperature=0.3, stream=True,
+            )
+            try:
+                for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Hang up if the page stops reading early, so the server stops generating
+                response.response.close()
+        except self._openai.APIError as e:
+            raise TutorError("The tutor is unavailable right now. Please try again in a moment.") from e
+
+
+class LocalProvider(OpenAIProvider):
+    """Answers several conversations with one call to a local model server.
+
+    Servers such as vLLM and llama.cpp take a list of prompts on the
+    OpenAI-compatible completions endpoint and run them as one batch, and
+    each streamed choice carries the index of its prompt.
+    """
+
+    name = "local"
+
+    def __init__(self, model=TUTOR_MODEL, base_url=TUTOR_BASE_URL or "http://localhost:8001/v1",
+                 max_tokens=TUTOR_MAX_TOKENS, timeout=TUTOR_TIMEOUT, batch_size=TUTOR_BATCH_SIZE):
+        # Local servers ignore the key, but the client insists on one
+        super().__init__(model, base_url, max_tokens, timeout, api_key=os.environ.get("OPENAI_API_KEY", "local"))
+        self.max_batch_size = batch_size
+
+    @staticmethod
+    def prompt(messages):
+        """Chat messages as one plain-text prompt ending where the tutor's reply begins"""
+        speakers = {"system": "", "user": "Student: ", "assistant": "Tutor: "}
+        return "\n\n".join(speakers[m["role"]] + m["content"] for m in messages) + "\n\nTutor:"
+
+    def stream(self, messages):
+        for _, text in self.stream_batch([messages]):
+            yield text
+
+    def stream_batch(self, conversations):
+        try:
+            response = self.client.completions.create(
+                model=self.model, prompt=[self.prompt(m) for m in conversations], max_tokens=self.max_tokens,
+                temperature=0.3, stop=["\nStudent:"], stream=True,
+            )
+            try:
+                for chunk in response:
+                    for choice in chunk.choices:
+                        if choice.text:
+                            yield choice.index, choice.text
+            finally:
+                response.response.close()
+        except self._openai.APIError as e:
+            raise TutorError("The tutor is unavailable right now. Please try again in a moment.") from e
+
+
+class StubProvider(TutorProvider):
+    """Local tutor with no model behind it, for tests, demos and offline development.
+
+    The answer depends only on the conversation, so the same question always
+    streams the same text, a few words per chunk.
+    """
+
+    name = "stub"
+
+    STEPS = [
+        "Restate what the question is asking in your own words.",
+        "List what you already know about {topic} that applies here.",
+        "Work through one small example before the general case.",
+        "Check the result against a case you can verify by hand.",
+        "Note which step felt least clear and revisit it.",
+    ]
+
+    def stream(self, messages):
+        question = messages[-1]["content"].split("\n\nContext:")[0].replace("\n", "\n> ")
+        topic = re.search(r"currently studying (.+?)\. ", messages[0]["content"])
+        topic = topic.group(1) if topic else "this topic"
+        seed = int(hashlib.blake2b(repr(messages).encode(), digest_size=4).hexdigest(), 16)
+        steps = [self.STEPS[i].format(topic=topic) for i in sorted({(seed + 2 * n) % len(self.STEPS) for n in range(3)})]
+        answer = (f"Let's work through this together.\n\n> {question}\n\n" +
+                  "".join(f"{i}. {step}\n" for i, step in enumerate(steps, 1)) +
+                  "\nWould you like me to explain any step in more detail?")
+        words = answer.split(" ")
+        for i in range(0, len(words), 3):
+            yield " ".join(words[i:i + 3]) + (" " if i + 3 < len(words) else "")
+
+
+PROVIDERS = {"openai": OpenAIProvider, "local": LocalProvider, "stub": StubProvider}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_tutor_provider():
+    """Return the configured tutor provider, shared by every session in this process"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if TUTOR_PROVIDER not in PROVIDERS:
+                raise ValueError(f"Unknown TUTOR_PROVIDER: {TUTOR_PROVIDER}")
+            _provider = PROVIDERS[TUTOR_PROVIDER]()
+        return _provider
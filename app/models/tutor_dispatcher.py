@@ -0,0 +1,218 @@
+import asyncio
+import atexit
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.models.tutor import TUTOR_TIMEOUT, TutorError, get_tutor_provider
+
+# Model calls running at once per provider; further questions wait their turn
+TUTOR_MAX_IN_FLIGHT = int(os.environ.get("TUTOR_MAX_IN_FLIGHT", 8))
+
+# How long a provider that batches waits for more questions to share a call
+TUTOR_BATCH_WAIT = float(os.environ.get("TUTOR_BATCH_WAIT_MS", 25)) / 1000
+
+# Questions one student may have waiting at once
+TUTOR_MAX_QUEUED_PER_USER = int(os.environ.get("TUTOR_MAX_QUEUED_PER_USER", 2))
+
+# Upper bounds of the histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_DONE = object()
+
+
+class Histogram:
+    """Durations counted into fixed buckets, the way Prometheus histograms keep them"""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, ms)] += 1
+            self.count += 1
+            self.total += ms
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile; inf past the last bucket"""
+        with self._lock:
+            rank, seen = q * self.count, 0
+            for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+                seen += count
+                if seen >= rank and seen:
+                    return bound
+            return 0.0
+
+    def snapshot(self):
+        """Count, mean, approximate p50/p95/p99 and per-bucket counts keyed by upper bound"""
+        with self._lock:
+            count, total, counts = self.count, self.total, list(self.counts)
+        return {"count": count, "mean_ms": total / count if count else 0.0, "p50_ms": self.quantile(0.5),
+                "p95_ms": self.quantile(0.95), "p99_ms": self.quantile(0.99),
+                "buckets": dict(zip(self.buckets + (float("inf"),), counts))}
+
+
+class TutorDispatcher:
+    """Schedules tutor questions onto one provider.
+
+    Pages call stream() from their own threads as they would call the
+    provider. Behind it an asyncio loop on a daemon thread decides what runs
+    next: at most `max_in_flight` model calls at once, students served
+    round-robin so one student's questions never hold up another's, and, for
+    providers that batch, questions arriving within `batch_wait` seconds of
+    each other sent as one call. Calls run on a thread pool and hand each
+    answer's text straight to the page waiting for it.
+
+    `queue_wait` and `latency` are histograms of how long questions waited
+    for a slot and how long their model call took.
+    """
+
+    def __init__(self, provider, max_in_flight=TUTOR_MAX_IN_FLIGHT, batch_wait=TUTOR_BATCH_WAIT,
+                 max_queued_per_user=TUTOR_MAX_QUEUED_PER_USER, timeout=TUTOR_TIMEOUT):
+        self.provider = provider
+        self.max_in_flight = max_in_flight
+        self.batch_wait = batch_wait
+        self.max_queued_per_user = max_queued_per_user
+        self.timeout = timeout
+        self.queue_wait = Histogram()
+        self.latency = Histogram()
+        self.batch_sizes = Counter()
+        self._queues = OrderedDict()  # user -> deque of their waiting requests, in turn order
+        self._queued = 0
+        self._in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix=f"tutor-{provider.name}")
+        self._loop = asyncio.new_event_loop()
+        self._wake = asyncio.Event()
+        threading.Thread(target=self._loop.run_forever, name=f"tutor-dispatch-{provider.name}", daemon=True).start()
+        self._dispatching = asyncio.run_coroutine_threadsafe(self._dispatch(), self._loop)
+
+    def stream(self, user, messages):
+        """Yield the answer's text as provider.stream() would, once it is this question's turn"""
+        request = {"user": user, "messages": messages, "queued_at": time.perf_counter(), "out": queue.Queue(),
+                   "cancelled": False}
+        asyncio.run_coroutine_threadsafe(self._enqueue(request), self._loop).result()
+        try:
+            while True:
+                try:
+                    text = request["out"].get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TutorError("The tutor is busy right now. Please try again in a moment.") from None
+                if text is _DONE:
+                    return
+                if isinstance(text, Exception):
+                    raise text
+                yield text
+        finally:
+            # Still queued: skipped when its turn comes; answering: the call stops once nobody is reading
+            request["cancelled"] = True
+
+    async def _enqueue(self, request):
+        waiting = self._queues.setdefault(request["user"], deque())
+        if len(waiting) >= self.max_queued_per_user:
+            raise TutorError("You already have questions waiting for the tutor. Please wait for those answers.")
+        waiting.append(request)
+        self._queued += 1
+        self._wake.set()
+
+    def _take(self, size):
+        """Up to `size` waiting requests, one per student in turn"""
+        batch = []
+        while self._queues and len(batch) < size:
+            user, waiting = next(iter(self._queues.items()))
+            request = waiting.popleft()
+            self._queued -= 1
+            if waiting:
+                self._queues.move_to_end(user)
+            else:
+                del self._queues[user]
+            if not request["cancelled"]:
+                batch.append(request)
+        return batch
+
+    async def _dispatch(self):
+        slots = asyncio.Semaphore(self.max_in_flight)
+        while True:
+            await slots.acquire()
+            while not self._queued:
+                self._wake.clear()
+                await self._wake.wait()
+            size = self.provider.max_batch_size
+            deadline = self._loop.time() + self.batch_wait
+            while size > 1 and self._queued < size and self._loop.time() < deadline:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), deadline - self._loop.time())
+                except asyncio.TimeoutError:
+                    break
+            batch = self._take(size)
+            if not batch:
+                slots.release()
+                continue
+            self._in_flight += 1
+            self.batch_sizes[len(batch)] += 1
+            call = self._loop.run_in_executor(self._executor, self._call, batch)
+            call.add_done_callback(lambda _: self._finished(slots))
+
+    def _finished(self, slots):
+        self._in_flight -= 1
+        slots.release()
+
+    def _call(self, batch):
+        started = time.perf_counter()
+        for request in batch:
+            self.queue_wait.observe((started - request["queued_at"]) * 1000)
+        try:
+            answers = self.provider.stream_batch([request["messages"] for request in batch])
+            try:
+                for i, text in answers:
+                    batch[i]["out"].put(text)
+                    if all(request["cancelled"] for request in batch):
+                        break
+            finally:
+                answers.close()
+        except TutorError as e:
+            error = e
+        except Exception as e:
+            # Never leave a page waiting on a call that failed in a way the provider did not expect
+            error = TutorError("The tutor is unavailable right now. Please try again in a moment.")
+            error.__cause__ = e
+        else:
+            error = None
+        self.latency.observe((time.perf_counter() - started) * 1000)
+        for request in batch:
+            request["out"].put(error or _DONE)
+
+    def close(self):
+        """Stop dispatching; calls already running finish, questions still waiting time out"""
+        self._dispatching.cancel()
+        # Stop one loop turn later, once the cancellation has reached the dispatch task
+        self._loop.call_soon_threadsafe(self._loop.call_soon, self._loop.stop)
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        """Queue depth, calls in flight, batch sizes and the wait and latency histograms"""
+        return {"provider": self.provider.name, "queued": self._queued, "in_flight": self._in_flight,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())), "queue_wait": self.queue_wait.snapshot(),
+                "latency": self.latency.snapshot()}
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_tutor_dispatcher(provider=None):
+    """Return the dispatcher for `provider` (the configured one by default), shared by every session"""
+    provider = provider or get_tutor_provider()
+    with _dispatchers_lock:
+        if provider.name not in _dispatchers:
+            _dispatchers[provider.name] = TutorDispatcher(provider)
+            atexit.register(_dispatchers[provider.name].close)
+        return _dispatchers[provider.name]
@@ -2,150 +2,170 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 import plotly.express as px
+from app.auth import current_user_email
+from app.components.charts import plotly_chart
+from app.components.event_list import event_cards
+from app.utils.event_recommender import recommend_events
+from app.utils.event_store import EVENT_CATEGORIES, get_event_store
+
+# Events shown per page of the catalog, and at most per search
+EVENTS_PAGE_SIZE = 10
+SEARCH_RESULTS_LIMIT = 50
 
 def show():
     st.title("Campus Events")
+    store = get_event_store()
+    
+    # Search titles, descriptions, locations and tags; words match as prefixes
+    search_text = st.text_input("Search events", placeholder="e.g. machine learning, library, basketball")
+    
+    # Event categories and tags
+    categories = ["All Events"] + EVENT_CATEGORIES
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_category = st.selectbox("Filter by Category", categories)
+    with col2:
+        selected_tag = st.selectbox("Filter by Tag", ["All Tags"] + store.tags())
+    filters = (
+        None if selected_category == "All Events" else selected_category,
+        None if selected_tag == "All Tags" else selected_tag,
+    )
+    
+    # Cursors of the pages visited so far; start over when the filters change
+    if st.session_state.get('event_filters') != filters:
+        st.session_state.event_filters = filters
+        st.session_state.event_cursors = [None]
+    cursors = st.session_state.event_cursors
+    
+    # Ranked search results, or the catalog; either way only one page is rendered
+    searching = bool(search_text.strip())
+    if searching:
+        results = store.search(search_text, *filters, limit=SEARCH_RESULTS_LIMIT)
+        if st.session_state.get('event_search') != (search_text, filters):
+            st.session_state.event_search = (search_text, filters)
+            st.session_state.event_search_page = 0
+        page = st.session_state.event_search_page
+        events = results[page * EVENTS_PAGE_SIZE:(page + 1) * EVENTS_PAGE_SIZE]
+        has_previous, has_next = page > 0, (page + 1) * EVENTS_PAGE_SIZE < len(results)
+        st.caption(f"{len(results)} matching upcoming events")
+    else:
+        events, next_cursor = store.upcoming(*filters, cursor=cursors[-1], limit=EVENTS_PAGE_SIZE)
+        page = len(cursors) - 1
+        has_previous, has_next = page > 0, next_cursor is not None
+    
+    if not events:
+        st.info("No upcoming events match these filters.")
     
-    # Event categories
-    categories = ["All Events", "Academic", "Social", "Sports", "Career", "Workshops"]
-    selected_category = st.selectbox("Filter by Category", categories)
-    
-    # Sample event data
-    events = [
-        {
-            "Title": "AI & Machine Learning Workshop",
-            "Category": "Workshops",
-            "Date": "2023-09-27",
-            "Time": "14:00",
-            "Location": "CS Building Room 101",
-            "Description": "Learn about the latest developments in AI and ML",
-            "Attendees": 45,
-            "Max Capacity": 50,
-            "Tags": ["AI", "Technology", "Workshop"]
-        },
-        {
-            "Title": "Basketball Tournament",
-            "Category": "Sports",
-            "Date": "2023-09-30",
-            "Time": "15:00",
-            "Location": "Sports Complex",
-            "Description": "Annual inter-department basketball tournament",
-            "Attendees": 120,
-            "Max Capacity": 200,
-            "Tags": ["Sports", "Tournament", "Basketball"]
-        },
-        {
-            "Title": "Career Fair 2023",
-            "Category": "Career",
-            "Date": "2023-10-05",
-            "Time": "10:00",
-            "Location": "Student Center",
-            "Description": "Connect with top companies and explore internship opportunities",
-            "Attendees": 300,
-            "Max Capacity": 500,
-            "Tags": ["Career", "Internship", "Networking"]
-        },
-        {
-            "Title": "Study Group: Calculus",
-            "Category": "Academic",
-            "Date": "2023-09-25",
-            "Time": "16:00",
-            "Location": "Library Room 204",
-            "Description": "Weekly study group for MATH 101 students",
-            "Attendees": 15,
-            "Max Capacity": 20,
-            "Tags": ["Study Group", "Math", "Academic"]
-        },
-        {
-            "Title": "Movie Night",
-            "Category": "Social",
-            "Date": "2023-09-28",
-            "Time": "19:00",
-            "Location": "Student Lounge",
-            "Description": "Watch and discuss the latest blockbuster",
-            "Attendees": 80,
-            "Max Capacity": 100,
-            "Tags": ["Social", "Entertainment", "Movie"]
-        }
-    ]
-    
-    events_df = pd.DataFrame(events)
-    
-    # Filter events based on category
-    if selected_category != "All Events":
-        events_df = events_df[events_df["Category"] == selected_category]
-    
-    # Display events in a grid
-    for _, event in events_df.iterrows():
+    # This user's RSVPs and the waitlists for the events on this page; guests share one name, so they get none
+    user = current_user_email()
+    signed_in = user != "guest"
+    event_ids = [event["id"] for event in events]
+    my_rsvps = store.rsvp_statuses(user, event_ids) if signed_in else {}
+    waiting = store.waitlist_counts(event_ids)
+    
+    # Display events in a grid, each card formatted up front as one markdown element
+    for event, card in zip(events, event_cards(events)):
         with st.container():
             col1, col2 = st.columns([3, 1])
             
             with col1:
-                st.subheader(event["Title"])
-                st.markdown(f"**Date & Time:** {event['Date']} at {event['Time']}")
-                st.markdown(f"**Location:** {event['Location']}")
-                st.markdown(f"**Description:** {event['Description']}")
-                
-                # Tags
-                tags_html = " ".join([f'<span style="background-color: #e1e1e1; padding: 2px 8px; border-radius: 12px; margin-right: 5px;">{tag}</span>' for tag in event["Tags"]])
-                st.markdown(tags_html, unsafe_allow_html=True)
+                st.markdown(card, unsafe_allow_html=True)
             
             with col2:
                 # Attendance progress bar
-                progress = event["Attendees"] / event["Max Capacity"]
+                progress = event["attendees"] / event["max_capacity"]
                 st.progress(progress)
-                st.markdown(f"{event['Attendees']}/{event['Max Capacity']} attendees")
+                st.markdown(f"{event['attendees']}/{event['max_capacity']} attendees")
+                
+                if event["id"] in waiting:
+                    st.caption(f"{waiting[event['id']]} on the waitlist")
                 
-                if event["Attendees"] < event["Max Capacity"]:
-                    if st.button("RSVP", key=f"rsvp_{event['Title']}"):
-                        st.success("You've successfully RSVP'd for this event!")
+                status, position = my_rsvps.get(event["id"], (None, None))
+                if not signed_in:
+                    if event["attendees"] >= event["max_capacity"]:
+                        st.warning("Event is full!")
+                    st.caption("Sign in to RSVP.")
+                elif status == "going":
+                    st.success("You're going!")
+                    if st.button("Cancel RSVP", key=f"cancel_{event['id']}"):
+                        store.cancel_rsvp(event["id"], user)
+                        st.experimental_rerun()
+                elif status == "waitlist":
+                    st.info(f"You're #{position} on the waitlist")
+                    if st.button("Leave Waitlist", key=f"cancel_{event['id']}"):
+                        store.cancel_rsvp(event["id"], user)
+                        st.experimental_rerun()
+                elif event["attendees"] < event["max_capacity"]:
+                    if st.button("RSVP", key=f"rsvp_{event['id']}"):
+                        # Capacity is checked atomically; a late click lands on the waitlist
+                        store.rsvp(event["id"], user)
+                        st.experimental_rerun()
                 else:
                     st.warning("Event is full!")
+                    if st.button("Join Waitlist", key=f"rsvp_{event['id']}"):
+                        store.rsvp(event["id"], user)
+                        st.experimental_rerun()
+    
+    # Page through search results by position, and the catalog with keyset cursors
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if has_previous and st.button("← Previous"):
+            if searching:
+                st.session_state.event_search_page -= 1
+            else:
+                cursors.pop()
+            st.experimental_rerun()
+    with col2:
+        st.caption(f"Page {page + 1}")
+    with col3:
+        if has_next and st.button("Next →"):
+            if searching:
+                st.session_state.event_search_page += 1
+            else:
+                cursors.append(next_cursor)
+            st.experimental_rerun()
     
     # Event analytics
     st.markdown("### Event Analytics")
     
-    # Category distribution
-    category_counts = events_df["Category"].value_counts()
-    fig = px.pie(values=category_counts.values, names=category_counts.index,
+    # Category distribution of upcoming events, counted in the catalog
+    category_counts = pd.DataFrame(list(store.category_counts().items()), columns=["Category", "Events"])
+    plotly_chart(px.pie, category_counts, values="Events", names="Category",
                  title="Event Distribution by Category")
-    st.plotly_chart(fig, use_container_width=True)
     
-    # Upcoming events timeline
+    # Upcoming events timeline for the next month
     st.markdown("### Upcoming Events Timeline")
-    events_df["DateTime"] = pd.to_datetime(events_df["Date"] + " " + events_df["Time"])
-    events_df = events_df.sort_values("DateTime")
-    
-    fig2 = px.scatter(events_df, x="DateTime", y="Title",
+    month_ahead = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
+    timeline, _ = store.upcoming(*filters, end=month_ahead, limit=100)
+    if timeline:
+        events_df = pd.DataFrame(timeline)
+        events_df["DateTime"] = pd.to_datetime(events_df["date"] + " " + events_df["time"])
+        events_df = events_df.rename(columns={"title": "Title"})
+        
+        plotly_chart(px.scatter, events_df[["DateTime", "Title"]], x="DateTime", y="Title",
                      title="Upcoming Events Timeline",
                      labels={"DateTime": "Date & Time", "Title": "Event"})
-    st.plotly_chart(fig2, use_container_width=True)
     
     # Event recommendations
     st.markdown("### Recommended for You")
     
-    # Sample recommendations based on user interests
-    recommendations = [
-        {
-            "Event": "Data Science Workshop",
-            "Reason": "Based on your interest in technology and data analysis",
-            "Match": "95%"
-        },
-        {
-            "Event": "Study Group: Physics",
-            "Reason": "Matches your current course schedule",
-            "Match": "90%"
-        },
-        {
-            "Event": "Career Fair 2023",
-            "Reason": "Aligns with your career interests",
-            "Match": "85%"
-        }
-    ]
+    # Scored against this user's RSVPs, chosen interests and courses; a guest has no RSVPs of their own
+    col1, col2 = st.columns(2)
+    with col1:
+        interests = st.multiselect("Your interests", store.tags(), key="event_interests")
+    with col2:
+        courses = st.text_input("Your courses", placeholder="e.g. MATH 101, CS 150", key="event_courses")
+    courses = [c.strip() for c in courses.split(",") if c.strip()]
+    recommendations = recommend_events(store, user if signed_in else None, interests, courses)
+    if not recommendations:
+        st.info("RSVP to events or pick some interests to get recommendations." if signed_in else
+                "Pick some interests or courses to get recommendations, or sign in to get them from your RSVPs.")
     
     for rec in recommendations:
-        with st.expander(f"{rec['Event']} ({rec['Match']} match)"):
-            st.markdown(rec["Reason"])
+        event = rec["event"]
+        with st.expander(f"{event['title']} ({rec['score']:.0%} match)"):
+            st.markdown(f"**{event['date']} at {event['time']}** · {event['location']}")
+            st.markdown(rec["reason"])
     
     # Create new event form
     st.markdown("### Create New Event")
@@ -155,7 +175,7 @@ def show():
         
         with col1:
             title = st.text_input("Event Title")
-            category = st.selectbox("Category", categories[1:])  # Exclude "All Events"
+            category = st.selectbox("Category", EVENT_CATEGORIES)
             date = st.date_input("Date")
             time = st.time_input("Time")
         
@@ -168,4 +188,17 @@ def show():
         submitted = st.form_submit_button("Create Event")
         
         if submitted:
-            st.success("Event created successfully!") 
\ No newline at end of file
+            if not title:
+                st.error("Please give the event a title.")
+            else:
+                store.add({
+                    "title": title,
+                    "category": category,
+                    "date": date.strftime('%Y-%m-%d'),
+                    "time": time.strftime('%H:%M'),
+                    "location": location,
+                    "description": description,
+                    "max_capacity": max_capacity,
+                    "tags": tags.split(","),
+                }, created_by=current_user_email())
+                st.success("Event created successfully!") 
\ No newline at end of file
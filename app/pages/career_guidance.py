@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from app.components.charts import plotly_chart
 from datetime import datetime
 
 def show():
@@ -190,11 +191,9 @@ def show():
     trends_df = pd.DataFrame(trends_data)
     
     # Growth rate chart
-    fig = px.bar(trends_df, x="Industry", y="Growth Rate",
+    plotly_chart(px.bar, trends_df, x="Industry", y="Growth Rate",
                  title="Industry Growth Rates (%)")
-    st.plotly_chart(fig, use_container_width=True)
     
     # Job openings chart
-    fig2 = px.bar(trends_df, x="Industry", y="Job Openings",
-                  title="Current Job Openings")
-    st.plotly_chart(fig2, use_container_width=True) 
\ No newline at end of file
+    plotly_chart(px.bar, trends_df, x="Industry", y="Job Openings",
+                 title="Current Job Openings") 
\ No newline at end of file
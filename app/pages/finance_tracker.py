@@ -2,50 +2,101 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import json
 import os
+from datetime import datetime, timedelta
+from app.auth import current_user_email
+from app.components.charts import plotly_chart
+from app.components.tabs import lazy_tabs
+from app.utils.expense_analytics import FREQUENCIES, get_analytics, month_options
+from app.utils.expense_export import save_export
+from app.utils.expense_import import import_statement
+from app.utils.expense_ledger import ExpenseLedger
+from app.utils.expense_store import LegacyExpenses, get_expense_store
+
+def budget_figure(budget_df):
+    """Horizontal bars of budget against actual spending per category"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=budget_df["Category"],
+        x=budget_df["Budget"],
+        name="Budget",
+        orientation='h',
+        marker=dict(color='rgba(58, 71, 80, 0.6)')
+    ))
+    fig.add_trace(go.Bar(
+        y=budget_df["Category"],
+        x=budget_df["Spent"],
+        name="Actual",
+        orientation='h',
+        marker=dict(color='rgba(246, 78, 139, 0.6)')
+    ))
+    
+    fig.update_layout(
+        title="Budget vs. Actual Spending by Category",
+        barmode='group',
+        height=400
+    )
+    return fig
 
 def show():
     st.title("Finance Tracker")
     
-    # Define tabs for different financial management features
-    tab1, tab2, tab3 = st.tabs(["Monthly Overview", "Track Expenses", "Budget Planning"])
+    # Define tabs for different financial management features; only the selected one is built
+    tab = lazy_tabs(["Monthly Overview", "Track Expenses", "Budget Planning"], key="finance_tab")
     
-    # Load or initialize expense data
-    if 'expenses' not in st.session_state:
-        # Try to load from file, or create new if file doesn't exist
+    # Load expense data once per session from the local files or the API
+    store = get_expense_store()
+    user = current_user_email()
+    if st.session_state.get('expenses_user') != user:
         try:
-            with open('data/expenses.json', 'r') as f:
-                st.session_state.expenses = json.load(f)
-        except:
-            # Default empty expense data structure
-            st.session_state.expenses = {
-                'transactions': [],
-                'categories': ["Food", "Rent", "Utilities", "Textbooks", "Entertainment", "Transportation", "Other"]
-            }
+            data = store.load(user)
+        except Exception as e:
+            st.error(f"Error loading expenses: {e}")
+            return
+        # Keep transactions columnar so month and category views are vectorized
+        st.session_state.expenses = {
+            'ledger': ExpenseLedger(data['transactions']),
+            'categories': data['categories']
+        }
+        st.session_state.expenses_user = user
+        st.session_state.pop('budget', None)
+        # Expenses recorded before accounts existed can be imported by any signed-in user
+        st.session_state.legacy_pending = LegacyExpenses().pending(user) if user != "guest" else 0
+    ledger = st.session_state.expenses['ledger']
+    
+    if st.session_state.legacy_pending:
+        st.info(f"{st.session_state.legacy_pending} expenses were recorded here before sign-in existed. "
+                "If they are yours, import them into your account.")
+        if st.button("Import Earlier Expenses"):
+            try:
+                LegacyExpenses().claim(user, store)
+                st.session_state.pop('expenses_user', None)
+                st.experimental_rerun()
+            except Exception as e:
+                st.error(f"Error importing expenses: {e}")
     
     # Define expense categories and a default month
     categories = st.session_state.expenses['categories']
     current_month = datetime.now().strftime('%Y-%m')
     
+    # Months to choose from span the whole history, not just this year
+    months = month_options(ledger.months(), current_month)
+    
     # Monthly Overview Tab
-    with tab1:
+    if tab == "Monthly Overview":
+        analytics = get_analytics(user, ledger)
         st.header("Monthly Expense Overview")
         
         # Month selector
         selected_month = st.selectbox(
             "Select Month", 
-            [datetime.now().replace(month=i).strftime('%Y-%m') for i in range(1, 13)],
-            index=[datetime.now().replace(month=i).strftime('%Y-%m') for i in range(1, 13)].index(current_month)
+            months,
+            index=months.index(current_month)
         )
         
-        # Filter transactions for the selected month
-        month_transactions = [t for t in st.session_state.expenses['transactions'] 
-                            if t['date'].startswith(selected_month)]
-        
-        # Calculate total expenses for the month
-        total = sum(t['amount'] for t in month_transactions)
+        # Slice out the selected month; its total is kept up to date by the ledger
+        month_transactions = ledger.month(selected_month)
+        total = ledger.month_total(selected_month)
         
         # Display key metrics
         col1, col2, col3 = st.columns(3)
@@ -53,63 +104,74 @@ def show():
             st.metric("Total Expenses", f"₹{total:.2f}")
         
         # Only show average daily and category breakdown if there are transactions
-        if month_transactions:
+        if len(month_transactions):
             # Calculate average daily expense
             days_in_month = 30  # Simplified
             with col2:
                 st.metric("Average Daily", f"₹{total/days_in_month:.2f}")
             
             # Calculate largest category
-            category_totals = {}
-            for t in month_transactions:
-                category_totals[t['category']] = category_totals.get(t['category'], 0) + t['amount']
-            
-            largest_category = max(category_totals.items(), key=lambda x: x[1]) if category_totals else ("None", 0)
+            category_totals = ledger.category_totals(selected_month)
             with col3:
-                st.metric("Largest Expense", f"{largest_category[0]}: ₹{largest_category[1]:.2f}")
+                st.metric("Largest Expense", f"{category_totals.idxmax()}: ₹{category_totals.max():.2f}")
             
             # Create dataframe for plotting
-            expense_by_category = pd.DataFrame([
-                {"Category": cat, "Amount": category_totals.get(cat, 0)} 
-                for cat in categories
-            ])
+            expense_by_category = (
+                category_totals.reindex(categories, fill_value=0.0)
+                .rename_axis("Category").reset_index(name="Amount")
+            )
             
             # Pie chart for expense breakdown
             st.subheader("Expense Breakdown")
-            fig = px.pie(
+            plotly_chart(
+                px.pie,
                 expense_by_category, 
                 values='Amount', 
                 names='Category',
                 title="Spending by Category",
                 hole=0.4  # Create a donut chart
             )
-            st.plotly_chart(fig, use_container_width=True)
             
-            # Bar chart for daily expenses over time
-            daily_expenses = {}
-            for t in month_transactions:
-                day = t['date']
-                daily_expenses[day] = daily_expenses.get(day, 0) + t['amount']
-            
-            daily_df = pd.DataFrame([
-                {"Date": day, "Amount": amount} 
-                for day, amount in daily_expenses.items()
-            ])
-            daily_df = daily_df.sort_values("Date")
+            # Bar chart for daily expenses over time, including days without spending
+            daily_df = analytics.daily(selected_month).rename_axis("Date").reset_index(name="Amount")
             
             st.subheader("Daily Spending")
-            fig2 = px.bar(
+            plotly_chart(
+                px.bar,
                 daily_df, 
                 x="Date", 
                 y="Amount",
                 title="Daily Expenses"
             )
-            st.plotly_chart(fig2, use_container_width=True)
         else:
             st.info("No transactions recorded for this month. Add some expenses to see your financial breakdown.")
+        
+        # Trends across the whole history
+        if len(ledger):
+            st.subheader("Spending Trends")
+            col1, col2 = st.columns(2)
+            with col1:
+                frequency = st.radio("Group by", list(FREQUENCIES), index=2, horizontal=True)
+            with col2:
+                split_categories = st.checkbox("Split by category")
+            
+            if split_categories:
+                trend_df = analytics.by_category(FREQUENCIES[frequency]).rename_axis("Period").reset_index()
+                plotly_chart(px.area, trend_df, x="Period", y=[c for c in trend_df.columns if c != "Period"],
+                             title=f"{frequency} Spending by Category")
+            else:
+                trend_df = analytics.totals(FREQUENCIES[frequency]).rename_axis("Period").reset_index(name="Amount")
+                plotly_chart(px.line, trend_df, x="Period", y="Amount", title=f"{frequency} Spending")
+            
+            # Compare the same months across years once there is more than one
+            yearly = analytics.year_over_year()
+            if len(yearly.columns) > 1:
+                yoy_df = yearly.rename(columns=str).rename_axis("Month").reset_index()
+                plotly_chart(px.line, yoy_df, x="Month", y=[c for c in yoy_df.columns if c != "Month"],
+                             title="Year-over-Year Monthly Spending", markers=True)
     
     # Track Expenses Tab
-    with tab2:
+    elif tab == "Track Expenses":
         st.header("Add New Expenses")
         
         # Form for adding new expenses
@@ -134,25 +196,71 @@ def show():
                     'category': category,
                     'date': expense_date.strftime('%Y-%m-%d')
                 }
-                st.session_state.expenses['transactions'].append(new_transaction)
-                
-                # Save to file (create directory if it doesn't exist)
                 try:
-                    os.makedirs('data', exist_ok=True)
-                    with open('data/expenses.json', 'w') as f:
-                        json.dump(st.session_state.expenses, f)
+                    ledger.add(store.add(user, new_transaction))
                     st.success(f"Added expense: {description} (₹{amount:.2f})")
                 except Exception as e:
                     st.error(f"Error saving expense: {e}")
+        
+        # Bulk import from a bank statement, written in batches rather than one rerun per row
+        with st.expander("Import Bank Statement"):
+            uploaded = st.file_uploader("CSV or OFX statement", type=["csv", "ofx", "qfx"])
+            # Only matters for CSVs with one signed amount column and no debit/credit column
+            sign = st.radio("Spending in a signed Amount column is",
+                            ["Detected from the file", "Negative", "Positive"], horizontal=True)
+            if uploaded is not None and st.button("Import Transactions"):
+                status = st.empty()
+                try:
+                    stats = import_statement(
+                        store, user, ledger, uploaded, uploaded.name, categories,
+                        progress=lambda s: status.write(f"Read {s['read']} rows, {s['imported']} new so far..."),
+                        debits_negative={"Negative": True, "Positive": False}.get(sign)
+                    )
+                    status.empty()
+                    st.success(
+                        f"Imported {stats['imported']} transactions "
+                        f"({stats['duplicates']} already recorded, {stats['skipped']} not expenses or unreadable)."
+                    )
+                except Exception as e:
+                    st.error(f"Error importing statement: {e}")
+        
+        # Export this user's history, filtered by the store before anything is read
+        with st.expander("Export History"):
+            col1, col2 = st.columns(2)
+            with col1:
+                export_months = st.multiselect("Months (all if empty)", ledger.months()[::-1])
+            with col2:
+                export_categories = st.multiselect("Categories (all if empty)", categories)
+            export_format = st.radio("Format", ["CSV", "Parquet"], horizontal=True)
+            if st.button("Prepare Export"):
+                # Written to a temporary file as it is produced, replacing this session's last one
+                previous = st.session_state.pop('expense_export', None)
+                if previous and os.path.exists(previous[1]):
+                    os.remove(previous[1])
+                try:
+                    st.session_state.expense_export = (export_format, save_export(
+                        store, export_format.lower(), [user], export_months, export_categories
+                    ))
+                except ImportError:
+                    st.error("Parquet export needs the pyarrow package.")
+                except Exception as e:
+                    st.error(f"Error exporting expenses: {e}")
+            if 'expense_export' in st.session_state:
+                prepared_format, path = st.session_state.expense_export
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        st.download_button(
+                            f"Download {prepared_format}",
+                            f,
+                            file_name=f"expenses.{prepared_format.lower()}",
+                            mime="text/csv" if prepared_format == "CSV" else "application/octet-stream"
+                        )
                 
         # Display recent transactions
         st.subheader("Recent Transactions")
-        if st.session_state.expenses['transactions']:
+        if len(ledger):
             # Show the most recent 10 transactions
-            recent = sorted(st.session_state.expenses['transactions'], 
-                           key=lambda x: x['date'], reverse=True)[:10]
-            
-            for i, t in enumerate(recent):
+            for t in ledger.recent(10):
                 col1, col2, col3 = st.columns([3, 1, 1])
                 with col1:
                     st.write(f"**{t['description']}** ({t['category']})")
@@ -162,12 +270,10 @@ def show():
                     st.write(t['date'])
                 
                 # Add delete button for each transaction
-                if st.button("Delete", key=f"del_{i}"):
-                    st.session_state.expenses['transactions'].remove(t)
-                    # Save updated expenses
+                if st.button("Delete", key=f"del_{t['id']}"):
                     try:
-                        with open('data/expenses.json', 'w') as f:
-                            json.dump(st.session_state.expenses, f)
+                        store.delete(user, t['id'])
+                        ledger.remove(t['id'])
                         st.success("Transaction deleted")
                         st.experimental_rerun()
                     except Exception as e:
@@ -178,7 +284,7 @@ def show():
             st.info("No transactions recorded yet. Add some expenses to track your spending.")
     
     # Budget Planning Tab
-    with tab3:
+    else:
         st.header("Budget Planning")
         
         # Budget setup section
@@ -187,9 +293,11 @@ def show():
         # Load or initialize budget data
         if 'budget' not in st.session_state:
             try:
-                with open('data/budget.json', 'r') as f:
-                    st.session_state.budget = json.load(f)
-            except:
+                st.session_state.budget = store.load_budget(user)
+            except Exception as e:
+                st.error(f"Error loading budget: {e}")
+                st.session_state.budget = None
+            if not st.session_state.budget:
                 # Default empty budget with float values
                 st.session_state.budget = {
                     'monthly_total': 1000.0,  # Changed to float
@@ -229,11 +337,9 @@ def show():
                 st.session_state.budget['monthly_total'] = monthly_budget
                 st.session_state.budget['categories'] = category_budgets
                 
-                # Save to file
+                # Save to file or the API
                 try:
-                    os.makedirs('data', exist_ok=True)
-                    with open('data/budget.json', 'w') as f:
-                        json.dump(st.session_state.budget, f)
+                    store.save_budget(user, st.session_state.budget)
                     st.success("Budget updated successfully!")
                 except Exception as e:
                     st.error(f"Error saving budget: {e}")
@@ -244,22 +350,14 @@ def show():
         # Month selector for budget tracking
         budget_month = st.selectbox(
             "Select Month for Budget Tracking", 
-            [datetime.now().replace(month=i).strftime('%Y-%m') for i in range(1, 13)],
-            index=[datetime.now().replace(month=i).strftime('%Y-%m') for i in range(1, 13)].index(current_month),
+            months,
+            index=months.index(current_month),
             key="budget_month_select"
         )
         
-        # Filter transactions for the selected month
-        budget_transactions = [t for t in st.session_state.expenses['transactions'] 
-                              if t['date'].startswith(budget_month)]
-        
-        # Calculate spending by category
-        spending_by_category = {}
-        for t in budget_transactions:
-            spending_by_category[t['category']] = spending_by_category.get(t['category'], 0) + t['amount']
-        
-        # Calculate total spending
-        total_spending = sum(spending_by_category.values())
+        # Spending per category is maintained incrementally by the ledger
+        spending_by_category = ledger.category_totals(budget_month, categories)
+        total_spending = ledger.month_total(budget_month)
         
         # Display budget progress
         st.metric(
@@ -276,50 +374,22 @@ def show():
         # Budget vs actual by category
         st.subheader("Budget vs. Actual by Category")
         
-        budget_comparison = []
-        for category in categories:
-            budget_amount = st.session_state.budget['categories'].get(category, 0)
-            spent_amount = spending_by_category.get(category, 0)
-            budget_comparison.append({
-                "Category": category,
-                "Budget": budget_amount,
-                "Spent": spent_amount,
-                "Remaining": budget_amount - spent_amount
-            })
-        
-        budget_df = pd.DataFrame(budget_comparison)
+        budget_df = pd.DataFrame({
+            "Category": categories,
+            "Budget": [st.session_state.budget['categories'].get(category, 0) for category in categories],
+            "Spent": spending_by_category.to_numpy(),
+        })
+        budget_df["Remaining"] = budget_df["Budget"] - budget_df["Spent"]
         
         # Horizontal bar chart comparing budget vs actual
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            y=budget_df["Category"],
-            x=budget_df["Budget"],
-            name="Budget",
-            orientation='h',
-            marker=dict(color='rgba(58, 71, 80, 0.6)')
-        ))
-        fig.add_trace(go.Bar(
-            y=budget_df["Category"],
-            x=budget_df["Spent"],
-            name="Actual",
-            orientation='h',
-            marker=dict(color='rgba(246, 78, 139, 0.6)')
-        ))
-        
-        fig.update_layout(
-            title="Budget vs. Actual Spending by Category",
-            barmode='group',
-            height=400
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(budget_figure, budget_df)
         
         # Tips based on spending
         st.subheader("Money-Saving Tips")
         
         # Generate personalized tips based on spending patterns
         if total_spending > 0:
-            highest_category = max(spending_by_category.items(), key=lambda x: x[1])[0]
+            highest_category = spending_by_category.idxmax()
             
             if highest_category == "Food":
                 st.info("💡 **Tip**: Your highest expense is food. Consider using mess facilities or cooking with roommates to share costs.")
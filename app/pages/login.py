@@ -1,10 +1,10 @@
 import streamlit as st
-from app.utils.auth import (
+from app.auth import (
     register_user, 
     authenticate_user, 
     generate_reset_token, 
     verify_reset_token,
-    reset_password
+    reset_password_with_token
 )
 
 def show():
@@ -184,7 +184,7 @@ def reset_password_form():
                 st.error("Password must be at least 6 characters long.")
                 return
                 
-            success, message = reset_password(st.session_state.reset_token, new_password)
+            success, message = reset_password_with_token(st.session_state.reset_token, new_password)
             if success:
                 st.success(message)
                 # Clear reset token and return to login
@@ -1,6 +1,34 @@
 import streamlit as st
-import time
 from datetime import datetime
+from app.models.answer_cache import get_answer_cache
+from app.models.course_index import MATERIAL_TYPES, get_course_index
+from app.auth import current_user_email
+from app.models.tutor import TutorError, build_messages
+from app.models.tutor_dispatcher import get_tutor_dispatcher
+from app.utils.conversation_store import TUTOR_HISTORY_MESSAGES, fold_summary, get_conversation_store
+
+# Follow-up buttons and what each one asks the tutor
+FOLLOW_UPS = {
+    "Explain Further": "Explain that in more detail.",
+    "Show Examples": "Show me some worked examples.",
+    "Practice Problems": "Give me a few practice problems, without the solutions.",
+}
+
+# Past conversations listed per page
+HISTORY_PAGE_SIZE = 5
+
+
+def _resume(user, conversation_id):
+    """Reopen a past conversation, switching the subject and topic boxes to match it"""
+    conversation = get_conversation_store().conversation(user, conversation_id)
+    if conversation is None:
+        return
+    st.session_state.tutor_subject = conversation["subject"]
+    st.session_state.tutor_topic_choice = conversation["topic"]
+    st.session_state.tutor_topic = (conversation["subject"], conversation["topic"])
+    st.session_state.tutor_turns = get_conversation_store().messages(user, conversation_id)
+    st.session_state.tutor_conversation = conversation_id
+    st.session_state.tutor_sources = []
 
 def show():
     st.title("Smart Tutor")
@@ -14,7 +42,8 @@ def show():
     # Subject selection
     subject = st.selectbox(
         "Select Subject",
-        ["MATH 101", "HIST 205", "PHYS 120", "CS 150", "ENG 110"]
+        ["MATH 101", "HIST 205", "PHYS 120", "CS 150", "ENG 110"],
+        key="tutor_subject"
     )
     
     # Topic selection based on subject
@@ -26,7 +55,7 @@ def show():
         "ENG 110": ["Grammar", "Writing", "Literature"]
     }
     
-    topic = st.selectbox("Select Topic", topics[subject])
+    topic = st.selectbox("Select Topic", topics[subject], key="tutor_topic_choice")
     
     # Question input
     question = st.text_area(
@@ -37,75 +66,117 @@ def show():
     
     # Additional context
     with st.expander("Add Context (Optional)"):
-        st.text_area(
+        context = st.text_area(
             "Additional Information",
             placeholder="Add any relevant context, equations, or code snippets...",
             height=100
         )
     
+    # Notes and slides the tutor answers from, indexed per subject in the background
+    course_index = get_course_index()
+    with st.expander("Course Materials"):
+        uploads = st.file_uploader(f"Upload notes or slides for {subject}", type=MATERIAL_TYPES,
+                                   accept_multiple_files=True)
+        if uploads and st.button("Add to Course Materials"):
+            for upload in uploads:
+                course_index.submit(subject, upload.name, upload.getvalue())
+            st.success(f"Added {len(uploads)} file(s); they will be searchable once indexed.")
+        jobs = course_index.jobs(subject)
+        if jobs:
+            for job in jobs:
+                status = job["status"] + (f": {job['error']}" if job["error"] else "")
+                st.caption(f"{job['filename']} — {status} ({job['chunks']} passages)")
+        else:
+            st.caption("No materials uploaded for this subject yet.")
+    
+    # The conversation so far; a new subject or topic starts a new one
+    if st.session_state.get("tutor_topic") != (subject, topic):
+        st.session_state.tutor_topic = (subject, topic)
+        st.session_state.tutor_turns = []
+        st.session_state.tutor_sources = []
+        st.session_state.tutor_conversation = None
+    turns = st.session_state.tutor_turns
+    
+    # Signed-in students' conversations are kept, so they can be searched and continued later
+    user = current_user_email()
+    history = get_conversation_store() if user != "guest" else None
+    prompt = None
+    
     # Submit button
     if st.button("Get Help"):
         if not question:
             st.warning("Please enter a question first!")
         else:
-            with st.spinner("Thinking..."):
-                time.sleep(2)  # Simulate AI processing
-                
-                # Sample response based on subject and topic
-                responses = {
-                    "MATH 101": {
-                        "Calculus": """
-                        Let me help you understand this calculus concept:
-                        
-                        1. First, let's break down the problem
-                        2. Here's the step-by-step solution
-                        3. Key points to remember:
-                           - Point 1
-                           - Point 2
-                           - Point 3
-                        
-                        Would you like me to explain any part in more detail?
-                        """,
-                        "Linear Algebra": "Linear algebra explanation...",
-                        "Statistics": "Statistics explanation..."
-                    },
-                    "HIST 205": {
-                        "Ancient History": "Ancient history explanation...",
-                        "Medieval History": "Medieval history explanation...",
-                        "Modern History": "Modern history explanation..."
-                    }
-                }
-                
-                # Display response
-                st.markdown("### Answer")
-                if subject in responses and topic in responses[subject]:
-                    st.markdown(responses[subject][topic])
+            turns.clear()
+            st.session_state.tutor_sources = []
+            st.session_state.tutor_conversation = None
+            prompt = (question, context)
+    
+    # Answers are written here, above the follow-up buttons
+    answer_area = st.container()
+    
+    # Follow-up options continue the same conversation
+    if turns or prompt:
+        st.markdown("### Need More Help?")
+        for col, (label, follow_up) in zip(st.columns(len(FOLLOW_UPS)), FOLLOW_UPS.items()):
+            with col:
+                if st.button(label):
+                    prompt = (follow_up, "")
+    
+    with answer_area:
+        if turns or prompt:
+            st.markdown("### Answer")
+        for i, turn in enumerate(turns):
+            asked = turn["content"].split("\n\nContext:")[0]
+            if turn["role"] == "assistant":
+                st.markdown(turn["content"])
+            elif i > 0 or asked != question.strip():
+                # The first question is in the box above, unless this is a conversation picked up again
+                st.markdown(f"**{asked}**")
+        if prompt:
+            # Only the latest messages are resent; earlier ones go as a running summary
+            conversation = st.session_state.tutor_conversation
+            if conversation:
+                summary, recent = history.prompt_history(user, conversation)
+            else:
+                older = max(0, len(turns) - TUTOR_HISTORY_MESSAGES)
+                summary, recent = fold_summary("", turns[:older]), turns[older:]
+            messages = build_messages(subject, topic, *prompt, history=recent, summary=summary)
+            if turns:
+                st.markdown(f"**{prompt[0]}**")
+            # A first question with no extra context may already have been answered for someone else
+            answer_cache = get_answer_cache()
+            cacheable = not turns and not prompt[1].strip()
+            cached = answer_cache.lookup(subject, topic, prompt[0]) if cacheable else None
+            if cached:
+                answer = cached["answer"]
+                st.markdown(answer)
+                st.caption(f"Answered from a similar question ({cached['similarity']:.0%} match)")
+            else:
+                # Course material for the first question grounds the whole conversation
+                if not turns:
+                    st.session_state.tutor_sources = course_index.search(subject, f"{topic} {prompt[0]}")
+                sources = st.session_state.tutor_sources
+                messages = build_messages(subject, topic, *prompt, history=recent, sources=sources, summary=summary)
+                try:
+                    # Tokens are shown as the model produces them, once the question's turn comes
+                    answer = st.write_stream(get_tutor_dispatcher().stream(user, messages))
+                except TutorError as e:
+                    st.error(str(e))
+                    answer = None
                 else:
-                    st.markdown("""
-                    Here's a detailed explanation of your question:
-                    
-                    1. First point
-                    2. Second point
-                    3. Third point
-                    
-                    Would you like me to elaborate on any of these points?
-                    """)
-                
-                # Follow-up options
-                st.markdown("### Need More Help?")
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    if st.button("Explain Further"):
-                        st.info("Let me break this down in more detail...")
-                
-                with col2:
-                    if st.button("Show Examples"):
-                        st.info("Here are some practical examples...")
-                
-                with col3:
-                    if st.button("Practice Problems"):
-                        st.info("Let's try some practice problems...")
+                    if sources:
+                        st.caption("Sources: " + ", ".join(dict.fromkeys(s["source"] for s in sources)))
+                    if cacheable:
+                        answer_cache.store(subject, topic, prompt[0], answer)
+            if answer is not None:
+                exchange = [messages[-1], {"role": "assistant", "content": answer}]
+                turns += exchange
+                if history:
+                    if not conversation:
+                        conversation = history.start(user, subject, topic, prompt[0])
+                        st.session_state.tutor_conversation = conversation
+                    history.add_messages(user, conversation, exchange)
     
     # Study tips section
     st.markdown("### Study Tips")
@@ -120,14 +191,46 @@ def show():
     for tip in tips:
         st.markdown(f"* {tip}")
     
-    # Recent questions history
+    # Past conversations, most recent first, or the messages matching a search
     st.markdown("### Recent Questions")
-    recent_questions = [
-        {"question": "How do I solve quadratic equations?", "subject": "MATH 101", "date": "2023-09-20"},
-        {"question": "What were the main causes of World War II?", "subject": "HIST 205", "date": "2023-09-19"},
-        {"question": "Can you explain Newton's laws?", "subject": "PHYS 120", "date": "2023-09-18"}
-    ]
+    if history is None:
+        st.info("Sign in to keep your tutor conversations and search them later.")
+        return
+    search = st.text_input("Search your past questions and answers", key="tutor_history_search")
+    if search:
+        results = history.search(user, search)
+        if not results:
+            st.caption("Nothing in your history matches that.")
+        for i, result in enumerate(results):
+            snippet = " ".join(result["snippet"].split())
+            st.markdown(f"**{result['subject']} - {result['topic']}**: {result['title']}  \n{snippet}")
+            st.button("Continue this conversation", key=f"tutor_result_{i}", on_click=_resume,
+                      args=(user, result["conversation_id"]))
+        return
+    
+    if "tutor_history_cursors" not in st.session_state:
+        st.session_state.tutor_history_cursors = [None]
+    cursors = st.session_state.tutor_history_cursors
+    conversations, next_cursor = history.conversations(user, cursor=cursors[-1], limit=HISTORY_PAGE_SIZE)
+    if not conversations and len(cursors) == 1:
+        st.caption("Questions you ask will appear here.")
+    for c in conversations:
+        with st.expander(f"{c['subject']} - {c['updated_at'][:10]}"):
+            st.markdown(c["title"])
+            st.caption(f"{c['topic']} · {c['messages'] // 2} question(s)")
+            st.button("Continue this conversation", key=f"tutor_resume_{c['id']}", on_click=_resume,
+                      args=(user, c["id"]))
     
-    for q in recent_questions:
-        with st.expander(f"{q['subject']} - {q['date']}"):
-            st.markdown(q["question"]) 
\ No newline at end of file
+    # Keyset cursors of the history pages visited so far
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(cursors) > 1 and st.button("← Previous"):
+            cursors.pop()
+            st.experimental_rerun()
+    with col2:
+        if len(cursors) > 1 or next_cursor:
+            st.caption(f"Page {len(cursors)}")
+    with col3:
+        if next_cursor and st.button("Next →"):
+            cursors.append(next_cursor)
+            st.experimental_rerun()
@@ -2,15 +2,22 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime, timedelta
+from app.auth import current_user_email
+from app.components.charts import plotly_chart
+from app.components.tabs import lazy_tabs
+from app.utils.calendar_feed import feed_url
+from app.utils.schedule_store import get_schedule_store
+from app.utils.task_store import get_task_store
 
 def show():
     st.title("Study Planner")
     
-    # Tabs for different sections
-    tab1, tab2, tab3 = st.tabs(["Calendar", "Tasks", "Analytics"])
+    # Tabs for different sections; only the selected one is built
+    tab = lazy_tabs(["Calendar", "Tasks", "Analytics"], key="study_tab")
+    subjects = ["MATH 101", "HIST 205", "PHYS 120", "CS 150", "ENG 110"]
     
     # Calendar Tab
-    with tab1:
+    if tab == "Calendar":
         st.header("Your Study Calendar")
         
         # Date picker for calendar navigation
@@ -22,7 +29,6 @@ def show():
         
         # Sample schedule data
         schedule_data = []
-        subjects = ["MATH 101", "HIST 205", "PHYS 120", "CS 150", "ENG 110"]
         hours = [8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]
         
         for day in range(7):
@@ -37,6 +43,21 @@ def show():
                         "Type": "Class" if day < 5 and hour < 17 else "Study Session"
                     })
         
+        # Study sessions this student has added for the week; guests share one name, so they get none
+        user = current_user_email()
+        week_end = start_of_week + timedelta(days=7)
+        sessions = get_schedule_store().sessions(user, start_of_week, week_end) if user != "guest" else []
+        for session in sessions:
+            starts = datetime.strptime(session["starts_at"], "%Y-%m-%d %H:%M")
+            ends = starts + timedelta(minutes=session["minutes"])
+            schedule_data.append({
+                "Day": starts.strftime('%A, %b %d'),
+                "Start Time": starts.strftime("%H:%M"),
+                "End Time": ends.strftime("%H:%M"),
+                "Subject": session["subject"],
+                "Type": "Study Session"
+            })
+        
         schedule_df = pd.DataFrame(schedule_data)
         
         # Custom CSS for day styling
@@ -86,47 +107,31 @@ def show():
             reminder = st.checkbox("Set Reminder", value=True)
         
         if st.button("Add to Calendar"):
-            st.success(f"Added {subject} study session on {study_date} at {start_time}")
+            if user == "guest":
+                st.info("Sign in to save study sessions to your calendar.")
+            else:
+                get_schedule_store().add(user, subject, datetime.combine(study_date, start_time),
+                                         duration * 60, location, reminder)
+                st.success(f"Added {subject} study session on {study_date} at {start_time}")
+        
+        # Subscribe link for phone calendars, served by the API (see README); a guest feed would be everyone's
+        if user != "guest":
+            with st.expander("Sync to your phone's calendar"):
+                st.markdown("Subscribe to this link in your calendar app to see your study sessions "
+                            "and the campus events you've RSVPed to. Keep it private.")
+                st.code(feed_url(user), language=None)
     
     # Tasks Tab
-    with tab2:
+    elif tab == "Tasks":
         st.header("Task Management")
         
         # Task categories
         task_category = st.selectbox("Filter by category", 
                                   ["All Tasks", "Assignments", "Reading", "Projects", "Exams"])
         
-        # Sample task data
-        tasks = [
-            {"Task": "Math Problem Set", "Due": "2023-09-25", "Subject": "MATH 101", "Priority": "High", "Status": "In Progress", "Category": "Assignments"},
-            {"Task": "History Essay Research", "Due": "2023-09-22", "Subject": "HIST 205", "Priority": "Medium", "Status": "Not Started", "Category": "Assignments"},
-            {"Task": "Read Physics Chapter 3", "Due": "2023-09-21", "Subject": "PHYS 120", "Priority": "Medium", "Status": "Not Started", "Category": "Reading"},
-            {"Task": "Programming Project", "Due": "2023-10-10", "Subject": "CS 150", "Priority": "High", "Status": "Not Started", "Category": "Projects"},
-            {"Task": "Midterm Exam Prep", "Due": "2023-10-05", "Subject": "MATH 101", "Priority": "High", "Status": "Not Started", "Category": "Exams"}
-        ]
-        
-        tasks_df = pd.DataFrame(tasks)
-        
-        # Filter based on selection
-        if task_category != "All Tasks":
-            filtered_tasks = tasks_df[tasks_df["Category"] == task_category]
-        else:
-            filtered_tasks = tasks_df
-        
-        # Display tasks with checkbox to mark as complete
+        # Listed above the form but filled in after it, so a task added on this run shows up
         st.subheader("Your Tasks")
-        for i, task in filtered_tasks.iterrows():
-            col1, col2, col3 = st.columns([0.1, 3, 1])
-            with col1:
-                completed = st.checkbox("", key=f"task_{i}")
-            with col2:
-                task_name = task["Task"]
-                if completed:
-                    task_name = f"~~{task_name}~~"  # Strikethrough for completed tasks
-                st.markdown(f"{task_name} ({task['Subject']}) - Due: {task['Due']}")
-            with col3:
-                priority_color = "red" if task["Priority"] == "High" else "orange" if task["Priority"] == "Medium" else "green"
-                st.markdown(f"<span style='color:{priority_color};'>{task['Priority']}</span>", unsafe_allow_html=True)
+        task_list = st.container()
         
         # Add new task
         st.subheader("Add New Task")
@@ -141,11 +146,48 @@ def show():
             priority = st.select_slider("Priority", options=["Low", "Medium", "High"], value="Medium")
             category = st.selectbox("Category", ["Assignments", "Reading", "Projects", "Exams"])
         
+        # This student's tasks, from the API when one is set; guests share one name, so they get none
+        user = current_user_email()
+        store = get_task_store()
         if st.button("Add Task"):
-            st.success(f"Added task: {new_task}")
+            if user == "guest":
+                st.info("Sign in to save tasks.")
+            elif not new_task.strip():
+                st.error("Please describe the task.")
+            else:
+                store.add(user, {"title": new_task.strip(), "subject": subject, "due": due_date.isoformat(),
+                                 "priority": priority, "category": category})
+                st.success(f"Added task: {new_task}")
+        tasks = store.tasks(user) if user != "guest" else []
+        
+        # Filter based on selection
+        if task_category != "All Tasks":
+            tasks = [task for task in tasks if task["category"] == task_category]
+        
+        # Display tasks with checkbox to mark as complete
+        with task_list:
+            if user == "guest":
+                st.info("Sign in to keep a task list.")
+            elif not tasks:
+                st.info("No tasks yet. Add one below.")
+            for task in tasks:
+                col1, col2, col3 = st.columns([0.1, 3, 1])
+                with col1:
+                    done = task["status"] == "Completed"
+                    completed = st.checkbox("", value=done, key=f"task_{task['id']}")
+                    if completed != done:
+                        store.update(user, task["id"], status="Completed" if completed else "Not Started")
+                with col2:
+                    task_name = task["title"]
+                    if completed:
+                        task_name = f"~~{task_name}~~"  # Strikethrough for completed tasks
+                    st.markdown(f"{task_name} ({task['subject']}) - Due: {task['due']}")
+                with col3:
+                    priority_color = "red" if task["priority"] == "High" else "orange" if task["priority"] == "Medium" else "green"
+                    st.markdown(f"<span style='color:{priority_color};'>{task['priority']}</span>", unsafe_allow_html=True)
     
     # Analytics Tab
-    with tab3:
+    else:
         st.header("Study Analytics")
         
         # Sample study time data
@@ -158,9 +200,8 @@ def show():
         
         # Bar chart of study time by subject
         st.subheader("Study Time by Subject (Last 30 Days)")
-        fig = px.bar(study_df, x="Subject", y="Hours", color="Subject",
-                    title="Hours Studied per Subject")
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(px.bar, study_df, x="Subject", y="Hours", color="Subject",
+                     title="Hours Studied per Subject")
         
         # Study time trends
         st.subheader("Study Time Trends")
@@ -175,9 +216,8 @@ def show():
         })
         
         # Line chart of daily study time
-        fig2 = px.line(daily_study, x="Date", y="Hours", markers=True,
-                      title="Daily Study Hours (Last 2 Weeks)")
-        st.plotly_chart(fig2, use_container_width=True)
+        plotly_chart(px.line, daily_study, x="Date", y="Hours", markers=True,
+                     title="Daily Study Hours (Last 2 Weeks)")
         
         # Study insights
         st.subheader("Study Insights")
@@ -0,0 +1,190 @@
+import os
+import threading
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.utils.storage import read_secret
+
+# Base URL of the Campus Connect API; pages keep their local stores when unset
+CAMPUS_API_URL = os.environ.get("CAMPUS_API_URL", "")
+
+# Keep-alive connections held open to the API per Streamlit process
+API_POOL_SIZE = int(os.environ.get("CAMPUS_API_POOL_SIZE", 20))
+API_TIMEOUT = float(os.environ.get("CAMPUS_API_TIMEOUT", 10))
+
+# Service key the app sends with every request, created on first use unless CAMPUS_API_KEY is set;
+# the app and the API must share it, as they share the rest of data/
+CAMPUS_API_KEY_FILE = "data/api.key"
+
+
+def api_key(path=CAMPUS_API_KEY_FILE):
+    """The key that lets the app act for any user through the API"""
+    return os.environ.get("CAMPUS_API_KEY") or read_secret(path)
+
+
+class ApiError(Exception):
+    """Raised when the API returns an error response"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class ApiClient:
+    """Thin client for backend/main.py over one pooled keep-alive session"""
+
+    # Most items the API returns in one page
+    MAX_PAGE_SIZE = 1000
+
+    def __init__(self, base_url=CAMPUS_API_URL, pool_size=API_POOL_SIZE, timeout=API_TIMEOUT, key=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {key or api_key()}"
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method, path, **kwargs):
+        response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise ApiError(response.status_code, detail)
+        return response.json() if response.content else None
+
+    @staticmethod
+    def _user(email):
+        return "/users/" + quote(email.lower(), safe="")
+
+    # Expenses
+    def list_expenses(self, email, month=None, category=None, cursor=None, limit=500):
+        params = {"month": month, "category": category, "cursor": cursor, "limit": limit}
+        return self._request("GET", self._user(email) + "/expenses",
+                             params={k: v for k, v in params.items() if v is not None})
+
+    def iter_expenses(self, email, month=None, category=None, page_size=500):
+        """Yield every matching expense, fetching one page at a time"""
+        cursor = None
+        while True:
+            page = self.list_expenses(email, month, category, cursor, page_size)
+            yield from page["items"]
+            cursor = page["next_cursor"]
+            if not cursor:
+                return
+
+    def list_expense_users(self, after="", limit=500):
+        return self._request("GET", "/expenses/users", params={"after": after, "limit": limit})
+
+    def iter_expense_users(self, page_size=500):
+        """Yield the email of every user with expenses, one page at a time"""
+        after = ""
+        while True:
+            page = self.list_expense_users(after, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = page[-1]
+
+    def add_expense(self, email, expense):
+        return self._request("POST", self._user(email) + "/expenses", json=expense)
+
+    def add_expenses(self, email, expenses):
+        return self._request("POST", self._user(email) + "/expenses/bulk", json=expenses)
+
+    def delete_expense(self, email, expense_id):
+        self._request("DELETE", self._user(email) + "/expenses/" + quote(expense_id, safe=""))
+
+    # Budgets
+    def get_budget(self, email):
+        try:
+            return self._request("GET", self._user(email) + "/budget")
+        except ApiError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    def put_budget(self, email, budget):
+        return self._request("PUT", self._user(email) + "/budget", json=budget)
+
+    # Events and RSVPs
+    def list_events(self, category=None, tag=None, start=None, end=None, cursor=None, limit=20):
+        params = {"category": category, "tag": tag, "start": start, "end": end, "cursor": cursor, "limit": limit}
+        return self._request("GET", "/events", params={k: v for k, v in params.items() if v is not None})
+
+    def search_events(self, text, category=None, tag=None, start=None, limit=20):
+        params = {"q": text, "category": category, "tag": tag, "start": start, "limit": limit}
+        return self._request("GET", "/events/search", params={k: v for k, v in params.items() if v is not None})
+
+    def event_category_counts(self, start=None, end=None):
+        params = {"start": start, "end": end}
+        return self._request("GET", "/events/categories", params={k: v for k, v in params.items() if v is not None})
+
+    def event_tags(self):
+        return self._request("GET", "/events/tags")
+
+    def last_event_id(self):
+        return self._request("GET", "/events/last-id")["last_event_id"]
+
+    def waitlist_counts(self, event_ids):
+        counts = self._request("GET", "/events/waitlists", params={"event_id": list(event_ids)})
+        return {int(event_id): count for event_id, count in counts.items()}
+
+    def get_event(self, event_id):
+        try:
+            return self._request("GET", f"/events/{event_id}")
+        except ApiError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    def create_event(self, event, created_by=""):
+        return self._request("POST", "/events", json=dict(event, created_by=created_by))
+
+    def rsvp(self, event_id, email):
+        try:
+            return self._request("POST", f"/events/{event_id}/rsvps", json={"user_email": email})["status"]
+        except ApiError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    def cancel_rsvp(self, event_id, email):
+        path = f"/events/{event_id}/rsvps/" + quote(email.lower(), safe="")
+        return self._request("DELETE", path)["promoted"]
+
+    def rsvp_statuses(self, email, event_ids):
+        return self._request("GET", self._user(email) + "/rsvps", params={"event_id": list(event_ids)})
+
+    def rsvp_history(self, email, limit=50):
+        return self._request("GET", self._user(email) + "/rsvps/history", params={"limit": limit})
+
+    # Tasks
+    def list_tasks(self, email):
+        return self._request("GET", self._user(email) + "/tasks")
+
+    def add_task(self, email, task):
+        return self._request("POST", self._user(email) + "/tasks", json=task)
+
+    def update_task(self, email, task_id, **fields):
+        return self._request("PATCH", self._user(email) + f"/tasks/{task_id}", json=fields)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_api_client():
+    """Return the shared API client, or None when CAMPUS_API_URL is not set"""
+    global _client
+    if not CAMPUS_API_URL:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = ApiClient()
+        return _client
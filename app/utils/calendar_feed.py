@@ -0,0 +1,217 @@
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+
+from app.utils.event_store import get_event_catalog
+from app.utils.schedule_store import get_schedule_store
+from app.utils.storage import read_secret
+
+# Key that signs feed URLs, created on first use unless CALENDAR_FEED_SECRET is set;
+# the app and the API must share it, as they share the rest of data/
+CALENDAR_FEED_KEY_FILE = "data/calendar_feed.key"
+
+# Base URL of the API serving the feeds, as phones will reach it
+CALENDAR_FEED_URL = os.environ.get("CALENDAR_FEED_URL", os.environ.get("CAMPUS_API_URL") or "http://localhost:8000")
+
+# Rendered VEVENT blocks kept in memory across every feed, and users whose latest feed is kept
+CALENDAR_COMPONENT_CACHE_SIZE = int(os.environ.get("CALENDAR_COMPONENT_CACHE_SIZE", 50000))
+CALENDAR_FEED_CACHE_SIZE = int(os.environ.get("CALENDAR_FEED_CACHE_SIZE", 5000))
+
+# RSVPs in a feed (most recent first), and how far back study sessions go
+CALENDAR_FEED_MAX_EVENTS = 500
+CALENDAR_FEED_HISTORY = timedelta(days=90)
+
+# The catalog only records start times, so campus events get a nominal length
+EVENT_DURATION = timedelta(hours=1)
+
+_key = None
+_key_lock = threading.Lock()
+
+
+def _feed_key(path=CALENDAR_FEED_KEY_FILE):
+    global _key
+    with _key_lock:
+        if _key is None:
+            _key = (os.environ.get("CALENDAR_FEED_SECRET") or read_secret(path)).encode()
+        return _key
+
+
+def feed_token(email):
+    """Token that lets a calendar app read `email`'s feed without signing in"""
+    return hmac.new(_feed_key(), email.lower().encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def check_feed_token(email, token):
+    return hmac.compare_digest(feed_token(email), token or "")
+
+
+def feed_url(email):
+    """Subscribe link for `email`'s feed"""
+    return f"{CALENDAR_FEED_URL.rstrip('/')}/calendar/{quote(email.lower(), safe='')}.ics?token={feed_token(email)}"
+
+
+def not_modified(if_none_match, if_modified_since, etag, last_modified):
+    """Whether a request's conditional headers say the client already has this feed.
+
+    If-None-Match wins when both are sent, as HTTP requires.
+    """
+    if if_none_match:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _text(value):
+    """Escape a TEXT property value (RFC 5545 3.3.11)"""
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _fold(line):
+    """Split a content line into 75-octet pieces joined by CRLF and a space"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    pieces, current, size = [], "", 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > (75 if not pieces else 74):
+            pieces.append(current)
+            current, size = "", 0
+        current += char
+        size += width
+    pieces.append(current)
+    return "\r\n ".join(pieces) + "\r\n"
+
+
+def _local(value):
+    """Floating local date-time, so the calendar shows it in the phone's time zone"""
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def _utc(iso):
+    return datetime.fromisoformat(iso).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _vevent(properties, alarm_minutes=None):
+    lines = ["BEGIN:VEVENT"] + [f"{name}:{value}" for name, value in properties if value != ""]
+    if alarm_minutes is not None:
+        lines += ["BEGIN:VALARM", "ACTION:DISPLAY", f"TRIGGER:-PT{alarm_minutes}M",
+                  f"DESCRIPTION:{dict(properties)['SUMMARY']}", "END:VALARM"]
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+def event_component(event):
+    """VEVENT for an event the user RSVPed to; waitlisted ones are tentative"""
+    starts = datetime.strptime(f"{event['date']} {event['time']}", "%Y-%m-%d %H:%M")
+    waitlisted = event["rsvp_status"] == "waitlist"
+    return _vevent([
+        ("UID", f"event-{event['id']}@campus-connect"),
+        ("DTSTAMP", _utc(event["created_at"])),
+        ("DTSTART", _local(starts)),
+        ("DTEND", _local(starts + EVENT_DURATION)),
+        ("SUMMARY", _text(("Waitlist: " if waitlisted else "") + event["title"])),
+        ("LOCATION", _text(event["location"])),
+        ("DESCRIPTION", _text(event["description"])),
+        ("CATEGORIES", ",".join(_text(t) for t in [event["category"]] + event["tags"])),
+        ("STATUS", "TENTATIVE" if waitlisted else "CONFIRMED"),
+    ])
+
+
+def session_component(session):
+    """VEVENT for a study session, with a 15-minute alarm if it asked for a reminder"""
+    starts = datetime.strptime(session["starts_at"], "%Y-%m-%d %H:%M")
+    return _vevent([
+        ("UID", f"study-{session['id']}@campus-connect"),
+        ("DTSTAMP", _utc(session["created_at"])),
+        ("DTSTART", _local(starts)),
+        ("DTEND", _local(starts + timedelta(minutes=session["minutes"]))),
+        ("SUMMARY", _text(f"Study: {session['subject']}")),
+        ("LOCATION", _text(session["location"])),
+    ], alarm_minutes=15 if session["reminder"] else None)
+
+
+class CalendarFeeds:
+    """Per-user iCalendar feeds of RSVPed events and study sessions.
+
+    A feed's ETag is a hash of what is in it (which events, with which RSVP
+    status, and which sessions), worked out from two small indexed queries.
+    A poll that finds the same ETag gets the feed already built, or a 304 if
+    the client sent it back, without rendering anything. When a feed does
+    change, only components not seen before are rendered; events and
+    sessions never change once created, so each VEVENT is cached by its key.
+    """
+
+    def __init__(self, events=None, schedule=None):
+        self.events = events or get_event_catalog()
+        self.schedule = schedule or get_schedule_store()
+        self._components = OrderedDict()
+        self._feeds = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _parts(self, email):
+        """[(component key, item, render)] in feed order"""
+        since = (date.today() - CALENDAR_FEED_HISTORY).isoformat()
+        events = sorted(self.events.rsvp_history(email, limit=CALENDAR_FEED_MAX_EVENTS), key=lambda e: e["id"])
+        return ([(("event", e["id"], e["rsvp_status"]), e, event_component) for e in events] +
+                [(("study", s["id"]), s, session_component) for s in self.schedule.sessions(email, start=since)])
+
+    def _component(self, key, item, render):
+        with self._lock:
+            block = self._components.get(key)
+            if block is not None:
+                self._components.move_to_end(key)
+                return block
+        block = render(item)
+        with self._lock:
+            self._components[key] = block
+            while len(self._components) > CALENDAR_COMPONENT_CACHE_SIZE:
+                self._components.popitem(last=False)
+        return block
+
+    def feed(self, email):
+        """(etag, last_modified, body bytes) for `email`'s feed"""
+        email = email.lower()
+        parts = self._parts(email)
+        etag = '"' + hashlib.blake2b(repr([key for key, _, _ in parts]).encode(), digest_size=16).hexdigest() + '"'
+        with self._lock:
+            cached = self._feeds.get(email)
+            if cached is not None and cached[0] == etag:
+                self._feeds.move_to_end(email)
+                return cached
+
+        body = ("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Campus Connect//Calendar Feed//EN\r\n"
+                "CALSCALE:GREGORIAN\r\nX-WR-CALNAME:Campus Connect\r\n" +
+                "".join(self._component(key, item, render) for key, item, render in parts) +
+                "END:VCALENDAR\r\n")
+        # Last-Modified is when this process first built this version; HTTP dates have whole seconds
+        entry = (etag, datetime.now(timezone.utc).replace(microsecond=0), body.encode("utf-8"))
+        with self._lock:
+            self._feeds[email] = entry
+            while len(self._feeds) > CALENDAR_FEED_CACHE_SIZE:
+                self._feeds.popitem(last=False)
+        return entry
+
+
+_feeds = None
+_feeds_lock = threading.Lock()
+
+
+def get_calendar_feeds():
+    """Return the calendar feeds shared by every request in this process"""
+    global _feeds
+    with _feeds_lock:
+        if _feeds is None:
+            _feeds = CalendarFeeds()
+        return _feeds
@@ -0,0 +1,276 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime
+
+CONVERSATION_DB_FILE = "data/tutor_history.db"
+
+# Most recent messages sent to the model verbatim; older ones reach it only through the summary
+TUTOR_HISTORY_MESSAGES = int(os.environ.get("TUTOR_HISTORY_MESSAGES", 6))
+
+# Longest summary of earlier messages; the oldest lines are dropped past this
+SUMMARY_MAX_CHARS = 2000
+
+# Characters of each question and answer kept in a summary line
+SUMMARY_LINE_CHARS = 200
+
+
+def _clip(text, size=SUMMARY_LINE_CHARS):
+    text = " ".join(text.split())
+    return text if len(text) <= size else text[:size - 1].rstrip() + "…"
+
+
+def fold_summary(summary, messages, max_chars=SUMMARY_MAX_CHARS):
+    """`summary` with `messages` folded in: each question, and the first sentence of each answer"""
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        if message["role"] == "user":
+            lines.append("- Student asked: " + _clip(message["content"].split("\n\nContext:")[0]))
+        else:
+            first = re.split(r"(?<=[.!?])\s", message["content"].strip(), maxsplit=1)[0]
+            lines.append("  Tutor: " + _clip(first))
+    while lines and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def _plain(text):
+    """Lowercased and without accents, as the search index sees text"""
+    return "".join(c for c in unicodedata.normalize("NFKD", text.lower()) if not unicodedata.combining(c))
+
+
+def _owner(email):
+    """Fixed-length prefix that makes a user's indexed words their own"""
+    return hashlib.blake2b(email.lower().encode(), digest_size=5).hexdigest()
+
+
+def _terms(email, content):
+    owner = _owner(email)
+    return " ".join(owner + word for word in _WORD.findall(_plain(content)))
+
+
+def _snippet(content, words, size=16):
+    """About `size` words of `content` around the first match, with matching words in bold"""
+    tokens = content.split()
+
+    def matches(token):
+        return any(piece.startswith(w) for piece in _WORD.findall(_plain(token)) for w in words)
+
+    first = next((i for i, token in enumerate(tokens) if matches(token)), 0)
+    start = max(0, first - size // 4)
+    window = [f"**{token}**" if matches(token) else token for token in tokens[start:start + size]]
+    return ("…" if start else "") + " ".join(window) + ("…" if start + size < len(tokens) else "")
+
+
+class ConversationStore:
+    """Smart Tutor conversations, kept per user.
+
+    Messages are indexed by conversation for replay and by an FTS5 index
+    for search. Every indexed word carries a prefix derived from its owner's
+    email, so each user effectively has their own posting lists and a search
+    never touches anyone else's messages, however common its words are
+    across campus. A conversation keeps a running
+    summary of its older messages. prompt_history() folds messages into it
+    once they fall outside the last TUTOR_HISTORY_MESSAGES, so each prompt
+    reads and sends a bounded tail rather than the whole conversation.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tutor_conversations (
+        id INTEGER PRIMARY KEY,
+        user_email TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        title TEXT NOT NULL,
+        messages INTEGER NOT NULL DEFAULT 0,
+        summary TEXT NOT NULL DEFAULT '',
+        summarized_through INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS tutor_conversations_user_updated_idx
+        ON tutor_conversations (user_email, updated_at, id);
+    CREATE TABLE IF NOT EXISTS tutor_messages (
+        id INTEGER PRIMARY KEY,
+        conversation_id INTEGER NOT NULL REFERENCES tutor_conversations (id) ON DELETE CASCADE,
+        user_email TEXT NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS tutor_messages_conversation_idx ON tutor_messages (conversation_id, id);
+    CREATE VIRTUAL TABLE IF NOT EXISTS tutor_messages_fts USING fts5 (
+        terms, content='', tokenize='unicode61 remove_diacritics 2'
+    );
+    """
+
+    def __init__(self, path=CONVERSATION_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def start(self, email, subject, topic, question):
+        """Start a conversation titled by its first question and return its id"""
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            return conn.execute(
+                "INSERT INTO tutor_conversations (user_email, subject, topic, title, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (email.lower(), subject, topic, _clip(question, 120), now, now),
+            ).lastrowid
+
+    def add_messages(self, email, conversation_id, messages):
+        """Append [{"role", "content"}] to one of `email`'s conversations"""
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            updated = conn.execute(
+                "UPDATE tutor_conversations SET messages = messages + ?, updated_at = ? WHERE id = ? AND user_email = ?",
+                (len(messages), now, conversation_id, email.lower()),
+            ).rowcount
+            if updated:
+                for m in messages:
+                    message_id = conn.execute(
+                        "INSERT INTO tutor_messages (conversation_id, user_email, role, content, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)", (conversation_id, email.lower(), m["role"], m["content"], now),
+                    ).lastrowid
+                    conn.execute("INSERT INTO tutor_messages_fts (rowid, terms) VALUES (?, ?)",
+                                 (message_id, _terms(email, m["content"])))
+
+    def conversation(self, email, conversation_id):
+        """One of `email`'s conversations, or None"""
+        row = self._connect().execute(
+            "SELECT id, subject, topic, title, messages, created_at, updated_at FROM tutor_conversations "
+            "WHERE id = ? AND user_email = ?", (conversation_id, email.lower()),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def conversations(self, email, cursor=None, limit=5):
+        """`email`'s conversations, most recently active first, one page at a time.
+
+        Returns (conversations, next_cursor); pass next_cursor back to get
+        the following page, None means no more.
+        """
+        sql = ("SELECT id, subject, topic, title, messages, created_at, updated_at FROM tutor_conversations "
+               "WHERE user_email = ?")
+        params = [email.lower()]
+        if cursor:
+            before_updated, before_id = cursor.rsplit("|", 1)
+            sql += " AND (updated_at < ? OR (updated_at = ? AND id < ?))"
+            params += [before_updated, before_updated, int(before_id)]
+        sql += " ORDER BY updated_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        rows = [dict(row) for row in self._connect().execute(sql, params).fetchall()]
+        next_cursor = f"{rows[-1]['updated_at']}|{rows[-1]['id']}" if len(rows) == limit else None
+        return rows, next_cursor
+
+    def messages(self, email, conversation_id):
+        """Every message of one of `email`'s conversations, oldest first"""
+        rows = self._connect().execute(
+            "SELECT role, content FROM tutor_messages WHERE conversation_id = ? AND user_email = ? ORDER BY id",
+            (conversation_id, email.lower()),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def prompt_history(self, email, conversation_id, keep=TUTOR_HISTORY_MESSAGES):
+        """(summary, recent messages) to send with the next question.
+
+        Only messages newer than the summary are read. Any beyond the last
+        `keep` are folded into the summary, which is saved, so each message
+        is summarized once.
+        """
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT summary, summarized_through FROM tutor_conversations WHERE id = ? AND user_email = ?",
+            (conversation_id, email.lower()),
+        ).fetchone()
+        if row is None:
+            return "", []
+        rows = conn.execute(
+            "SELECT id, role, content FROM tutor_messages WHERE conversation_id = ? AND id > ? ORDER BY id",
+            (conversation_id, row["summarized_through"]),
+        ).fetchall()
+        summary = row["summary"]
+        # Fold whole exchanges, so the recent messages always start with a question
+        fold = max(0, len(rows) - keep)
+        fold += fold % 2
+        if fold:
+            summary = fold_summary(summary, rows[:fold])
+            with conn:
+                conn.execute(
+                    "UPDATE tutor_conversations SET summary = ?, summarized_through = ? WHERE id = ?",
+                    (summary, rows[fold - 1]["id"], conversation_id),
+                )
+        return summary, [{"role": r["role"], "content": r["content"]} for r in rows[fold:]]
+
+    def search(self, email, text, limit=10, offset=0):
+        """`email`'s messages matching every word of `text` (each also as a prefix), best match first.
+
+        Each result has the conversation's subject, topic and title, and a
+        snippet with the matching words in bold.
+        """
+        words = _WORD.findall(_plain(text))
+        if not words:
+            return []
+        owner = _owner(email)
+        conn = self._connect()
+        ids = [row[0] for row in conn.execute(
+            "SELECT rowid FROM tutor_messages_fts WHERE tutor_messages_fts MATCH ? "
+            "ORDER BY bm25(tutor_messages_fts) LIMIT ? OFFSET ?",
+            (" ".join(f'"{owner}{word}"*' for word in words), limit, offset),
+        )]
+        if not ids:
+            return []
+        rows = conn.execute(
+            "SELECT m.id, m.conversation_id, m.role, m.content, m.created_at, c.subject, c.topic, c.title "
+            "FROM tutor_messages m JOIN tutor_conversations c ON c.id = m.conversation_id "
+            f"WHERE m.id IN ({','.join('?' * len(ids))}) AND m.user_email = ?", [*ids, email.lower()],
+        ).fetchall()
+        by_id = {row["id"]: row for row in rows}
+        return [{"conversation_id": row["conversation_id"], "role": row["role"], "created_at": row["created_at"],
+                 "subject": row["subject"], "topic": row["topic"], "title": row["title"],
+                 "snippet": _snippet(row["content"], words)}
+                for row in (by_id.get(i) for i in ids) if row is not None]
+
+    def delete(self, email, conversation_id):
+        conn = self._connect()
+        with conn:
+            rows = conn.execute("SELECT id, content FROM tutor_messages WHERE conversation_id = ? AND user_email = ?",
+                                (conversation_id, email.lower())).fetchall()
+            # The index keeps no copy of the text, so removing a message means restating its terms
+            conn.executemany("INSERT INTO tutor_messages_fts (tutor_messages_fts, rowid, terms) VALUES ('delete', ?, ?)",
+                             [(row["id"], _terms(email, row["content"])) for row in rows])
+            conn.execute("DELETE FROM tutor_conversations WHERE id = ? AND user_email = ?",
+                         (conversation_id, email.lower()))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store():
+    """Return the tutor conversation history shared by every session in this process"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ConversationStore()
+        return _store
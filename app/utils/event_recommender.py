@@ -0,0 +1,133 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Upcoming events considered for recommendations
+RECOMMEND_MAX_EVENTS = int(os.environ.get("RECOMMEND_MAX_EVENTS", 20000))
+
+# Recommendation lists kept in memory, one per user profile, shared by every session
+RECOMMEND_CACHE_SIZE = int(os.environ.get("RECOMMEND_CACHE_SIZE", 1000))
+
+
+def event_text(event):
+    """Text an event is matched on; title and tags repeat so they outweigh the description"""
+    tags = " ".join(event["tags"])
+    return " ".join([event["title"]] * 2 + [tags] * 3 +
+                    [event["category"], event.get("location", ""), event.get("description", "")])
+
+
+class EventRecommender:
+    """Ranks upcoming events against a user's RSVPs, interests and courses.
+
+    Each event is a TF-IDF vector, computed once per catalog and held as one
+    L2-normalized sparse matrix. A user's profile is vectorized the same
+    way, so scoring every event is a single sparse matrix-vector product
+    giving cosine similarities, and the top k come from argpartition.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self._positions = {e["id"]: i for i, e in enumerate(events)}
+        self.vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True)
+        if events:
+            self.matrix = self.vectorizer.fit_transform([event_text(e) for e in events]).tocsr()
+            self.terms = self.vectorizer.get_feature_names_out()
+        else:
+            self.matrix = None
+
+    def recommend(self, history=(), interests=(), courses=(), k=3):
+        """Top `k` events as [{"event", "score", "reason"}], best first.
+
+        `history` is the events the user has RSVPed to, which are never
+        recommended again; `interests` are tags and `courses` course names.
+        Returns [] when the profile shares no words with any event.
+        """
+        if self.matrix is None:
+            return []
+        sources = {
+            "your interests": " ".join(interests),
+            "your courses": " ".join(courses),
+            "events you RSVPed to": " ".join(event_text(e) for e in history),
+        }
+        # Interests and courses are short, so repeat them to weigh as much as a few RSVPs
+        profile = self.vectorizer.transform([" ".join([sources["your interests"]] * 3 +
+                                                      [sources["your courses"]] * 3 +
+                                                      [sources["events you RSVPed to"]])])
+        if not profile.nnz:
+            return []
+
+        profile = profile.toarray().ravel()
+        scores = self.matrix @ profile
+        scores[[self._positions[e["id"]] for e in history if e["id"] in self._positions]] = 0
+        top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+        top = top[np.argsort(-scores[top])]
+
+        analyzer = self.vectorizer.build_analyzer()
+        source_words = {name: set(analyzer(text)) for name, text in sources.items()}
+        results = []
+        for i in top:
+            if scores[i] <= 0:
+                break
+            results.append({"event": self.events[i], "score": float(scores[i]),
+                            "reason": self._reason(i, profile, source_words)})
+        return results
+
+    def _reason(self, i, profile, source_words):
+        """Which of the user's interests, courses or RSVPs the event's best-matching words came from"""
+        row = slice(self.matrix.indptr[i], self.matrix.indptr[i + 1])
+        columns = self.matrix.indices[row]
+        overlap = self.matrix.data[row] * profile[columns]
+        words = [self.terms[j] for j in columns[np.argsort(-overlap)][:3] if profile[j] > 0]
+        parts = []
+        for name, known in source_words.items():
+            matched = [w for w in words if w in known]
+            if matched:
+                parts.append(f"{name} ({', '.join(matched)})")
+        return "Matches " + " and ".join(parts) if parts else "Similar to your activity"
+
+
+_recommender = None
+_recommender_key = None
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_recommender(store):
+    """Return the recommender for `store`'s upcoming events, rebuilt when events are added"""
+    global _recommender, _recommender_key
+    key = (store.path, store.last_event_id(), date.today())
+    with _lock:
+        if key == _recommender_key:
+            return _recommender
+    events, _ = store.upcoming(limit=RECOMMEND_MAX_EVENTS)
+    recommender = EventRecommender(events)
+    with _lock:
+        _recommender, _recommender_key = recommender, key
+        _cache.clear()
+    return recommender
+
+
+def recommend_events(store, email, interests=(), courses=(), k=3):
+    """Recommendations for `email`, cached until their profile or the events change.
+
+    With `email` None, as for a guest, only interests and courses count.
+    """
+    recommender = get_recommender(store)
+    history = store.rsvp_history(email) if email else []
+    key = ((email or "").lower(), tuple(sorted(interests)), tuple(sorted(courses)),
+           tuple(e["id"] for e in history), k)
+    with _lock:
+        if recommender is _recommender and key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    results = recommender.recommend(history, interests, courses, k)
+    with _lock:
+        if recommender is _recommender:
+            _cache[key] = results
+            while len(_cache) > RECOMMEND_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return results
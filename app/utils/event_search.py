@@ -0,0 +1,144 @@
+import bisect
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+# How much one occurrence of a word counts in each field
+SEARCH_FIELD_WEIGHTS = {"title": 10.0, "tags": 5.0, "location": 3.0, "description": 2.0}
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lowercased words of `text` with accents stripped ("Café" -> ["cafe"])"""
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _WORD.findall(text)
+
+
+def _extend(arrays, lists):
+    """numpy copies of `lists`, reusing `arrays` built when the lists were shorter"""
+    if arrays is None:
+        return tuple(np.array(values) for values in lists)
+    return tuple(np.concatenate([array, np.array(values[len(array):])])
+                 if values[len(array):] else array
+                 for array, values in zip(arrays, lists))
+
+
+class EventSearchIndex:
+    """Inverted index over event text, kept in memory and ranked with BM25.
+
+    Every word of an event's title, tags, location and description maps to
+    the events that contain it, with a field-weighted count. Events are
+    append-only in the catalog, so refresh() only has to index ids it has not
+    seen yet; a query then touches just the posting lists of its own words
+    and scores them with numpy instead of scanning every event.
+    """
+
+    def __init__(self):
+        self._postings = {}   # word -> ([doc, ...], [weighted count, ...])
+        self._arrays = {}     # word -> (docs, counts) as numpy arrays
+        self._words = []      # sorted vocabulary, for prefix lookups
+        self._tag_docs = {}   # lowercased tag -> [doc, ...]
+        self._ids = []        # doc -> event id
+        self._starts = []     # doc -> "YYYY-MM-DD HH:MM"
+        self._categories = []
+        self._lengths = []    # doc -> weighted word count
+        self._columns = None  # numpy copies of the four per-doc lists
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def refresh(self, events_after):
+        """Index events from events_after(last_id), which yields them in id order"""
+        with self._lock:
+            touched = set()
+            for event in events_after(self._last_id):
+                doc = len(self._ids)
+                counts = {}
+                for field, weight in SEARCH_FIELD_WEIGHTS.items():
+                    text = " ".join(event["tags"]) if field == "tags" else event.get(field, "")
+                    for word in tokenize(text):
+                        counts[word] = counts.get(word, 0.0) + weight
+                for word, count in counts.items():
+                    posting = self._postings.get(word)
+                    if posting is None:
+                        posting = self._postings[word] = ([], [])
+                    posting[0].append(doc)
+                    posting[1].append(count)
+                    touched.add(word)
+                for tag in {t.lower() for t in event["tags"]}:
+                    self._tag_docs.setdefault(tag, []).append(doc)
+                    touched.add(("tag", tag))
+                self._ids.append(event["id"])
+                self._starts.append(event["starts_at"])
+                self._categories.append(event["category"])
+                self._lengths.append(sum(counts.values()))
+                self._last_id = event["id"]
+            if not touched:
+                return
+            # Extend the numpy copies with just the new entries, so no query pays for it
+            for key in touched:
+                lists = (self._tag_docs[key[1]],) if isinstance(key, tuple) else self._postings[key]
+                self._arrays[key] = _extend(self._arrays.get(key), lists)
+            if len(self._words) != len(self._postings):
+                self._words = sorted(self._postings)
+            self._columns = _extend(self._columns, (self._ids, self._starts, self._categories, self._lengths))
+
+    def _expand(self, word):
+        """`word` and every indexed word it is a prefix of"""
+        if len(word) < 2:
+            return [word] if word in self._postings else []
+        lo = bisect.bisect_left(self._words, word)
+        hi = bisect.bisect_left(self._words, word + "\uffff")
+        return self._words[lo:hi]
+
+    def search(self, text, category=None, tag=None, start=None, limit=20):
+        """Ids of events matching every word of `text`, best first.
+
+        Words match as prefixes. Ties go to the event starting sooner.
+        """
+        words = tokenize(text)
+        with self._lock:
+            if not words or not self._ids:
+                return []
+            ids, starts, categories, lengths = self._columns
+            total = len(ids)
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / lengths.mean())
+
+            scores = np.zeros(total)
+            matched = np.ones(total, dtype=bool)
+            for word in dict.fromkeys(words):
+                hits = np.zeros(total, dtype=bool)
+                for term in self._expand(word):
+                    docs, counts = self._arrays[term]
+                    idf = np.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+                    scores[docs] += idf * counts * (BM25_K1 + 1) / (counts + length_norm[docs])
+                    hits[docs] = True
+                matched &= hits
+            if category:
+                matched &= categories == category
+            if tag:
+                if tag.lower() not in self._tag_docs:
+                    return []
+                tagged = np.zeros(total, dtype=bool)
+                tagged[self._arrays[("tag", tag.lower())][0]] = True
+                matched &= tagged
+            if start:
+                matched &= starts >= start
+
+            docs = np.flatnonzero(matched)
+            if len(docs) > limit:
+                # Keep everything scoring at least the limit-th best, so ties are broken by start
+                cutoff = -np.partition(-scores[docs], limit - 1)[limit - 1]
+                docs = docs[scores[docs] >= cutoff]
+            docs = docs[np.lexsort((ids[docs], starts[docs], -scores[docs]))]
+            return [int(i) for i in ids[docs[:limit]]]
@@ -0,0 +1,503 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from app.utils.api_client import get_api_client
+from app.utils.event_search import EventSearchIndex
+
+EVENT_DB_FILE = "data/events.db"
+
+# Query results kept in memory, shared by every session in this process
+EVENT_CACHE_SIZE = int(os.environ.get("EVENT_CACHE_SIZE", 1000))
+
+EVENT_CATEGORIES = ["Academic", "Social", "Sports", "Career", "Workshops"]
+
+# Seeded into an empty catalog, dated relative to the day it is created
+SAMPLE_EVENTS = [
+    {"title": "AI & Machine Learning Workshop", "category": "Workshops", "days": 2, "time": "14:00",
+     "location": "CS Building Room 101", "description": "Learn about the latest developments in AI and ML",
+     "max_capacity": 50, "tags": ["AI", "Technology", "Workshop"]},
+    {"title": "Basketball Tournament", "category": "Sports", "days": 5, "time": "15:00",
+     "location": "Sports Complex", "description": "Annual inter-department basketball tournament",
+     "max_capacity": 200, "tags": ["Sports", "Tournament", "Basketball"]},
+    {"title": "Career Fair", "category": "Career", "days": 10, "time": "10:00",
+     "location": "Student Center", "description": "Connect with top companies and explore internship opportunities",
+     "max_capacity": 500, "tags": ["Career", "Internship", "Networking"]},
+    {"title": "Study Group: Calculus", "category": "Academic", "days": 0, "time": "16:00",
+     "location": "Library Room 204", "description": "Weekly study group for MATH 101 students",
+     "max_capacity": 20, "tags": ["Study Group", "Math", "Academic"]},
+    {"title": "Movie Night", "category": "Social", "days": 3, "time": "19:00",
+     "location": "Student Lounge", "description": "Watch and discuss the latest blockbuster",
+     "max_capacity": 100, "tags": ["Social", "Entertainment", "Movie"]},
+]
+
+EVENT_COLUMNS = "id, title, category, date, time, location, description, max_capacity, attendees, tags"
+
+
+def _event(row):
+    event = dict(row)
+    event["tags"] = json.loads(event["tags"])
+    return event
+
+
+class EventStore:
+    """Event catalog in SQLite, shared by every club and every replica.
+
+    Events are ordered by (starts_at, id) and indexed on it, on category and
+    on tags, so "upcoming events in a category or with a tag" is an index
+    range scan. Pages are fetched with a keyset cursor instead of OFFSET.
+    Query results are cached in memory and the cache is dropped whenever a
+    write counter, bumped by triggers on every table, changes, as AuthService
+    does for users.
+
+    Text search goes through an in-memory inverted index (EventSearchIndex)
+    that indexes new rows as they appear.
+
+    RSVPs live in the same database so a seat claim and the attendee count
+    change in one transaction (see rsvp() and cancel_rsvp()).
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        category TEXT NOT NULL,
+        date TEXT NOT NULL,
+        time TEXT NOT NULL,
+        starts_at TEXT NOT NULL,
+        location TEXT NOT NULL DEFAULT '',
+        description TEXT NOT NULL DEFAULT '',
+        max_capacity INTEGER NOT NULL,
+        attendees INTEGER NOT NULL DEFAULT 0,
+        tags TEXT NOT NULL DEFAULT '[]',
+        created_by TEXT NOT NULL DEFAULT '',
+        created_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS events_starts_idx ON events (starts_at, id);
+    CREATE INDEX IF NOT EXISTS events_category_starts_idx ON events (category, starts_at, id);
+    CREATE TABLE IF NOT EXISTS event_tags (
+        tag TEXT NOT NULL,
+        event_id INTEGER NOT NULL REFERENCES events (id) ON DELETE CASCADE,
+        PRIMARY KEY (tag, event_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS event_tags_event_idx ON event_tags (event_id);
+    CREATE TABLE IF NOT EXISTS rsvps (
+        id INTEGER PRIMARY KEY,
+        event_id INTEGER NOT NULL REFERENCES events (id) ON DELETE CASCADE,
+        user_email TEXT NOT NULL,
+        status TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        UNIQUE (event_id, user_email)
+    );
+    CREATE INDEX IF NOT EXISTS rsvps_waitlist_idx ON rsvps (event_id, status, id);
+    CREATE INDEX IF NOT EXISTS rsvps_user_idx ON rsvps (user_email);
+    CREATE TABLE IF NOT EXISTS catalog_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0);
+    """ + "".join(f"""
+    CREATE TRIGGER IF NOT EXISTS catalog_version_{table}_{op.lower()} AFTER {op} ON {table} BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END;""" for table in ("events", "event_tags", "rsvps") for op in ("INSERT", "UPDATE", "DELETE"))
+
+    def __init__(self, path=EVENT_DB_FILE, cache_size=EVENT_CACHE_SIZE, seed=True):
+        self.path = path
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._cache = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self._search_index = None
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        if seed and not conn.execute("SELECT 1 FROM events LIMIT 1").fetchone():
+            today = date.today()
+            self.add_many(dict(e, date=(today + timedelta(days=e["days"])).isoformat()) for e in SAMPLE_EVENTS)
+
+    def _connect(self):
+        # Streamlit runs each session on its own thread, so keep one connection per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _immediate(self):
+        """Write transaction that takes SQLite's write lock up front.
+
+        Every RSVP read-check-write runs inside one, so concurrent RSVPs from
+        any thread or process are serialized and none can act on a stale count.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def version(self):
+        """Counter that every committed write to events, tags or RSVPs bumps, from any process"""
+        return self._connect().execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()[0]
+
+    def _cached(self, key, query):
+        """Return query(), reusing the result while the catalog is unchanged"""
+        with self._lock:
+            version = self.version()
+            if version != self._version:
+                self._cache.clear()
+                self._version = version
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        result = query()
+        with self._lock:
+            # Skip caching if the catalog changed while we were reading it
+            if version == self._version:
+                self._cache[key] = result
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _row(event, created_by=""):
+        tags = [t.strip() for t in event.get("tags", []) if t.strip()]
+        return (
+            event["title"], event["category"], str(event["date"]), event["time"],
+            f"{event['date']} {event['time']}", event.get("location", ""), event.get("description", ""),
+            int(event["max_capacity"]), json.dumps(tags), created_by, datetime.now().isoformat(),
+        ), tags
+
+    def add(self, event, created_by=""):
+        """Add an event dict and return its id"""
+        return self.add_many([event], created_by)[0]
+
+    def add_many(self, events, created_by=""):
+        """Add many events in one transaction and return their ids"""
+        conn = self._connect()
+        ids = []
+        with conn:
+            for event in events:
+                row, tags = self._row(event, created_by)
+                event_id = conn.execute(
+                    "INSERT INTO events (title, category, date, time, starts_at, location, description, "
+                    "max_capacity, tags, created_by, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                ).lastrowid
+                conn.executemany("INSERT OR IGNORE INTO event_tags (tag, event_id) VALUES (?, ?)",
+                                 [(tag.lower(), event_id) for tag in tags])
+                ids.append(event_id)
+        return ids
+
+    def get(self, event_id):
+        """Return one event dict, or None"""
+        def query():
+            row = self._connect().execute(
+                f"SELECT {EVENT_COLUMNS} FROM events WHERE id = ?", (event_id,)
+            ).fetchone()
+            return _event(row) if row else None
+        return self._cached(("get", event_id), query)
+
+    def upcoming(self, category=None, tag=None, start=None, end=None, cursor=None, limit=20):
+        """Events starting in [start, end), in start order, one page at a time.
+
+        `start` defaults to today and `end` to no limit; both are "YYYY-MM-DD"
+        or "YYYY-MM-DD HH:MM". Returns (events, next_cursor); pass
+        next_cursor back to get the following page, None means no more.
+        """
+        start = str(start or date.today())
+
+        def query():
+            sql = f"SELECT {EVENT_COLUMNS}, starts_at FROM events e"
+            params = []
+            if tag:
+                sql += " JOIN event_tags t ON t.event_id = e.id AND t.tag = ?"
+                params.append(tag.lower())
+            sql += " WHERE e.starts_at >= ?"
+            params.append(start)
+            if end:
+                sql += " AND e.starts_at < ?"
+                params.append(str(end))
+            if category:
+                sql += " AND e.category = ?"
+                params.append(category)
+            if cursor:
+                after_start, after_id = cursor.rsplit("|", 1)
+                sql += " AND (e.starts_at > ? OR (e.starts_at = ? AND e.id > ?))"
+                params += [after_start, after_start, int(after_id)]
+            sql += " ORDER BY e.starts_at, e.id LIMIT ?"
+            params.append(limit)
+            rows = self._connect().execute(sql, params).fetchall()
+            events = [_event(row) for row in rows]
+            next_cursor = f"{rows[-1]['starts_at']}|{rows[-1]['id']}" if len(rows) == limit else None
+            for event in events:
+                del event["starts_at"]
+            return events, next_cursor
+        return self._cached(("upcoming", category, tag, start, end, cursor, limit), query)
+
+    def search(self, text, category=None, tag=None, start=None, limit=20):
+        """Upcoming events matching every word of `text`, best match first.
+
+        Each word also matches as a prefix ("mach lear" finds "Machine
+        Learning"), across title, description, location and tags. Ranking
+        runs on an in-memory inverted index (see EventSearchIndex) that picks
+        up new events incrementally whenever the catalog changes.
+        """
+        start = str(start or date.today())
+        with self._lock:
+            if self._search_index is None:
+                self._search_index = EventSearchIndex()
+            index = self._search_index
+
+        def query():
+            index.refresh(self._events_after)
+            ids = index.search(text, category, tag, start, limit)
+            if not ids:
+                return []
+            placeholders = ",".join("?" * len(ids))
+            rows = self._connect().execute(
+                f"SELECT {EVENT_COLUMNS} FROM events WHERE id IN ({placeholders})", ids
+            ).fetchall()
+            by_id = {row["id"]: _event(row) for row in rows}
+            return [by_id[event_id] for event_id in ids if event_id in by_id]
+        return self._cached(("search", text, category, tag, start, limit), query)
+
+    def _events_after(self, last_id, batch_size=5000):
+        """Yield events with an id above `last_id` in id order, for indexing"""
+        while True:
+            rows = self._connect().execute(
+                f"SELECT {EVENT_COLUMNS}, starts_at FROM events WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            for row in rows:
+                yield _event(row)
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["id"]
+
+    def category_counts(self, start=None, end=None):
+        """{category: number of events} starting in [start, end)"""
+        start = str(start or date.today())
+
+        def query():
+            sql = "SELECT category, COUNT(*) FROM events WHERE starts_at >= ?"
+            params = [start]
+            if end:
+                sql += " AND starts_at < ?"
+                params.append(str(end))
+            return dict(self._connect().execute(sql + " GROUP BY category", params).fetchall())
+        return self._cached(("category_counts", start, end), query)
+
+    def tags(self):
+        """Every tag in use, lowercased and sorted"""
+        return self._cached(("tags",), lambda: [
+            row[0] for row in self._connect().execute("SELECT DISTINCT tag FROM event_tags ORDER BY tag")
+        ])
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def last_event_id(self):
+        """Id of the newest event; changes only when events are added"""
+        return self._connect().execute("SELECT MAX(id) FROM events").fetchone()[0] or 0
+
+    # RSVPs
+
+    def rsvp(self, event_id, email):
+        """RSVP `email` to an event; returns "going", "waitlist" or None if no such event.
+
+        Idempotent: repeating an RSVP returns the status already held. A seat
+        is claimed with a compare-and-increment on the attendee count, and
+        anyone who misses out joins the event's waitlist in arrival order.
+        """
+        email = email.lower()
+        with self._immediate() as conn:
+            row = conn.execute("SELECT status FROM rsvps WHERE event_id = ? AND user_email = ?",
+                               (event_id, email)).fetchone()
+            if row:
+                return row["status"]
+            claimed = conn.execute(
+                "UPDATE events SET attendees = attendees + 1 WHERE id = ? AND attendees < max_capacity",
+                (event_id,),
+            ).rowcount
+            if not claimed and not conn.execute("SELECT 1 FROM events WHERE id = ?", (event_id,)).fetchone():
+                return None
+            status = "going" if claimed else "waitlist"
+            conn.execute(
+                "INSERT INTO rsvps (event_id, user_email, status, created_at) VALUES (?, ?, ?, ?)",
+                (event_id, email, status, datetime.now().isoformat()),
+            )
+            return status
+
+    def cancel_rsvp(self, event_id, email):
+        """Withdraw `email` from an event or its waitlist.
+
+        A freed seat goes to the first person on the waitlist; returns their
+        email, or None when nobody was promoted.
+        """
+        email = email.lower()
+        with self._immediate() as conn:
+            row = conn.execute("SELECT id, status FROM rsvps WHERE event_id = ? AND user_email = ?",
+                               (event_id, email)).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM rsvps WHERE id = ?", (row["id"],))
+            if row["status"] != "going":
+                return None
+            promoted = conn.execute(
+                "SELECT id, user_email FROM rsvps WHERE event_id = ? AND status = 'waitlist' ORDER BY id LIMIT 1",
+                (event_id,),
+            ).fetchone()
+            if promoted is None:
+                conn.execute("UPDATE events SET attendees = attendees - 1 WHERE id = ?", (event_id,))
+                return None
+            # The seat passes straight on, so the attendee count is unchanged
+            conn.execute("UPDATE rsvps SET status = 'going' WHERE id = ?", (promoted["id"],))
+            return promoted["user_email"]
+
+    def rsvp_statuses(self, email, event_ids):
+        """{event_id: ("going", None) or ("waitlist", position)} for `email`'s RSVPs among `event_ids`"""
+        if not event_ids:
+            return {}
+        placeholders = ",".join("?" * len(event_ids))
+        rows = self._connect().execute(
+            f"""SELECT r.event_id, r.status,
+                       (SELECT COUNT(*) FROM rsvps w
+                        WHERE w.event_id = r.event_id AND w.status = 'waitlist' AND w.id <= r.id) AS position
+                FROM rsvps r WHERE r.user_email = ? AND r.event_id IN ({placeholders})""",
+            [email.lower(), *event_ids],
+        ).fetchall()
+        return {row["event_id"]: (row["status"], row["position"] if row["status"] == "waitlist" else None)
+                for row in rows}
+
+    def rsvp_history(self, email, limit=50):
+        """Events `email` has RSVPed to or is waiting for, most recent RSVP first.
+
+        Each event dict also carries its "created_at" and "rsvp_status", "going"
+        or "waitlist".
+        """
+        def query():
+            rows = self._connect().execute(
+                f"""SELECT {", ".join("e." + c.strip() for c in EVENT_COLUMNS.split(","))},
+                           e.created_at, r.status AS rsvp_status
+                    FROM rsvps r JOIN events e ON e.id = r.event_id
+                    WHERE r.user_email = ? ORDER BY r.id DESC LIMIT ?""",
+                (email.lower(), limit),
+            ).fetchall()
+            return [_event(row) for row in rows]
+        return self._cached(("rsvp_history", email.lower(), limit), query)
+
+    def waitlist_counts(self, event_ids):
+        """{event_id: number waiting} for events in `event_ids` that have a waitlist"""
+        if not event_ids:
+            return {}
+        placeholders = ",".join("?" * len(event_ids))
+        return dict(self._connect().execute(
+            f"SELECT event_id, COUNT(*) FROM rsvps WHERE status = 'waitlist' AND event_id IN ({placeholders}) "
+            "GROUP BY event_id",
+            list(event_ids),
+        ).fetchall())
+
+
+class ApiEventStore:
+    """Event catalog served by the Campus Connect API, shared by every replica.
+
+    The API serves its own EventStore, so this offers the same methods the
+    pages and the recommender use, one request each.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        # Identifies the catalog in cache keys, as EventStore.path does
+        self.path = client.base_url + "/events"
+
+    def get(self, event_id):
+        return self.client.get_event(event_id)
+
+    def upcoming(self, category=None, tag=None, start=None, end=None, cursor=None, limit=20):
+        """Events starting in [start, end), in start order, as (events, next_cursor).
+
+        Limits above the API's page size are fetched a page at a time.
+        """
+        events = []
+        while True:
+            page = self.client.list_events(category, tag, start, end, cursor,
+                                           min(limit - len(events), self.client.MAX_PAGE_SIZE))
+            events += page["items"]
+            cursor = page["next_cursor"]
+            if cursor is None or len(events) >= limit:
+                return events, cursor
+
+    def search(self, text, category=None, tag=None, start=None, limit=20):
+        return self.client.search_events(text, category, tag, start, limit)
+
+    def category_counts(self, start=None, end=None):
+        return self.client.event_category_counts(start, end)
+
+    def tags(self):
+        return self.client.event_tags()
+
+    def last_event_id(self):
+        return self.client.last_event_id()
+
+    def add(self, event, created_by=""):
+        """Add an event dict and return its id"""
+        return self.client.create_event(event, created_by)["id"]
+
+    def rsvp(self, event_id, email):
+        return self.client.rsvp(event_id, email)
+
+    def cancel_rsvp(self, event_id, email):
+        return self.client.cancel_rsvp(event_id, email)
+
+    def rsvp_statuses(self, email, event_ids):
+        if not event_ids:
+            return {}
+        return {row["event_id"]: (row["status"], row["position"])
+                for row in self.client.rsvp_statuses(email, event_ids)}
+
+    def rsvp_history(self, email, limit=50):
+        return self.client.rsvp_history(email, limit)
+
+    def waitlist_counts(self, event_ids):
+        if not event_ids:
+            return {}
+        return self.client.waitlist_counts(event_ids)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_event_catalog():
+    """Return this process's own SQLite event catalog, which the API serves"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = EventStore()
+        return _catalog
+
+
+def get_event_store():
+    """Return the API-backed catalog when CAMPUS_API_URL is set, else the local one"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            client = get_api_client()
+            _store = ApiEventStore(client) if client else get_event_catalog()
+        return _store
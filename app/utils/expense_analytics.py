@@ -0,0 +1,93 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Analytics objects kept in memory, one per (user, data version), shared by every session
+ANALYTICS_CACHE_SIZE = int(os.environ.get("EXPENSE_ANALYTICS_CACHE_SIZE", 64))
+
+# Resampling frequencies offered by the trends chart
+FREQUENCIES = {"Daily": "D", "Weekly": "W-MON", "Monthly": "MS"}
+
+
+def month_options(months, current_month):
+    """Every month from the earliest of `months` and January of this year to
+    the latest of `months` and `current_month`, oldest first"""
+    start = min([current_month[:4] + "-01"] + list(months))
+    end = max([current_month] + list(months))
+    return [str(p) for p in pd.period_range(start, end, freq="M")]
+
+
+class ExpenseAnalytics:
+    """Vectorized rollups over one user's whole expense history.
+
+    The history is indexed by date once, and every series is a pandas
+    resample or groupby over it. Results are memoized on the instance, and
+    instances are cached per user and data version (see get_analytics), so
+    a rerun with unchanged data only looks its answers up.
+    """
+
+    def __init__(self, frame):
+        frame = frame[["date", "category", "amount"]].copy()
+        frame["date"] = pd.to_datetime(frame["date"])
+        self.frame = frame.set_index("date").sort_index()
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def _memo(self, key, compute):
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+        result = compute()
+        with self._lock:
+            self._results[key] = result
+        return result
+
+    def totals(self, freq="MS"):
+        """Spending per period over the whole history, with empty periods as 0"""
+        return self._memo(("totals", freq),
+                          lambda: self.frame["amount"].resample(freq).sum())
+
+    def by_category(self, freq="MS"):
+        """Spending per period and category; one column per category"""
+        def compute():
+            table = self.frame.pivot_table(index="date", columns="category", values="amount",
+                                           aggfunc="sum", fill_value=0.0)
+            return table.resample(freq).sum()
+        return self._memo(("by_category", freq), compute)
+
+    def daily(self, month):
+        """Spending on every day of `month` ("YYYY-MM"), including days with none"""
+        def compute():
+            days = pd.date_range(month + "-01", periods=pd.Period(month).days_in_month, freq="D")
+            return self.totals("D").reindex(days, fill_value=0.0)
+        return self._memo(("daily", month), compute)
+
+    def year_over_year(self):
+        """Monthly spending with one row per calendar month and one column per year"""
+        def compute():
+            monthly = self.totals("MS")
+            table = monthly.groupby([monthly.index.month, monthly.index.year]).sum().unstack(fill_value=0.0)
+            table.index.name, table.columns.name = "month", "year"
+            return table
+        return self._memo(("year_over_year",), compute)
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_analytics(user, ledger):
+    """Return the analytics for `user`'s ledger, rebuilt only when its data changes"""
+    key = (user.lower(), ledger.version())
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    analytics = ExpenseAnalytics(ledger.frame())
+    with _cache_lock:
+        _cache[key] = analytics
+        while len(_cache) > ANALYTICS_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return analytics
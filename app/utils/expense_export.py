@@ -0,0 +1,121 @@
+import argparse
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+from app.utils.expense_store import get_expense_store
+
+# Exports are generators of bytes built one store batch at a time, so a
+# cohort-wide export never holds more than one batch of transactions
+EXPORT_COLUMNS = ["user", "id", "date", "month", "category", "amount", "description"]
+EXPORT_FORMATS = ["csv", "parquet"]
+
+
+def iter_frames(store, users=None, months=None, categories=None):
+    """Yield one DataFrame per batch of matching transactions, for `users` or everyone"""
+    for user in users or store.users():
+        for batch in store.iter_transactions(user, months, categories):
+            frame = pd.DataFrame(batch, columns=["id", "date", "category", "amount", "description"])
+            frame["user"] = user.lower()
+            frame["date"] = frame["date"].astype(str)
+            frame["month"] = frame["date"].str[:7]
+            frame["amount"] = frame["amount"].astype(float)
+            frame["description"] = frame["description"].fillna("")
+            yield frame[EXPORT_COLUMNS]
+
+
+def stream_csv(frames):
+    """Yield CSV bytes, a header and then one block per frame"""
+    yield (",".join(EXPORT_COLUMNS) + "\n").encode("utf-8")
+    for frame in frames:
+        yield frame.to_csv(index=False, header=False).encode("utf-8")
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_parquet(frames):
+    """Yield Parquet bytes, one row group per frame (needs pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("user", pa.string()), ("id", pa.string()), ("date", pa.string()), ("month", pa.string()),
+        ("category", pa.string()), ("amount", pa.float64()), ("description", pa.string()),
+    ])
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        for frame in frames:
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_expenses(store, fmt="csv", users=None, months=None, categories=None):
+    """Stream matching transactions from `store` in `fmt` ("csv" or "parquet")"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    frames = iter_frames(store, users, months, categories)
+    return stream_parquet(frames) if fmt == "parquet" else stream_csv(frames)
+
+
+def save_export(store, fmt="csv", users=None, months=None, categories=None, path=None):
+    """Write an export to `path`, or a new temporary file, as it is produced; returns the path"""
+    chunks = export_expenses(store, fmt, users, months, categories)
+    temporary = path is None
+    if temporary:
+        with tempfile.NamedTemporaryFile(prefix="expenses-", suffix="." + fmt, delete=False) as f:
+            path = f.name
+    try:
+        with open(path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+    except BaseException:
+        if temporary:
+            os.remove(path)
+        raise
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export expense history as CSV or Parquet.")
+    parser.add_argument("--user", action="append", help="Export only this user (repeatable); default everyone")
+    parser.add_argument("--month", action="append", help="Only this YYYY-MM month (repeatable)")
+    parser.add_argument("--category", action="append", help="Only this category (repeatable)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="Default: from the output file extension")
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+    save_export(get_expense_store(), fmt, args.user, args.month, args.category, args.output)
+
+
+if __name__ == "__main__":
+    # python -m app.utils.expense_export [--user EMAIL] [--month YYYY-MM] [--category NAME] -o expenses.parquet
+    main()
@@ -0,0 +1,274 @@
+import codecs
+import hashlib
+import io
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Rows parsed at a time, and rows handed to the store per write
+IMPORT_CHUNK_SIZE = int(os.environ.get("EXPENSE_IMPORT_CHUNK_SIZE", 10000))
+IMPORT_BATCH_SIZE = int(os.environ.get("EXPENSE_IMPORT_BATCH_SIZE", 5000))
+
+# Bytes of an OFX statement read at a time
+OFX_READ_SIZE = 1 << 16
+
+# Header names banks use for each field, lowercased
+DATE_COLUMNS = ["date", "transaction date", "txn date", "value date", "posting date", "tran date"]
+DESCRIPTION_COLUMNS = ["description", "narration", "details", "particulars", "transaction details",
+                       "remarks", "memo", "payee", "name"]
+AMOUNT_COLUMNS = ["amount", "transaction amount", "amount (inr)", "amt"]
+DEBIT_COLUMNS = ["debit", "withdrawal", "withdrawal amt.", "withdrawal amount", "debit amount", "dr"]
+# Columns marking each row as a debit or a credit ("Dr"/"Cr", "Debit"/"Credit", "D"/"C")
+DIRECTION_COLUMNS = ["dr/cr", "cr/dr", "debit/credit", "credit/debit", "transaction type", "type"]
+DEBIT_MARKS = {"dr", "d", "debit"}
+CREDIT_MARKS = {"cr", "c", "credit"}
+
+# OFX TRNTYPE values that say which way money moved; the rest fall back to the sign of TRNAMT
+OFX_DEBIT_TYPES = {"DEBIT", "PAYMENT", "CHECK", "POS", "ATM", "FEE", "SRVCHG", "DIRECTDEBIT", "REPEATPMT"}
+OFX_CREDIT_TYPES = {"CREDIT", "DEP", "INT", "DIV", "DIRECTDEP"}
+
+# Keywords that put a transaction in a category when it has none
+CATEGORY_KEYWORDS = {
+    "Food": ["swiggy", "zomato", "restaurant", "cafe", "canteen", "mess", "food", "pizza", "dominos",
+             "grocery", "bigbasket", "blinkit", "zepto", "dmart"],
+    "Rent": ["rent", "hostel", "pg ", "landlord", "housing"],
+    "Utilities": ["electricity", "water bill", "gas", "broadband", "wifi", "recharge", "jio", "airtel",
+                  "vodafone", "bsnl", "bill pay"],
+    "Textbooks": ["book", "stationery", "xerox", "photocopy", "print", "course fee", "exam fee"],
+    "Entertainment": ["netflix", "spotify", "prime video", "hotstar", "bookmyshow", "pvr", "inox",
+                      "movie", "steam", "gaming"],
+    "Transportation": ["uber", "ola", "rapido", "irctc", "metro", "railway", "petrol", "fuel", "bus ",
+                       "redbus", "parking", "fastag"],
+}
+
+
+def _pick(columns, names):
+    lowered = {c.strip().lower(): c for c in columns}
+    return next((lowered[n] for n in names if n in lowered), None)
+
+
+def _to_amount(values):
+    cleaned = values.astype(str).str.replace(r"[^\d.\-]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce")
+
+
+def _normalize_csv(chunk, debits_negative):
+    """Map a raw statement chunk to date/description/amount/category columns"""
+    date_col = _pick(chunk.columns, DATE_COLUMNS)
+    description_col = _pick(chunk.columns, DESCRIPTION_COLUMNS)
+    debit_col = _pick(chunk.columns, DEBIT_COLUMNS)
+    amount_col = _pick(chunk.columns, AMOUNT_COLUMNS)
+    if date_col is None or (debit_col is None and amount_col is None):
+        raise ValueError("The statement needs a date column and an amount or debit column.")
+
+    direction_col = _pick(chunk.columns, DIRECTION_COLUMNS)
+    if debit_col is not None:
+        amount = _to_amount(chunk[debit_col]).abs()
+    else:
+        amount = _to_amount(chunk[amount_col])
+        # Statements with signed amounts list spending as negative numbers
+        amount = -amount if debits_negative else amount
+        if direction_col is not None:
+            # A row marked debit or credit says which way it went, whatever its sign
+            direction = chunk[direction_col].fillna("").astype(str).str.strip().str.lower().str.rstrip(".")
+            amount = amount.where(~direction.isin(DEBIT_MARKS), amount.abs())
+            amount = amount.where(~direction.isin(CREDIT_MARKS), -amount.abs())
+
+    category_col = _pick(chunk.columns, ["category"])
+    return pd.DataFrame({
+        "date": pd.to_datetime(chunk[date_col], errors="coerce", dayfirst=True, format="mixed"),
+        "description": chunk[description_col].fillna("").astype(str).str.strip()
+        if description_col is not None else "",
+        "amount": amount,
+        "category": chunk[category_col] if category_col is not None else None,
+    })
+
+
+def _is_binary(file):
+    return isinstance(file, (io.RawIOBase, io.BufferedIOBase)) or "b" in getattr(file, "mode", "")
+
+
+def detect_debits_negative(file, chunk_size=IMPORT_CHUNK_SIZE):
+    """Whether a CSV statement with signed amounts lists spending as negative numbers.
+
+    Banks either print spending as negative amounts next to positive
+    deposits, or as positive amounts with refunds negative. Any negative
+    amount in the file means the former. Reads only the amount column, and
+    leaves the file where it was.
+    """
+    start = file.tell()
+    # pandas closes a binary file it wraps itself when done, but leaves ours open
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline="") if _is_binary(file) else file
+    try:
+        for chunk in pd.read_csv(text, chunksize=chunk_size, dtype=str, skipinitialspace=True,
+                                 usecols=lambda c: c.strip().lower() in AMOUNT_COLUMNS):
+            if len(chunk.columns) and bool((_to_amount(chunk.iloc[:, 0]) < 0).any()):
+                return True
+        return False
+    finally:
+        if text is not file:
+            text.detach()
+        file.seek(start)
+
+
+def read_csv_chunks(file, chunk_size=IMPORT_CHUNK_SIZE, debits_negative=None):
+    """Yield normalized chunks of a CSV statement without loading it whole.
+
+    `debits_negative` says how signed amounts are written; None detects it
+    from the whole file first (see detect_debits_negative()).
+    """
+    if debits_negative is None:
+        debits_negative = detect_debits_negative(file, chunk_size)
+    for chunk in pd.read_csv(file, chunksize=chunk_size, dtype=str, skipinitialspace=True):
+        yield _normalize_csv(chunk, debits_negative)
+
+
+_OFX_START = re.compile(r"<STMTTRN>", re.IGNORECASE)
+_OFX_END = re.compile(r"</STMTTRN>|<STMTTRN>|</BANKTRANLIST>", re.IGNORECASE)
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+def _ofx_transactions(file, read_size=OFX_READ_SIZE):
+    """Yield the body of each STMTTRN block, reading the file `read_size` bytes at a time.
+
+    SGML-style OFX leaves tags unclosed, so a block also ends where the
+    next one or the transaction list does.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer, done = "", False
+    while not done:
+        piece = file.read(read_size)
+        done = not piece
+        buffer += decoder.decode(piece, final=done) if isinstance(piece, bytes) else piece
+        while True:
+            start = _OFX_START.search(buffer)
+            if start is None:
+                # Keep what may be the start of a tag cut off by the read
+                buffer = buffer[buffer.rfind("<"):] if "<" in buffer else ""
+                break
+            end = _OFX_END.search(buffer, start.end())
+            if end is None:
+                buffer = buffer[start.start():]
+                break
+            yield buffer[start.end():end.start()]
+            buffer = buffer[end.start():]
+
+
+def read_ofx_chunks(file, chunk_size=IMPORT_CHUNK_SIZE):
+    """Yield normalized chunks of an OFX/QFX statement, parsing it as it is read"""
+    rows = []
+    for block in _ofx_transactions(file):
+        fields = {k.upper(): v.strip() for k, v in _OFX_FIELD.findall(block)}
+        rows.append({
+            "date": fields.get("DTPOSTED", "")[:8],
+            "description": fields.get("NAME") or fields.get("MEMO", ""),
+            "amount": fields.get("TRNAMT"),
+            "type": fields.get("TRNTYPE", "").upper(),
+        })
+        if len(rows) >= chunk_size:
+            yield _normalize_ofx(rows)
+            rows = []
+    if rows:
+        yield _normalize_ofx(rows)
+
+
+def _normalize_ofx(rows):
+    frame = pd.DataFrame(rows)
+    # TRNTYPE says which way money moved; without a telling one, debits are negative TRNAMT
+    amount = -_to_amount(frame["amount"])
+    amount = amount.where(~frame["type"].isin(OFX_DEBIT_TYPES), amount.abs())
+    amount = amount.where(~frame["type"].isin(OFX_CREDIT_TYPES), -amount.abs())
+    return pd.DataFrame({
+        "date": pd.to_datetime(frame["date"], format="%Y%m%d", errors="coerce"),
+        "description": frame["description"],
+        "amount": amount,
+        "category": None,
+    })
+
+
+def read_statement(file, filename, chunk_size=IMPORT_CHUNK_SIZE, debits_negative=None):
+    """Pick the reader from the file extension"""
+    if filename.lower().endswith((".ofx", ".qfx")):
+        return read_ofx_chunks(file, chunk_size)
+    return read_csv_chunks(file, chunk_size, debits_negative)
+
+
+def categorize(descriptions, categories):
+    """Assign each description to one of `categories` by keyword, vectorized"""
+    fallback = "Other" if "Other" in categories else categories[-1]
+    known = [c for c in categories if c in CATEGORY_KEYWORDS]
+    if not known:
+        return pd.Series(fallback, index=descriptions.index)
+    lowered = descriptions.str.lower()
+    conditions = [
+        lowered.str.contains("|".join(re.escape(k) for k in CATEGORY_KEYWORDS[c]), regex=True).to_numpy()
+        for c in known
+    ]
+    return pd.Series(np.select(conditions, known, default=fallback), index=descriptions.index)
+
+
+def _dedupe_keys(frame):
+    """date|cents|description for each row; identical rows share a key"""
+    cents = (frame["amount"].astype(float) * 100).round().astype("int64").astype(str)
+    description = frame["description"].astype(str).str.lower().str.split().str.join(" ")
+    return frame["date"].astype(str) + "|" + cents + "|" + description
+
+
+def import_statement(store, user, ledger, file, filename, categories,
+                     chunk_size=IMPORT_CHUNK_SIZE, batch_size=IMPORT_BATCH_SIZE, progress=None,
+                     debits_negative=None):
+    """Stream a statement into `store` and `ledger`, skipping rows already recorded.
+
+    Rows are parsed chunk by chunk, categorized, and compared with the
+    history by date, amount and description (counting repeats, so two
+    identical coffees on one day stay two). Each row gets an id derived from
+    the user and that key, which makes re-importing the same file a no-op. New rows are
+    written with store.add_many() every `batch_size` rows. `progress` is
+    called with the running counts after each chunk. `debits_negative` is
+    how a CSV writes spending, None to detect it (see read_csv_chunks()).
+    """
+    history = _dedupe_keys(ledger.frame()).value_counts()
+    seen = pd.Series(dtype="int64")
+    stats = {"read": 0, "imported": 0, "duplicates": 0, "skipped": 0}
+    pending = []
+
+    def flush():
+        if pending:
+            added = store.add_many(user, pending)
+            ledger.extend(added)
+            stats["imported"] += len(added)
+            pending.clear()
+
+    for chunk in read_statement(file, filename, chunk_size, debits_negative):
+        stats["read"] += len(chunk)
+        valid = chunk["date"].notna() & chunk["amount"].gt(0)
+        stats["skipped"] += int((~valid).sum())
+        chunk = chunk[valid].copy()
+        chunk["date"] = chunk["date"].dt.strftime("%Y-%m-%d")
+        chunk["amount"] = chunk["amount"].round(2)
+
+        # Keep a category from the file when it is one of ours, else guess one
+        guessed = categorize(chunk["description"], categories)
+        chunk["category"] = chunk["category"].where(chunk["category"].isin(categories), guessed)
+
+        # The n-th copy of a key in the file is a duplicate if history has more than n
+        keys = _dedupe_keys(chunk)
+        occurrence = keys.groupby(keys).cumcount() + keys.map(seen).fillna(0).astype(int)
+        seen = seen.add(keys.value_counts(), fill_value=0)
+        duplicate = occurrence < keys.map(history).fillna(0).astype(int)
+        stats["duplicates"] += int(duplicate.sum())
+
+        # The user is part of the id so two users importing the same statement never share one
+        ids = (user.lower() + "|" + keys + "#" + occurrence.astype(str))[~duplicate].map(
+            lambda key: hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+        new = chunk[~duplicate].assign(id=ids)
+        for transaction in new[["id", "date", "category", "amount", "description"]].to_dict("records"):
+            pending.append(transaction)
+            if len(pending) >= batch_size:
+                flush()
+        if progress:
+            progress(dict(stats, imported=stats["imported"] + len(pending)))
+    flush()
+    return stats
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["id", "date", "month", "category", "amount", "description"]
+
+
+class ExpenseLedger:
+    """Columnar, month-partitioned view of one user's transactions.
+
+    Each month is its own small frame sorted by date, and an id -> month map
+    finds a transaction's partition directly. Month views and per-day totals
+    are pandas operations over one partition, and adding or deleting a
+    transaction only rewrites the partition it belongs to, so neither grows
+    with the length of the user's history.
+
+    Per-month, per-category totals are kept alongside in integer cents and
+    adjusted on every add and delete, so budget views read them directly.
+    An order-independent fingerprint of the ids is maintained the same way
+    and serves as the ledger's data version.
+    """
+
+    def __init__(self, transactions=()):
+        frame = self._to_frame(list(transactions))
+        self._parts = {
+            month: part.sort_values("date", kind="mergesort", ignore_index=True)
+            for month, part in frame.groupby("month", sort=False)
+        }
+        self._month_of = dict(zip(frame["id"], frame["month"]))
+        self._totals = {}
+        self._count_totals(frame, 1)
+        self._fingerprint = self._hash_ids(frame)
+
+    @staticmethod
+    def _to_frame(transactions):
+        frame = pd.DataFrame(transactions, columns=[c for c in COLUMNS if c != "month"])
+        frame["date"] = frame["date"].astype(str)
+        frame["month"] = frame["date"].str[:7]
+        frame["amount"] = frame["amount"].astype(float)
+        frame["description"] = frame["description"].fillna("")
+        return frame[COLUMNS]
+
+    @staticmethod
+    def _hash_ids(frame):
+        """XOR of the row hashes of `frame`'s ids, so adds and deletes cancel out"""
+        hashes = pd.util.hash_pandas_object(frame["id"], index=False).to_numpy()
+        return int(np.bitwise_xor.reduce(hashes)) if len(hashes) else 0
+
+    def _count_totals(self, frame, sign):
+        """Add (sign=1) or subtract (sign=-1) the rows of `frame` from the totals"""
+        cents = (frame["amount"] * 100).round().astype("int64")
+        grouped = cents.groupby([frame["month"], frame["category"]]).sum()
+        for (month, category), amount in grouped.items():
+            month_totals = self._totals.setdefault(month, {})
+            total = month_totals.get(category, 0) + sign * int(amount)
+            if total:
+                month_totals[category] = total
+            else:
+                month_totals.pop(category, None)
+            if not month_totals:
+                del self._totals[month]
+
+    def __len__(self):
+        return len(self._month_of)
+
+    def __contains__(self, transaction_id):
+        return transaction_id in self._month_of
+
+    def version(self):
+        """Token that changes whenever transactions are added or removed"""
+        return len(self._month_of), self._fingerprint
+
+    def frame(self):
+        """Every transaction as one frame, sorted by date"""
+        if not self._parts:
+            return self._to_frame([])
+        return pd.concat([self._parts[m] for m in sorted(self._parts)], ignore_index=True)
+
+    def months(self):
+        """Months that have at least one transaction, oldest first"""
+        return sorted(self._parts)
+
+    def add(self, transaction):
+        """Append one transaction dict"""
+        self.extend([transaction])
+
+    def extend(self, transactions):
+        """Append many transaction dicts at once"""
+        new = self._to_frame([t for t in transactions if t["id"] not in self._month_of])
+        for month, rows in new.groupby("month", sort=False):
+            part = self._parts.get(month)
+            if part is not None:
+                rows = pd.concat([part, rows], ignore_index=True)
+            self._parts[month] = rows.sort_values("date", kind="mergesort", ignore_index=True)
+        self._month_of.update(zip(new["id"], new["month"]))
+        self._count_totals(new, 1)
+        self._fingerprint ^= self._hash_ids(new)
+
+    def remove(self, transaction_id):
+        """Drop a transaction by id"""
+        month = self._month_of.pop(transaction_id, None)
+        if month is None:
+            return
+        part = self._parts[month]
+        removed = part["id"] == transaction_id
+        self._count_totals(part[removed], -1)
+        self._fingerprint ^= self._hash_ids(part[removed])
+        part = part[~removed].reset_index(drop=True)
+        if len(part):
+            self._parts[month] = part
+        else:
+            del self._parts[month]
+
+    def month(self, month):
+        """All transactions in `month` ("YYYY-MM"), sorted by date"""
+        part = self._parts.get(month)
+        return part if part is not None else self._to_frame([])
+
+    def month_total(self, month):
+        return sum(self._totals.get(month, {}).values()) / 100
+
+    def category_totals(self, month, categories=None):
+        """Spending per category in `month`, optionally reindexed to `categories`"""
+        month_totals = self._totals.get(month, {})
+        totals = pd.Series(
+            [cents / 100 for cents in month_totals.values()],
+            index=pd.Index(list(month_totals), name="category"), dtype=float, name="amount",
+        )
+        if categories is not None:
+            totals = totals.reindex(categories, fill_value=0.0)
+        return totals
+
+    def daily_totals(self, month):
+        """Spending per day in `month`, sorted by date"""
+        return self.month(month).groupby("date")["amount"].sum()
+
+    def recent(self, count=10):
+        """The `count` most recent transactions as dicts, newest first"""
+        rows = []
+        for month in sorted(self._parts, reverse=True):
+            rows.extend(self._parts[month].iloc[::-1].head(count - len(rows)).drop(columns="month").to_dict("records"))
+            if len(rows) >= count:
+                break
+        return rows
@@ -0,0 +1,277 @@
+import hashlib
+import itertools
+import json
+import os
+import threading
+import uuid
+from urllib.parse import quote, unquote
+
+from app.utils.api_client import get_api_client
+from app.utils.storage import JournaledFile, atomic_write_json, file_lock
+
+# One append-only log and one budget per user, plus the shared pre-account files they replace
+EXPENSES_DIR = "data/expenses"
+BUDGETS_DIR = "data/budgets"
+LEGACY_EXPENSES_FILE = "data/expenses.json"
+LEGACY_BUDGET_FILE = "data/budget.json"
+
+# Log records appended before a user's snapshot is rewritten
+EXPENSE_SNAPSHOT_EVERY = int(os.environ.get("EXPENSE_SNAPSHOT_EVERY", 1000))
+
+# Transactions yielded at a time by iter_transactions()
+EXPENSE_ITER_BATCH = int(os.environ.get("EXPENSE_ITER_BATCH", 5000))
+
+DEFAULT_CATEGORIES = ["Food", "Rent", "Utilities", "Textbooks", "Entertainment", "Transportation", "Other"]
+
+
+def new_transaction_id():
+    """Stable id for a transaction, assigned once when it is created"""
+    return uuid.uuid4().hex
+
+
+def _matches(transaction, months, categories):
+    return ((months is None or transaction["date"][:7] in months)
+            and (categories is None or transaction["category"] in categories))
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class LogExpenseStore:
+    """Local expense store with an append-only event log per user.
+
+    Each user has a snapshot in data/expenses/<user>.json and a journal of
+    add/delete records keyed by transaction id next to it (see JournaledFile).
+    Adding or deleting appends one short record, and the snapshot is only
+    rewritten every `snapshot_every` records. In memory, transactions are a
+    dict keyed by id, so deletes never scan the history.
+    """
+
+    def __init__(self, root=EXPENSES_DIR, budgets_root=BUDGETS_DIR, snapshot_every=EXPENSE_SNAPSHOT_EVERY):
+        self.root = root
+        self.budgets_root = budgets_root
+        self.snapshot_every = snapshot_every
+        self._files = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load(data):
+        data = data or {}
+        return {
+            "transactions": {t["id"]: t for t in data.get("transactions", [])},
+            "categories": data.get("categories") or list(DEFAULT_CATEGORIES),
+        }
+
+    @staticmethod
+    def _apply(state, record):
+        if record["op"] == "add":
+            state["transactions"][record["transaction"]["id"]] = record["transaction"]
+        elif record["op"] == "delete":
+            state["transactions"].pop(record["id"], None)
+
+    @staticmethod
+    def _dump(state):
+        return {"transactions": list(state["transactions"].values()), "categories": state["categories"]}
+
+    def _path(self, user, root=None):
+        return os.path.join(root or self.root, quote(user.lower(), safe="@.-_") + ".json")
+
+    def _file(self, user):
+        user = user.lower()
+        with self._lock:
+            if user not in self._files:
+                self._files[user] = JournaledFile(self._path(user), self._load, self._apply, self._dump,
+                                                  self.snapshot_every)
+            return self._files[user]
+
+    def _peek(self, user):
+        """The user's log, without keeping it cached if this process has not opened it"""
+        user = user.lower()
+        with self._lock:
+            log = self._files.get(user)
+        if log is not None:
+            return log
+        return JournaledFile(self._path(user), self._load, self._apply, self._dump, self.snapshot_every)
+
+    def load(self, user):
+        """Return {"transactions": [...], "categories": [...]} for a user"""
+        return self._file(user).read(lambda state: {
+            "transactions": [dict(t) for t in state["transactions"].values()],
+            "categories": list(state["categories"]),
+        })
+
+    def users(self):
+        """Every user with an expense log, in sorted order"""
+        if not os.path.isdir(self.root):
+            return []
+        # A user's first records go to the journal; the snapshot appears at the first compaction
+        return sorted({unquote(name.removesuffix(".journal")[:-len(".json")]) for name in os.listdir(self.root)
+                       if name.endswith((".json", ".json.journal"))})
+
+    def iter_transactions(self, user, months=None, categories=None, batch_size=EXPENSE_ITER_BATCH):
+        """Yield lists of a user's transactions in the given months and categories.
+
+        Only the ids are listed up front. Transactions are then filtered and
+        copied out of the log `batch_size` ids at a time, so no more than one
+        batch is ever copied; ones deleted in between are skipped.
+        """
+        months = set(months) if months else None
+        categories = set(categories) if categories else None
+        log = self._peek(user)
+        ids = log.read(lambda state: list(state["transactions"]))
+        page = []
+        for start in range(0, len(ids), batch_size):
+            page += log.read(lambda state: [
+                dict(t) for t in map(state["transactions"].get, ids[start:start + batch_size])
+                if t is not None and _matches(t, months, categories)
+            ])
+            if len(page) >= batch_size:
+                yield page[:batch_size]
+                page = page[batch_size:]
+        if page:
+            yield page
+
+    def add(self, user, transaction):
+        transaction = dict(transaction, id=transaction.get("id") or new_transaction_id())
+        self._file(user).write(lambda state: [{"op": "add", "transaction": transaction}])
+        return transaction
+
+    def add_many(self, user, transactions):
+        """Add a batch with one journal append; returns the transactions added.
+
+        Transactions whose id is already stored are skipped.
+        """
+        transactions = [dict(t, id=t.get("id") or new_transaction_id()) for t in transactions]
+        records = self._file(user).write(lambda state: [
+            {"op": "add", "transaction": t} for t in transactions if t["id"] not in state["transactions"]
+        ])
+        return [record["transaction"] for record in records]
+
+    def delete(self, user, transaction_id):
+        self._file(user).write(lambda state: [{"op": "delete", "id": transaction_id}]
+                               if transaction_id in state["transactions"] else [])
+
+    def load_budget(self, user):
+        return _read_json(self._path(user, self.budgets_root))
+
+    def save_budget(self, user, budget):
+        atomic_write_json(self._path(user, self.budgets_root), budget)
+
+
+class ApiExpenseStore:
+    """Expense store served by the Campus Connect API, shared by every replica"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def load(self, user):
+        return {
+            "transactions": list(self.client.iter_expenses(user)),
+            "categories": list(DEFAULT_CATEGORIES),
+        }
+
+    def users(self):
+        """Every user with expenses stored in the API"""
+        return list(self.client.iter_expense_users())
+
+    def iter_transactions(self, user, months=None, categories=None, batch_size=EXPENSE_ITER_BATCH):
+        """Yield pages of a user's transactions; the API filters by month and category"""
+        for month, category in itertools.product(months or [None], categories or [None]):
+            page = []
+            for transaction in self.client.iter_expenses(user, month, category):
+                page.append(transaction)
+                if len(page) >= batch_size:
+                    yield page
+                    page = []
+            if page:
+                yield page
+
+    def add(self, user, transaction):
+        transaction = dict(transaction, id=transaction.get("id") or new_transaction_id())
+        return self.client.add_expense(user, transaction)
+
+    def add_many(self, user, transactions):
+        """Add a batch in one request; returns the transactions the API inserted, skipping ids it already has"""
+        transactions = [dict(t, id=t.get("id") or new_transaction_id()) for t in transactions]
+        inserted = dict.fromkeys(self.client.add_expenses(user, transactions)["ids"])
+        by_id = {t["id"]: t for t in reversed(transactions)}
+        return [by_id[i] for i in inserted if i in by_id]
+
+    def delete(self, user, transaction_id):
+        self.client.delete_expense(user, transaction_id)
+
+    def load_budget(self, user):
+        return self.client.get_budget(user)
+
+    def save_budget(self, user, budget):
+        self.client.put_budget(user, budget)
+
+
+class LegacyExpenses:
+    """The shared expenses.json and budget.json from before accounts existed.
+
+    Nobody owns them, so nothing is moved automatically: each signed-in
+    user can import them into their own store once, and the files stay
+    readable until then. Imported transactions get ids derived from the
+    user, so importing twice adds nothing and two users' copies never
+    share an id.
+    """
+
+    def __init__(self, path=LEGACY_EXPENSES_FILE, budget_path=LEGACY_BUDGET_FILE):
+        self.path = path
+        self.budget_path = budget_path
+        self.claims_path = path + ".claims"
+
+    def _data(self):
+        # Earlier versions moved the file into the guest log and renamed it
+        return _read_json(self.path) or _read_json(self.path + ".migrated")
+
+    def _claimed(self):
+        return set((_read_json(self.claims_path) or {}).get("users", []))
+
+    def pending(self, user):
+        """Transactions `user` could still import; 0 once they have"""
+        if user.lower() in self._claimed():
+            return 0
+        return len((self._data() or {}).get("transactions", []))
+
+    def transactions(self, user):
+        """The legacy transactions, with ids of `user`'s own"""
+        transactions = (self._data() or {}).get("transactions", [])
+        return [dict(t, id=hashlib.blake2b(f"{user.lower()}|{t.get('id') or i}".encode(),
+                                           digest_size=16).hexdigest())
+                for i, t in enumerate(transactions)]
+
+    def claim(self, user, store):
+        """Import the legacy transactions, and budget unless they have one, into `user`'s store.
+
+        Returns the number of transactions added.
+        """
+        user = user.lower()
+        added = store.add_many(user, self.transactions(user))
+        budget = _read_json(self.budget_path)
+        if budget and not store.load_budget(user):
+            store.save_budget(user, budget)
+        with file_lock(self.claims_path + ".lock"):
+            claimed = self._claimed() | {user}
+            atomic_write_json(self.claims_path, {"users": sorted(claimed)})
+        return len(added)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_expense_store():
+    """Return the API-backed store when CAMPUS_API_URL is set, else the local one"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            client = get_api_client()
+            _store = ApiExpenseStore(client) if client else LogExpenseStore()
+        return _store
@@ -0,0 +1,129 @@
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# PBKDF2 cost for new hashes; existing hashes keep the cost they were made with
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", 100000))
+
+# hashlib releases the GIL while deriving keys, so threads use every core
+HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+
+# Hashes allowed to wait for a worker before callers are turned away
+HASH_QUEUE_LIMIT = int(os.environ.get("PASSWORD_HASH_QUEUE_LIMIT", HASH_WORKERS * 8))
+
+# Seconds a caller waits for a queue slot before giving up
+HASH_QUEUE_TIMEOUT = float(os.environ.get("PASSWORD_HASH_QUEUE_TIMEOUT", 5))
+
+HASH_SCHEME = "pbkdf2_sha512"
+LEGACY_ITERATIONS = 100000
+
+
+class HashPoolBusy(Exception):
+    """Raised when the hashing queue is full and the caller should retry later"""
+
+
+class HashPool:
+    """Bounded worker pool for password hashing.
+
+    At most `workers` hashes run at once and `queue_limit` more may wait.
+    Beyond that, submit() blocks for up to `timeout` seconds and then raises
+    HashPoolBusy, so a login burst degrades into fast failures instead of an
+    unbounded backlog that starves page rendering.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, queue_limit=HASH_QUEUE_LIMIT, timeout=HASH_QUEUE_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashPoolBusy("Too many logins in progress, please try again in a moment.")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool():
+    """Return the process-wide hashing pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashPool()
+        return _pool
+
+
+def _derive(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha512', password.encode('utf-8'), salt.encode('ascii'), iterations).hex()
+
+
+def _derive_werkzeug(method, salt, password):
+    # Hashes written by werkzeug.security.generate_password_hash
+    name, *params = method.split(":")
+    if name == "pbkdf2":
+        hash_name, iterations = params
+        return hashlib.pbkdf2_hmac(hash_name, password.encode('utf-8'), salt.encode('utf-8'), int(iterations)).hex()
+    if name == "scrypt":
+        n, r, p = (int(param) for param in params)
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt.encode('utf-8'),
+                              n=n, r=r, p=p, maxmem=132 * n * r * p).hex()
+    raise ValueError(f"Unsupported password hash method: {name}")
+
+
+def _is_werkzeug_hash(stored_password):
+    return stored_password.startswith(("pbkdf2:", "scrypt:"))
+
+
+def parse_hash(stored_password):
+    """Split a stored hash into (iterations, salt, hash).
+
+    Hashes from before the cost was stored are a 64-character salt followed by
+    the hex digest, made with LEGACY_ITERATIONS rounds.
+    """
+    if stored_password.startswith(HASH_SCHEME + "$"):
+        _, iterations, salt, pwdhash = stored_password.split("$", 3)
+        return int(iterations), salt, pwdhash
+    return LEGACY_ITERATIONS, stored_password[:64], stored_password[64:]
+
+
+def hash_password(password, iterations=None):
+    """Hash a password for storing."""
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
+    salt = hashlib.sha256(os.urandom(60)).hexdigest()
+    pwdhash = get_hash_pool().run(_derive, password, salt, iterations)
+    return f"{HASH_SCHEME}${iterations}${salt}${pwdhash}"
+
+
+def verify_password(stored_password, provided_password):
+    """Verify a stored password against one provided by user"""
+    if _is_werkzeug_hash(stored_password):
+        method, salt, pwdhash = stored_password.split("$", 2)
+        candidate = get_hash_pool().run(_derive_werkzeug, method, salt, provided_password)
+    else:
+        iterations, salt, pwdhash = parse_hash(stored_password)
+        candidate = get_hash_pool().run(_derive, provided_password, salt, iterations)
+    return hmac.compare_digest(candidate, pwdhash)
+
+
+def needs_rehash(stored_password):
+    """Check if a stored hash was made with a different cost or scheme than the current one"""
+    if not stored_password.startswith(HASH_SCHEME + "$"):
+        return True
+    return parse_hash(stored_password)[0] != PASSWORD_HASH_ITERATIONS
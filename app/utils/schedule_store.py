@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEDULE_DB_FILE = "data/schedule.db"
+
+
+class ScheduleStore:
+    """Study sessions students add to their planner, indexed by user and start time"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS study_sessions (
+        id INTEGER PRIMARY KEY,
+        user_email TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        starts_at TEXT NOT NULL,
+        minutes INTEGER NOT NULL,
+        location TEXT NOT NULL DEFAULT '',
+        reminder INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS study_sessions_user_starts_idx ON study_sessions (user_email, starts_at);
+    """
+
+    def __init__(self, path=SCHEDULE_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, email, subject, starts_at, minutes, location="", reminder=False):
+        """Add a study session starting at `starts_at` (a datetime) and return its id"""
+        conn = self._connect()
+        with conn:
+            return conn.execute(
+                "INSERT INTO study_sessions (user_email, subject, starts_at, minutes, location, reminder, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (email.lower(), subject, starts_at.strftime("%Y-%m-%d %H:%M"), int(minutes), location,
+                 int(reminder), datetime.now().isoformat()),
+            ).lastrowid
+
+    def remove(self, email, session_id):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM study_sessions WHERE id = ? AND user_email = ?",
+                         (session_id, email.lower()))
+
+    def sessions(self, email, start=None, end=None):
+        """`email`'s sessions starting in [start, end), in start order; bounds are "YYYY-MM-DD" strings"""
+        sql = "SELECT * FROM study_sessions WHERE user_email = ?"
+        params = [email.lower()]
+        if start:
+            sql += " AND starts_at >= ?"
+            params.append(str(start))
+        if end:
+            sql += " AND starts_at < ?"
+            params.append(str(end))
+        rows = self._connect().execute(sql + " ORDER BY starts_at, id", params).fetchall()
+        return [dict(row, reminder=bool(row["reminder"])) for row in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_schedule_store():
+    """Return the study schedule shared by every session in this process"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ScheduleStore()
+        return _store
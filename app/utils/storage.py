@@ -0,0 +1,227 @@
+import json
+import os
+import secrets
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Hold an advisory lock on `path` across processes.
+
+    Readers can share the lock; writers get it exclusively. On Windows every
+    lock is exclusive.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _fsync_dir(path):
+    # Make the rename itself durable; not supported on Windows
+    if fcntl is None:
+        return
+    fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    """Replace `path` with `data` so readers see either the old or new file, never half"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        # dumps() runs the C encoder; dump() streams through the pure-Python one
+        f.write(json.dumps(data, **dump_kwargs))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path)
+
+
+def append_records(path, records):
+    """Append JSON records to a journal, one per line, and fsync"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    with open(path, "ab+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                # Drop a record torn by a writer that crashed mid-append
+                f.seek(0)
+                f.truncate(f.read().rfind(b"\n") + 1)
+        f.write(payload.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_records(path, offset=0):
+    """Read complete journal records written after byte `offset`.
+
+    Returns the records and the offset just past the last complete line, so a
+    record torn by a crash mid-append is ignored until it is rewritten.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            chunk = f.read()
+    except FileNotFoundError:
+        return [], 0
+    end = chunk.rfind(b"\n") + 1
+    records = [json.loads(line) for line in chunk[:end].splitlines() if line.strip()]
+    return records, offset + end
+
+
+def truncate(path):
+    """Empty a journal after its records have been compacted into a snapshot"""
+    with open(path, "w") as f:
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def file_version(path):
+    """(mtime, size, inode) of a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def read_secret(path):
+    """Random hex key stored at `path`, created by whichever process asks first"""
+    if not os.path.exists(path):
+        # Write the key aside and link it into place, so racing processes all end up with one key
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp)
+    with open(path) as f:
+        return f.read().strip()
+
+
+class JournaledFile:
+    """A JSON snapshot at `path` plus an append-only journal of changes.
+
+    Changes are appended to `path`.journal and folded back into the snapshot
+    every `compact_every` records, so a write costs the size of the change
+    rather than the size of the data. The parsed state is cached and readers
+    only replay journal records they have not seen. An flock on `path`.lock
+    serializes writers across processes and excludes them from readers.
+
+    `load(data)` builds the in-memory state from snapshot data (None when
+    there is no snapshot yet), `apply(state, record)` folds one record into
+    it, and `dump(state)` returns the data to snapshot. Records must be
+    idempotent: a crash between writing a snapshot and truncating the journal
+    replays records that are already part of the snapshot.
+    """
+
+    def __init__(self, path, load, apply, dump, compact_every, indent=None):
+        self.path = path
+        self.indent = indent
+        self.journal_path = path + ".journal"
+        self.lock_path = path + ".lock"
+        self.compact_every = compact_every
+        self._load = load
+        self._apply = apply
+        self._dump = dump
+        self._mutex = threading.RLock()
+        self._state = None
+        self._snapshot_version = None
+        self._journal_offset = 0
+        self._journal_records = 0
+
+    def version(self):
+        """Cheap token that changes whenever any process writes to the file"""
+        return (file_version(self.path), file_version(self.journal_path))
+
+    def _read_snapshot(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _refresh(self):
+        # Caller holds the file lock
+        version = file_version(self.path)
+        if self._state is None or version != self._snapshot_version:
+            self._state = self._load(self._read_snapshot())
+            self._snapshot_version = version
+            self._journal_offset = 0
+            self._journal_records = 0
+        records, self._journal_offset = read_records(self.journal_path, self._journal_offset)
+        for record in records:
+            self._apply(self._state, record)
+        self._journal_records += len(records)
+
+    def _compact(self):
+        # Caller holds the exclusive file lock
+        atomic_write_json(self.path, self._dump(self._state), indent=self.indent)
+        truncate(self.journal_path)
+        self._snapshot_version = file_version(self.path)
+        self._journal_offset = 0
+        self._journal_records = 0
+
+    def read(self, fn):
+        """Return fn(state) computed against the latest state"""
+        with self._mutex, file_lock(self.lock_path, shared=True):
+            self._refresh()
+            return fn(self._state)
+
+    def write(self, make_records):
+        """Append make_records(state) to the journal and apply them.
+
+        Returns the records written; nothing is written for an empty list.
+        """
+        with self._mutex, file_lock(self.lock_path):
+            self._refresh()
+            records = make_records(self._state)
+            if records:
+                append_records(self.journal_path, records)
+                self._journal_offset = os.path.getsize(self.journal_path)
+                for record in records:
+                    self._apply(self._state, record)
+                self._journal_records += len(records)
+                if self._journal_records >= self.compact_every:
+                    self._compact()
+            return records
+
+    def replace(self, data):
+        """Replace the whole state with `data` in one atomic write"""
+        with self._mutex, file_lock(self.lock_path):
+            self._state = self._load(data)
+            self._compact()
+
+    def compact(self):
+        """Fold the journal into the snapshot now"""
+        with self._mutex, file_lock(self.lock_path):
+            self._refresh()
+            self._compact()
@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import threading
+
+from app.utils.api_client import ApiError, get_api_client
+
+TASKS_DB_FILE = "data/tasks.db"
+
+TASK_FIELDS = ("title", "subject", "due", "priority", "status", "category")
+
+# Fields a task can change once added, as the API allows
+TASK_UPDATE_FIELDS = ("status", "priority", "due")
+
+
+class TaskStore:
+    """Study planner tasks on this machine, indexed by user and due date"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY,
+        user_email TEXT NOT NULL,
+        title TEXT NOT NULL,
+        subject TEXT NOT NULL DEFAULT '',
+        due TEXT NOT NULL,
+        priority TEXT NOT NULL DEFAULT 'Medium',
+        status TEXT NOT NULL DEFAULT 'Not Started',
+        category TEXT NOT NULL DEFAULT 'Assignments'
+    );
+    CREATE INDEX IF NOT EXISTS tasks_user_due_idx ON tasks (user_email, due);
+    """
+
+    def __init__(self, path=TASKS_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def tasks(self, email):
+        """`email`'s tasks, soonest due first"""
+        rows = self._connect().execute(
+            "SELECT id, title, subject, due, priority, status, category FROM tasks WHERE user_email = ? "
+            "ORDER BY due, id", (email.lower(),),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def add(self, email, task):
+        """Add a task ({"title", "due": "YYYY-MM-DD", ...}) and return it with its id"""
+        task = {"subject": "", "priority": "Medium", "status": "Not Started", "category": "Assignments", **task}
+        conn = self._connect()
+        with conn:
+            task_id = conn.execute(
+                "INSERT INTO tasks (user_email, title, subject, due, priority, status, category) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (email.lower(), *(str(task[field]) for field in TASK_FIELDS)),
+            ).lastrowid
+        return dict({field: task[field] for field in TASK_FIELDS}, id=task_id)
+
+    def update(self, email, task_id, **fields):
+        """Change a task's status, priority or due date; False if `email` has no such task"""
+        columns = [field for field in fields if field in TASK_UPDATE_FIELDS]
+        if not columns:
+            return False
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE tasks SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ? AND user_email = ?",
+                [str(fields[c]) for c in columns] + [task_id, email.lower()],
+            )
+        return cursor.rowcount > 0
+
+
+class ApiTaskStore:
+    """Tasks served by the Campus Connect API, shared by every replica"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def tasks(self, email):
+        return self.client.list_tasks(email)
+
+    def add(self, email, task):
+        return self.client.add_task(email, dict(task, due=str(task["due"])))
+
+    def update(self, email, task_id, **fields):
+        fields = {k: str(v) for k, v in fields.items() if k in TASK_UPDATE_FIELDS}
+        if not fields:
+            return False
+        try:
+            self.client.update_task(email, task_id, **fields)
+        except ApiError as e:
+            if e.status_code == 404:
+                return False
+            raise
+        return True
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_task_store():
+    """Return the API-backed task store when CAMPUS_API_URL is set, else the local one"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            client = get_api_client()
+            _store = ApiTaskStore(client) if client else TaskStore()
+        return _store
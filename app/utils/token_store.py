@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Reset tokens live apart from the user records so token churn never touches them
+TOKEN_DB_FILE = "data/reset_tokens.db"
+
+# Seconds between background sweeps of expired tokens
+TOKEN_SWEEP_INTERVAL = float(os.environ.get("RESET_TOKEN_SWEEP_INTERVAL", 60))
+
+
+class TokenStore:
+    """Expiring token table keyed on the token, with an index on expiry.
+
+    Lookups are a single primary-key probe. Expired rows are swept by range
+    over the expiry index, both on every write and from a background thread,
+    so the table only ever holds tokens that are still live or about to expire.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS reset_tokens (
+        token TEXT PRIMARY KEY,
+        email TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS reset_tokens_expiry_idx ON reset_tokens (expires_at);
+    CREATE INDEX IF NOT EXISTS reset_tokens_email_idx ON reset_tokens (email);
+    """
+
+    def __init__(self, path=TOKEN_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._sweeper = None
+        self._stop = threading.Event()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, token, email, ttl):
+        """Store a token for `email` that expires `ttl` seconds from now"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            self._sweep(conn, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO reset_tokens (token, email, expires_at) VALUES (?, ?, ?)",
+                (token, email, now + ttl),
+            )
+
+    def get(self, token):
+        """Return {"email", "expires_at"} for a token, or None if unknown"""
+        row = self._connect().execute(
+            "SELECT email, expires_at FROM reset_tokens WHERE token = ?", (token,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def delete(self, token):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM reset_tokens WHERE token = ?", (token,))
+
+    def delete_for_email(self, email):
+        """Revoke every outstanding token for a user"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM reset_tokens WHERE email = ?", (email,))
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM reset_tokens").fetchone()[0]
+
+    def _sweep(self, conn, now):
+        return conn.execute("DELETE FROM reset_tokens WHERE expires_at <= ?", (now,)).rowcount
+
+    def sweep(self, now=None):
+        """Delete expired tokens, returning how many were removed"""
+        conn = self._connect()
+        with conn:
+            return self._sweep(conn, time.time() if now is None else now)
+
+    def start_sweeper(self, interval=TOKEN_SWEEP_INTERVAL):
+        """Sweep expired tokens from a daemon thread every `interval` seconds"""
+        if self._sweeper is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.sweep()
+                except sqlite3.Error:
+                    pass  # Database busy; the next write or sweep will catch up
+
+        self._sweeper = threading.Thread(target=run, name="reset-token-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_token_store():
+    """Return the shared token store, starting its sweeper on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TokenStore()
+            _store.start_sweeper()
+        return _store
@@ -0,0 +1,254 @@
+import copy
+import os
+import sqlite3
+import sys
+import threading
+
+from app.utils.storage import JournaledFile
+
+# Legacy JSON file and the indexed SQLite database that replaces it
+USER_DB_FILE = "data/users.json"
+USER_SQLITE_FILE = "data/users.db"
+
+# Backend used by get_user_store(): "sqlite" (default) or "json"
+USER_STORE_BACKEND = os.environ.get("USER_STORE_BACKEND", "sqlite")
+
+USER_FIELDS = ("full_name", "email", "password", "created_at")
+
+# Journal records appended before the JSON snapshot is rewritten
+JOURNAL_COMPACT_EVERY = int(os.environ.get("USER_JOURNAL_COMPACT_EVERY", 500))
+
+
+class JSONUserStore:
+    """User store backed by the legacy {"users": [...]} file.
+
+    Changes are journaled next to the file and compacted into it
+    periodically (see JournaledFile); the parsed users are cached with an
+    index on email.
+    """
+
+    def __init__(self, path=USER_DB_FILE, compact_every=JOURNAL_COMPACT_EVERY):
+        self.path = path
+        self._file = JournaledFile(path, self._load, self._apply, lambda state: state["data"],
+                                   compact_every, indent=2)
+
+    @staticmethod
+    def _load(data):
+        data = data if isinstance(data, dict) else {}
+        if not isinstance(data.get("users"), list):
+            # The old username-based auth wrote {username: werkzeug hash}
+            data = {"users": [
+                {"full_name": name, "email": name.lower(), "password": pwhash, "created_at": ""}
+                for name, pwhash in data.items() if isinstance(pwhash, str)
+            ]}
+        # Reset tokens now live in the token store; drop them at the next compaction
+        data.pop("reset_tokens", None)
+        return {"data": data, "index": {user["email"].lower(): user for user in data["users"]}}
+
+    @staticmethod
+    def _apply(state, record):
+        op = record["op"]
+        if op == "add_user":
+            user = record["user"]
+            if user["email"].lower() not in state["index"]:
+                user = dict(user)
+                state["data"]["users"].append(user)
+                state["index"][user["email"].lower()] = user
+        elif op == "update_user":
+            user = state["index"].get(record["email"].lower())
+            if user is not None:
+                user.update(record["fields"])
+        # Token records from older journals are ignored
+
+    def version(self):
+        """Cheap token that changes whenever any process writes to the store"""
+        return self._file.version()
+
+    def load(self):
+        """Return a copy of the full user data"""
+        return self._file.read(lambda state: copy.deepcopy(state["data"]))
+
+    def save(self, data):
+        """Replace the full user data in one atomic write"""
+        self._file.replace(copy.deepcopy(data))
+
+    def compact(self):
+        """Fold the journal into the snapshot now"""
+        self._file.compact()
+
+    def count(self):
+        return self._file.read(lambda state: len(state["data"]["users"]))
+
+    def get_user(self, email):
+        user = self._file.read(lambda state: state["index"].get(email.lower()))
+        return dict(user) if user else None
+
+    def add_user(self, user):
+        """Add a user, returning False if the email is already taken"""
+        return self.add_users([user]) == 1
+
+    def add_users(self, users):
+        """Add many users in one journal append, skipping duplicate emails"""
+        def make_records(state):
+            seen = set()
+            records = []
+            for user in users:
+                key = user["email"].lower()
+                if key not in state["index"] and key not in seen:
+                    seen.add(key)
+                    records.append({"op": "add_user", "user": dict(user)})
+            return records
+        return len(self._file.write(make_records))
+
+    def update_user(self, email, **fields):
+        def make_records(state):
+            if email.lower() not in state["index"]:
+                return []
+            return [{"op": "update_user", "email": email.lower(), "fields": fields}]
+        return len(self._file.write(make_records)) > 0
+
+
+class SQLiteUserStore:
+    """User store backed by SQLite with a unique index on lower(email).
+
+    Lookups are B-tree index probes, so login cost no longer grows with the
+    number of registered users.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        full_name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        password TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS users_email_idx ON users (lower(email));
+    CREATE TABLE IF NOT EXISTS users_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO users_version (id, version) VALUES (1, 0);
+    CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users BEGIN
+        UPDATE users_version SET version = version + 1 WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users BEGIN
+        UPDATE users_version SET version = version + 1 WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users BEGIN
+        UPDATE users_version SET version = version + 1 WHERE id = 1;
+    END;
+    """
+
+    def __init__(self, path=USER_SQLITE_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self):
+        # Streamlit runs each session on its own thread, so keep one connection per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def version(self):
+        """Counter that every committed write to users bumps, from any process.
+
+        Kept in the database by triggers rather than read off file stats, whose
+        timestamps can miss a same-size write within the clock's granularity.
+        """
+        return self._connect().execute("SELECT version FROM users_version WHERE id = 1").fetchone()[0]
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def get_user(self, email):
+        row = self._connect().execute(
+            "SELECT full_name, email, password, created_at FROM users "
+            "WHERE lower(email) = lower(?)",
+            (email,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def add_user(self, user):
+        """Add a user, returning False if the email is already taken"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO users (full_name, email, password, created_at) VALUES (?, ?, ?, ?)",
+                    tuple(user[field] for field in USER_FIELDS),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def add_users(self, users):
+        """Add many users in one transaction, skipping duplicate emails"""
+        conn = self._connect()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (full_name, email, password, created_at) VALUES (?, ?, ?, ?)",
+                (tuple(user[field] for field in USER_FIELDS) for user in users),
+            )
+            return conn.total_changes - before
+
+    def update_user(self, email, **fields):
+        columns = [field for field in fields if field in USER_FIELDS and field != "email"]
+        if not columns:
+            return False
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE users SET {', '.join(f'{c} = ?' for c in columns)} WHERE lower(email) = lower(?)",
+                [fields[c] for c in columns] + [email],
+            )
+        return cursor.rowcount > 0
+
+
+def migrate_json_to_sqlite(json_path=USER_DB_FILE, db_path=USER_SQLITE_FILE):
+    """Copy users from the legacy JSON file into SQLite.
+
+    Safe to run more than once: existing emails are left untouched.
+    Returns the number of users copied.
+    """
+    data = JSONUserStore(json_path).load()
+    return SQLiteUserStore(db_path).add_users(data["users"])
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_user_store(backend=None):
+    """Return the shared user store for the configured backend"""
+    backend = backend or USER_STORE_BACKEND
+    with _stores_lock:
+        if backend not in _stores:
+            if backend == "json":
+                _stores[backend] = JSONUserStore()
+            elif backend == "sqlite":
+                # One-shot migration the first time the database is created
+                fresh = not os.path.exists(USER_SQLITE_FILE)
+                if fresh and os.path.exists(USER_DB_FILE):
+                    migrate_json_to_sqlite()
+                _stores[backend] = SQLiteUserStore()
+            else:
+                raise ValueError(f"Unknown user store backend: {backend}")
+        return _stores[backend]
+
+
+if __name__ == "__main__":
+    # python -m app.utils.user_store migrate [users.json] [users.db]
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        count = migrate_json_to_sqlite(*sys.argv[2:4])
+        print(f"Migrated {count} users")
+    else:
+        print("usage: python -m app.utils.user_store migrate [users.json] [users.db]")
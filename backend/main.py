@@ -0,0 +1,389 @@
+"""Campus Connect API.
+
+Shared store for every Streamlit replica. Run from the repository root:
+
+    uvicorn backend.main:app --workers 4
+
+Every endpoint but /health and the token-signed calendar feeds needs the
+app's service key (see app/utils/api_client.py) as a Bearer token; the app
+signs users in itself and acts for them. Endpoints are plain `def` functions: FastAPI runs them on its worker thread
+pool, so a request waiting on the database never blocks the event loop.
+"""
+import hmac
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date
+from email.utils import format_datetime
+from functools import lru_cache
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Response
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.utils.api_client import api_key
+from app.utils.calendar_feed import check_feed_token, get_calendar_feeds, not_modified
+from app.utils.event_store import get_event_catalog
+from backend import schemas
+from backend.database import DATABASE_URL, get_db
+from backend.models import Budget, Expense, Task, User
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "alembic.ini")
+
+# Apply pending migrations when the server starts
+DB_AUTO_MIGRATE = os.environ.get("DB_AUTO_MIGRATE", "1") == "1"
+
+MAX_PAGE_SIZE = 1000
+
+
+def run_migrations(url=DATABASE_URL):
+    """Upgrade the database at `url` to the latest Alembic revision"""
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+
+@asynccontextmanager
+async def lifespan(_):
+    if DB_AUTO_MIGRATE:
+        run_migrations()
+    yield
+
+
+@lru_cache(maxsize=1)
+def _service_key():
+    return api_key().encode()
+
+
+def require_api_key(authorization: Optional[str] = Header(default=None)):
+    """Let through only requests carrying the app's service key"""
+    scheme, _, key = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(key.encode(), _service_key()):
+        raise HTTPException(status_code=401, detail="Missing or invalid API key",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+
+app = FastAPI(title="Campus Connect API", lifespan=lifespan)
+api = APIRouter(dependencies=[Depends(require_api_key)])
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+# Users
+
+@api.put("/users/{email}", response_model=schemas.UserOut)
+def upsert_user(email: str, body: schemas.UserIn, db: Session = Depends(get_db)):
+    user = db.scalar(select(User).where(User.email == email.lower()))
+    if user is None:
+        user = User(email=email.lower(), full_name=body.full_name)
+        db.add(user)
+    else:
+        user.full_name = body.full_name
+    db.commit()
+    return user
+
+
+@api.get("/users/{email}", response_model=schemas.UserOut)
+def get_user(email: str, db: Session = Depends(get_db)):
+    user = db.scalar(select(User).where(User.email == email.lower()))
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+# Expenses
+
+def _expense_row(email, expense):
+    return Expense(
+        id=expense.id or uuid.uuid4().hex,
+        user_email=email.lower(),
+        date=expense.date,
+        month=expense.date.strftime("%Y-%m"),
+        category=expense.category,
+        amount=expense.amount,
+        description=expense.description,
+    )
+
+
+@api.get("/expenses/users", response_model=list[str])
+def list_expense_users(
+    after: str = "",
+    limit: int = Query(default=500, gt=0, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """Emails of users with at least one expense, in order, after `after`"""
+    query = (select(Expense.user_email).distinct().where(Expense.user_email > after)
+             .order_by(Expense.user_email).limit(limit))
+    return db.scalars(query).all()
+
+
+@api.get("/users/{email}/expenses", response_model=schemas.ExpensePage)
+def list_expenses(
+    email: str,
+    month: Optional[str] = None,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=500, gt=0, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """Page through a user's expenses in (date, id) order.
+
+    `cursor` is the `next_cursor` of the previous page.
+    """
+    query = select(Expense).where(Expense.user_email == email.lower())
+    if month:
+        query = query.where(Expense.month == month)
+    if category:
+        query = query.where(Expense.category == category)
+    if cursor:
+        try:
+            after_date, after_id = cursor.split("|", 1)
+            after_date = date.fromisoformat(after_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Malformed cursor") from None
+        query = query.where(or_(
+            Expense.date > after_date,
+            and_(Expense.date == after_date, Expense.id > after_id),
+        ))
+    items = db.scalars(query.order_by(Expense.date, Expense.id).limit(limit)).all()
+    next_cursor = f"{items[-1].date.isoformat()}|{items[-1].id}" if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _commit_expenses(db):
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request stored one of these ids first
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Expense id already in use") from None
+
+
+@api.post("/users/{email}/expenses", response_model=schemas.ExpenseOut, status_code=201)
+def create_expense(email: str, body: schemas.ExpenseIn, db: Session = Depends(get_db)):
+    """Store an expense, or replace the caller's own expense with the same id"""
+    row = _expense_row(email, body)
+    expense = db.get(Expense, row.id)
+    if expense is None:
+        expense = row
+        db.add(expense)
+    elif expense.user_email != row.user_email:
+        raise HTTPException(status_code=409, detail="Expense id already in use")
+    else:
+        for field in ("date", "month", "category", "amount", "description"):
+            setattr(expense, field, getattr(row, field))
+    _commit_expenses(db)
+    return expense
+
+
+@api.post("/users/{email}/expenses/bulk")
+def create_expenses(email: str, body: list[schemas.ExpenseIn], db: Session = Depends(get_db)):
+    """Insert many expenses in one transaction; ids this user already stored are skipped.
+
+    Returns the counts and the ids of the expenses inserted. Nothing is
+    inserted if any id belongs to another user's expense.
+    """
+    rows = [_expense_row(email, expense) for expense in body]
+    owners = dict(db.execute(
+        select(Expense.id, Expense.user_email).where(Expense.id.in_([row.id for row in rows]))
+    ).all())
+    taken = sorted(expense_id for expense_id, owner in owners.items() if owner != email.lower())
+    if taken:
+        raise HTTPException(status_code=409, detail={"message": "Expense ids already in use", "ids": taken})
+    new_rows, seen = [], set(owners)
+    for row in rows:
+        if row.id not in seen:
+            seen.add(row.id)
+            new_rows.append(row)
+    db.add_all(new_rows)
+    _commit_expenses(db)
+    return {"inserted": len(new_rows), "skipped": len(rows) - len(new_rows), "ids": [row.id for row in new_rows]}
+
+
+@api.delete("/users/{email}/expenses/{expense_id}", status_code=204)
+def delete_expense(email: str, expense_id: str, db: Session = Depends(get_db)):
+    db.execute(delete(Expense).where(Expense.id == expense_id, Expense.user_email == email.lower()))
+    db.commit()
+    return Response(status_code=204)
+
+
+# Budgets
+
+@api.get("/users/{email}/budget", response_model=schemas.BudgetOut)
+def get_budget(email: str, db: Session = Depends(get_db)):
+    budget = db.get(Budget, email.lower())
+    if budget is None:
+        raise HTTPException(status_code=404, detail="No budget set")
+    return budget
+
+
+@api.put("/users/{email}/budget", response_model=schemas.BudgetOut)
+def put_budget(email: str, body: schemas.BudgetIn, db: Session = Depends(get_db)):
+    budget = db.merge(Budget(user_email=email.lower(), **body.model_dump()))
+    db.commit()
+    return budget
+
+
+# Events and RSVPs, served from the app's event catalog under data/ like the calendar feeds
+
+@api.get("/events", response_model=schemas.EventPage)
+def list_events(
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=20, gt=0, le=MAX_PAGE_SIZE),
+):
+    """Upcoming events in start order, one keyset page at a time (see EventStore.upcoming)"""
+    try:
+        events, next_cursor = get_event_catalog().upcoming(category, tag, start, end, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": events, "next_cursor": next_cursor}
+
+
+@api.get("/events/search", response_model=list[schemas.EventOut])
+def search_events(
+    q: str,
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+    start: Optional[str] = None,
+    limit: int = Query(default=20, gt=0, le=MAX_PAGE_SIZE),
+):
+    return get_event_catalog().search(q, category, tag, start, limit)
+
+
+@api.get("/events/categories", response_model=dict[str, int])
+def event_category_counts(start: Optional[str] = None, end: Optional[str] = None):
+    return get_event_catalog().category_counts(start, end)
+
+
+@api.get("/events/tags", response_model=list[str])
+def event_tags():
+    return get_event_catalog().tags()
+
+
+@api.get("/events/last-id")
+def last_event_id():
+    return {"last_event_id": get_event_catalog().last_event_id()}
+
+
+@api.get("/events/waitlists", response_model=dict[int, int])
+def waitlist_counts(event_id: list[int] = Query(default=[], max_length=MAX_PAGE_SIZE)):
+    return get_event_catalog().waitlist_counts(event_id)
+
+
+@api.post("/events", response_model=schemas.EventOut, status_code=201)
+def create_event(body: schemas.EventCreate):
+    catalog = get_event_catalog()
+    event = body.model_dump()
+    created_by = event.pop("created_by")
+    return catalog.get(catalog.add(event, created_by))
+
+
+@api.get("/events/{event_id}", response_model=schemas.EventOut)
+def get_event(event_id: int):
+    event = get_event_catalog().get(event_id)
+    if event is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return event
+
+
+@api.post("/events/{event_id}/rsvps", status_code=201)
+def create_rsvp(event_id: int, body: schemas.RSVPIn):
+    """RSVP a user; returns "going", or "waitlist" once the event is full"""
+    status = get_event_catalog().rsvp(event_id, body.user_email)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return {"status": status}
+
+
+@api.delete("/events/{event_id}/rsvps/{email}")
+def delete_rsvp(event_id: int, email: str):
+    """Withdraw an RSVP; returns who was promoted from the waitlist, if anyone"""
+    return {"promoted": get_event_catalog().cancel_rsvp(event_id, email)}
+
+
+@api.get("/users/{email}/rsvps", response_model=list[schemas.RSVPStatus])
+def rsvp_statuses(email: str, event_id: list[int] = Query(default=[], max_length=MAX_PAGE_SIZE)):
+    statuses = get_event_catalog().rsvp_statuses(email, event_id)
+    return [{"event_id": i, "status": status, "position": position} for i, (status, position) in statuses.items()]
+
+
+@api.get("/users/{email}/rsvps/history", response_model=list[schemas.RSVPHistoryItem])
+def rsvp_history(email: str, limit: int = Query(default=50, gt=0, le=MAX_PAGE_SIZE)):
+    return get_event_catalog().rsvp_history(email, limit)
+
+
+# Calendar feeds
+
+@app.get("/calendar/{email}.ics")
+def calendar_feed(
+    email: str,
+    token: str = "",
+    if_none_match: Optional[str] = Header(default=None),
+    if_modified_since: Optional[str] = Header(default=None),
+):
+    """iCalendar feed of a user's RSVPed campus events and study sessions.
+
+    Reads the app's event catalog and schedule under data/, so run the API
+    from the same directory as the app. Calendar apps poll this; an
+    unchanged feed is answered with 304 from the ETag or Last-Modified they
+    send back.
+    """
+    # Everyone who is not signed in is "guest", so that name has no private feed
+    if email.lower() == "guest" or not check_feed_token(email, token):
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    etag, last_modified, body = get_calendar_feeds().feed(email)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if not_modified(if_none_match, if_modified_since, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="text/calendar; charset=utf-8", headers=headers)
+
+
+# Tasks
+
+@api.get("/users/{email}/tasks", response_model=list[schemas.TaskOut])
+def list_tasks(email: str, db: Session = Depends(get_db)):
+    return db.scalars(select(Task).where(Task.user_email == email.lower()).order_by(Task.due)).all()
+
+
+@api.post("/users/{email}/tasks", response_model=schemas.TaskOut, status_code=201)
+def create_task(email: str, body: schemas.TaskIn, db: Session = Depends(get_db)):
+    task = Task(user_email=email.lower(), **body.model_dump())
+    db.add(task)
+    db.commit()
+    return task
+
+
+@api.patch("/users/{email}/tasks/{task_id}", response_model=schemas.TaskOut)
+def update_task(email: str, task_id: int, body: schemas.TaskUpdate, db: Session = Depends(get_db)):
+    task = db.get(Task, task_id)
+    if task is None or task.user_email != email.lower():
+        raise HTTPException(status_code=404, detail="Task not found")
+    for field, value in body.model_dump(exclude_unset=True).items():
+        setattr(task, field, value)
+    db.commit()
+    return task
+
+
+@api.delete("/users/{email}/tasks/{task_id}", status_code=204)
+def delete_task(email: str, task_id: int, db: Session = Depends(get_db)):
+    db.execute(delete(Task).where(Task.id == task_id, Task.user_email == email.lower()))
+    db.commit()
+    return Response(status_code=204)
+
+
+app.include_router(api)
@@ -0,0 +1,58 @@
+"""drop events and rsvps; the API serves the app's event catalog instead
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 20:10:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rsvps', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_rsvps_user_email'))
+
+    op.drop_table('rsvps')
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_events_date'))
+        batch_op.drop_index('events_category_date_idx')
+
+    op.drop_table('events')
+
+
+def downgrade():
+    op.create_table('events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('category', sa.String(length=64), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('time', sa.String(length=5), nullable=False),
+    sa.Column('location', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('max_capacity', sa.Integer(), nullable=False),
+    sa.Column('attendees', sa.Integer(), nullable=False),
+    sa.Column('tags', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.create_index('events_category_date_idx', ['category', 'date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_events_date'), ['date'], unique=False)
+
+    op.create_table('rsvps',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('user_email', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('event_id', 'user_email', name='rsvps_event_user_uq')
+    )
+    with op.batch_alter_table('rsvps', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_rsvps_user_email'), ['user_email'], unique=False)
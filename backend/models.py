@@ -0,0 +1,53 @@
+from datetime import date, datetime
+
+from sqlalchemy import JSON, Date, DateTime, Float, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.database import Base
+
+
+class User(Base):
+    __tablename__ = "users"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
+    full_name: Mapped[str] = mapped_column(String(255), default="")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class Expense(Base):
+    __tablename__ = "expenses"
+    __table_args__ = (
+        Index("expenses_user_month_category_idx", "user_email", "month", "category"),
+    )
+
+    # Client-supplied ids make retried and bulk inserts idempotent
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    user_email: Mapped[str] = mapped_column(String(255))
+    date: Mapped[date] = mapped_column(Date)
+    month: Mapped[str] = mapped_column(String(7))
+    category: Mapped[str] = mapped_column(String(64))
+    amount: Mapped[float] = mapped_column(Float)
+    description: Mapped[str] = mapped_column(Text, default="")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class Budget(Base):
+    __tablename__ = "budgets"
+
+    user_email: Mapped[str] = mapped_column(String(255), primary_key=True)
+    monthly_total: Mapped[float] = mapped_column(Float, default=1000.0)
+    categories: Mapped[dict] = mapped_column(JSON, default=dict)
+
+
+class Task(Base):
+    __tablename__ = "tasks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_email: Mapped[str] = mapped_column(String(255), index=True)
+    title: Mapped[str] = mapped_column(String(255))
+    subject: Mapped[str] = mapped_column(String(64), default="")
+    due: Mapped[date] = mapped_column(Date)
+    priority: Mapped[str] = mapped_column(String(16), default="Medium")
+    status: Mapped[str] = mapped_column(String(32), default="Not Started")
+    category: Mapped[str] = mapped_column(String(64), default="Assignments")
@@ -0,0 +1,108 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class UserIn(BaseModel):
+    full_name: str = ""
+
+
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    email: str
+    full_name: str
+
+
+class ExpenseIn(BaseModel):
+    id: Optional[str] = Field(default=None, max_length=32)
+    date: date
+    category: str
+    amount: float = Field(gt=0)
+    description: str = ""
+
+
+class ExpenseOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    date: date
+    category: str
+    amount: float
+    description: str
+
+
+class ExpensePage(BaseModel):
+    items: list[ExpenseOut]
+    next_cursor: Optional[str] = None
+
+
+class BudgetIn(BaseModel):
+    monthly_total: float = Field(ge=0)
+    categories: dict[str, float] = {}
+
+
+class BudgetOut(BudgetIn):
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EventIn(BaseModel):
+    title: str = Field(min_length=1)
+    category: str
+    date: date
+    time: str = Field(pattern=r"^\d{2}:\d{2}$")
+    location: str = ""
+    description: str = ""
+    max_capacity: int = Field(gt=0)
+    tags: list[str] = []
+
+
+class EventCreate(EventIn):
+    created_by: str = ""
+
+
+class EventOut(EventIn):
+    id: int
+    attendees: int
+
+
+class EventPage(BaseModel):
+    items: list[EventOut]
+    next_cursor: Optional[str] = None
+
+
+class RSVPIn(BaseModel):
+    user_email: str
+
+
+class RSVPStatus(BaseModel):
+    event_id: int
+    status: str
+    position: Optional[int] = None
+
+
+class RSVPHistoryItem(EventOut):
+    created_at: str
+    rsvp_status: str
+
+
+class TaskIn(BaseModel):
+    title: str
+    subject: str = ""
+    due: date
+    priority: str = "Medium"
+    status: str = "Not Started"
+    category: str = "Assignments"
+
+
+class TaskUpdate(BaseModel):
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    due: Optional[date] = None
+
+
+class TaskOut(TaskIn):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
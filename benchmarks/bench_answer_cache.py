@@ -0,0 +1,87 @@
+"""Smart Tutor answer cache hit rate and lookup cost for one class section.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_answer_cache [--students 300] [--questions 3]
+
+Each student asks a few questions drawn from a small set of MATH 101
+Calculus questions, reworded the way students word things (different
+openers, missing punctuation, the odd typo). Reports how many model calls
+the cache saved, how many hits returned an answer to a different question,
+and lookup latency, then checks that questions differing only by a negation,
+word order or a numeral each get their own answer.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.models.answer_cache import SemanticAnswerCache
+
+QUESTIONS = [
+    "integrate x^2", "integrate x^3", "differentiate x^2", "derivative of sin(x)", "derivative of cos(x)",
+    "the chain rule", "the product rule", "the quotient rule", "a limit", "limits at infinity",
+    "l'hopital's rule", "integration by parts", "u substitution", "the fundamental theorem of calculus",
+    "implicit differentiation", "related rates", "optimization problems", "the mean value theorem",
+    "concavity and inflection points", "riemann sums", "improper integrals", "derivative of e^x",
+    "derivative of ln(x)", "integral of 1/x", "continuity", "the squeeze theorem",
+]
+OPENERS = ["How do I do {}?", "how to do {}", "Can you explain {}?", "I don't understand {}",
+           "Please help me with {}", "what is {}", "Explain {} please", "{}??"]
+
+# Questions that read almost alike but ask different things; neither may get the other's answer
+NEAR_MISSES = [
+    ("Why is f(x)=|x| not differentiable at 0?", "Why is f(x)=|x| differentiable at 0?"),
+    ("Is every continuous function differentiable?", "Is every differentiable function continuous?"),
+    ("Why did World War I start?", "Why did World War II start?"),
+]
+
+
+def reword(topic):
+    text = random.choice(OPENERS).format(topic)
+    if random.random() < 0.3:
+        text = text.lower()
+    if random.random() < 0.15 and len(topic) > 8:
+        i = random.randrange(2, len(text) - 2)
+        text = text[:i] + text[i + 1:]  # A dropped letter
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=None)
+    args = parser.parse_args()
+
+    cache = SemanticAnswerCache() if args.threshold is None else SemanticAnswerCache(threshold=args.threshold)
+    random.seed(0)
+    wrong, timings = 0, []
+    for _ in range(args.students * args.questions):
+        topic = random.choice(QUESTIONS)
+        question = reword(topic)
+        start = time.perf_counter()
+        cached = cache.lookup("MATH 101", "Calculus", question)
+        timings.append((time.perf_counter() - start) * 1000)
+        if cached is None:
+            cache.store("MATH 101", "Calculus", question, topic)  # The answer records which question it is for
+        elif cached["answer"] != topic:
+            wrong += 1
+
+    stats = cache.stats()
+    asked = stats["hits"] + stats["misses"]
+    print(f"questions asked      {asked}")
+    print(f"model calls          {stats['misses']} ({stats['hit_rate']:.0%} answered from cache)")
+    print(f"wrong answers served {wrong}")
+    print(f"lookup p50 / p95     {statistics.median(timings):.2f} / {statistics.quantiles(timings, n=20)[-1]:.2f} ms")
+
+    for first, second in NEAR_MISSES:
+        cache = SemanticAnswerCache() if args.threshold is None else SemanticAnswerCache(threshold=args.threshold)
+        cache.store("MATH 101", "Calculus", first, first)
+        cached = cache.lookup("MATH 101", "Calculus", second)
+        verdict = "ok" if cached is None else f"WRONG ANSWER (similarity {cached['similarity']:.2f})"
+        print(f"{second!r:50} {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Calendar feed cost per poll.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_calendar_feed [--users 200] [--rsvps 40] [--sessions 60]
+
+Gives each user RSVPs and study sessions, then times what one poll from a
+calendar app costs: the first build of a feed, a poll after one new RSVP
+(only the new event is rendered), and an unchanged poll, which is what
+most polls are and is answered with 304.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app.utils.calendar_feed import CalendarFeeds, not_modified
+from app.utils.event_store import EventStore
+from app.utils.schedule_store import ScheduleStore
+from benchmarks.bench_event_search import make_events
+
+
+def time_polls(users, poll):
+    samples = []
+    for user in users:
+        start = time.perf_counter()
+        poll(user)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), statistics.quantiles(samples, n=20)[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rsvps", type=int, default=40)
+    parser.add_argument("--sessions", type=int, default=60)
+    parser.add_argument("--events", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        events = EventStore(os.path.join(tmp, "events.db"), seed=False)
+        events.add_many(make_events(args.events))
+        schedule = ScheduleStore(os.path.join(tmp, "schedule.db"))
+        users = [f"user{i}@example.edu" for i in range(args.users)]
+        now = datetime.now().replace(minute=0, second=0, microsecond=0)
+        for user in users:
+            for event_id in random.sample(range(1, args.events + 1), args.rsvps):
+                events.rsvp(event_id, user)
+            for _ in range(args.sessions):
+                schedule.add(user, "MATH 101", now + timedelta(hours=random.randrange(-24 * 60, 24 * 60)), 60,
+                             "Library", reminder=True)
+        feeds = CalendarFeeds(events, schedule)
+
+        def conditional_poll(user):
+            etag, last_modified, body = feeds.feed(user)
+            assert not_modified(etags[user], None, etag, last_modified)
+
+        print(f"{'poll':>22} {'p50 ms':>8} {'p95 ms':>8}")
+        print(f"{'first build':>22} {'%8.2f %8.2f' % time_polls(users, feeds.feed)}")
+        etags = {user: feeds.feed(user)[0] for user in users}
+        print(f"{'unchanged (304)':>22} {'%8.2f %8.2f' % time_polls(users, conditional_poll)}")
+        for user in users:
+            events.rsvp(random.randrange(1, args.events + 1), user)
+        print(f"{'after one new RSVP':>22} {'%8.2f %8.2f' % time_polls(users, feeds.feed)}")
+
+
+if __name__ == "__main__":
+    main()
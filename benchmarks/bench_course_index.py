@@ -0,0 +1,61 @@
+"""Course material ingestion rate and retrieval latency.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_course_index [--chunks 10000 50000] [--queries 200]
+
+Builds a throwaway index of synthetic lecture-note passages for one subject,
+at each size given, and reports how fast passages are ingested and the
+p50/p95 time to retrieve the top 4 for a question, which is the delay the
+tutor adds before it starts answering.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+from app.models.course_index import CourseIndex, INGEST_BATCH_SIZE
+
+TERMS = [
+    "derivative", "integral", "limit", "continuity", "chain rule", "product rule", "substitution",
+    "series", "convergence", "vector", "matrix", "eigenvalue", "determinant", "probability", "variance",
+    "distribution", "hypothesis", "regression", "theorem", "proof", "function", "slope", "area", "volume",
+]
+FILLER = ("we", "consider", "the", "case", "where", "this", "shows", "that", "for", "every", "example",
+          "note", "recall", "lecture", "so", "then", "given", "result", "follows")
+
+
+def passage(rng):
+    words = [rng.choice(TERMS) if rng.random() < 0.2 else rng.choice(FILLER) for _ in range(160)]
+    return " ".join(words).capitalize() + "."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for size in args.chunks:
+        with tempfile.TemporaryDirectory() as directory:
+            index = CourseIndex(directory)
+            texts = [passage(rng) for _ in range(size)]
+            start = time.perf_counter()
+            for i in range(0, size, INGEST_BATCH_SIZE):
+                index.add("MATH 101", f"week{i // 1000}.md", texts[i:i + INGEST_BATCH_SIZE])
+            elapsed = time.perf_counter() - start
+
+            timings = []
+            for _ in range(args.queries):
+                question = f"How does the {rng.choice(TERMS)} relate to the {rng.choice(TERMS)}?"
+                start = time.perf_counter()
+                index.search("MATH 101", question)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{size} passages: ingest {size / elapsed:.0f}/s, search p50 / p95 "
+                  f"{statistics.median(timings):.2f} / {statistics.quantiles(timings, n=20)[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Campus events page queries against catalog size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_event_catalog [--events 1000 10000 50000]
+
+Times what one rerun of the events page asks the catalog for (a page of
+upcoming events for a category or tag, deep pagination, category counts),
+with the in-process cache disabled and then enabled.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app.utils.event_store import EVENT_CATEGORIES, EventStore
+
+TAGS = ["ai", "music", "sports", "career", "math", "coding", "art", "volunteering", "debate", "robotics"]
+
+
+def make_events(count, days=365):
+    today = date.today()
+    return [
+        {
+            "title": f"Event {i}",
+            "category": random.choice(EVENT_CATEGORIES),
+            "date": (today + timedelta(days=random.randrange(-days // 2, days))).isoformat(),
+            "time": f"{random.randrange(8, 22):02d}:{random.choice(['00', '30'])}",
+            "location": "Campus",
+            "description": "",
+            "max_capacity": random.randrange(10, 500),
+            "tags": random.sample(TAGS, 3),
+        }
+        for i in range(count)
+    ]
+
+
+def time_page_views(store, views):
+    start = time.perf_counter()
+    for _ in range(views):
+        category = random.choice([None] + EVENT_CATEGORIES)
+        tag = random.choice([None, None] + TAGS)
+        events, cursor = store.upcoming(category, tag, limit=10)
+        for _ in range(5):  # Page 6 of the results
+            if cursor:
+                events, cursor = store.upcoming(category, tag, cursor=cursor, limit=10)
+        store.category_counts()
+    return (time.perf_counter() - start) / views * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--views", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'uncached ms/view':>17} {'cached ms/view':>15}")
+    for count in args.events:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = EventStore(os.path.join(tmp, "events.db"), seed=False)
+            store.add_many(make_events(count))
+            random.seed(count)
+            store.cache_size = 0
+            uncached = time_page_views(store, args.views)
+            random.seed(count)
+            store.cache_size = 1000
+            time_page_views(store, args.views)  # Warm the cache
+            random.seed(count)
+            cached = time_page_views(store, args.views)
+            print(f"{count:>8} {uncached:>17.2f} {cached:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
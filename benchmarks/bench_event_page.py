@@ -0,0 +1,72 @@
+"""Campus events page render time and size against catalog size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_event_page [--events 100 10000 50000]
+
+Renders the page headlessly with Streamlit's AppTest against catalogs of
+synthetic events, once browsing and once searching, and reports the warm
+render time and the number of elements sent to the browser. Both should
+stay flat as the catalog grows, since only one page of events is rendered.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from app.utils import event_recommender, event_store
+from app.utils.event_store import EventStore
+from benchmarks.bench_event_search import make_events
+
+PAGE = """
+import sys
+sys.path.insert(0, {root!r})
+from app.pages import campus_events
+campus_events.show()
+"""
+
+
+def count_elements(node):
+    children = getattr(node, "children", None)
+    if not children:
+        return 1
+    return 1 + sum(count_elements(child) for child in children.values())
+
+
+def render(app, runs=5):
+    app.run()  # Warm the caches
+    start = time.perf_counter()
+    for _ in range(runs):
+        app.run()
+    return (time.perf_counter() - start) / runs * 1000, count_elements(app._tree)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, nargs="+", default=[100, 10000, 50000])
+    args = parser.parse_args()
+
+    root = os.getcwd()
+    print(f"{'events':>8} {'view':>7} {'ms/render':>10} {'elements':>9}")
+    for count in args.events:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                EventStore(os.path.join("data", "events.db"), seed=False).add_many(make_events(count))
+                # The page's shared catalog and recommender belong to the previous directory
+                event_store._store = None
+                event_recommender._recommender_key = None
+                app = AppTest.from_string(PAGE.format(root=root), default_timeout=120)
+                for view in ["browse", "search"]:
+                    if view == "search":
+                        app.text_input[0].input("jazz")
+                    ms, elements = render(app)
+                    print(f"{count:>8} {view:>7} {ms:>10.1f} {elements:>9}")
+            finally:
+                os.chdir(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Event recommendation latency against catalog size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_event_recommender [--events 1000 10000 20000]
+
+Times building the TF-IDF matrix for a catalog of synthetic events, then
+scoring every event for users with a few RSVPs, interests and courses,
+uncached and from the per-user cache.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.utils.event_recommender import get_recommender, recommend_events
+from app.utils.event_store import EventStore
+from benchmarks.bench_event_search import WORDS, make_events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, nargs="+", default=[1000, 10000, 20000])
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'build ms':>9} {'p50 ms/user':>12} {'p95 ms/user':>12} {'cached ms':>10}")
+    for count in args.events:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = EventStore(os.path.join(tmp, "events.db"), seed=False)
+            store.add_many(make_events(count))
+            start = time.perf_counter()
+            get_recommender(store)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            users = [f"user{i}@example.edu" for i in range(args.users)]
+            for user in users:
+                for event_id in random.sample(range(1, count + 1), 3):
+                    store.rsvp(event_id, user)
+            profiles = [(user, random.sample(WORDS, 2), [f"{random.choice(WORDS)} 101"]) for user in users]
+
+            recommender = get_recommender(store)
+            timings = []
+            for user, interests, courses in profiles:
+                history = store.rsvp_history(user)
+                start = time.perf_counter()
+                recommender.recommend(history, interests, courses)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            for user, interests, courses in profiles:
+                recommend_events(store, user, interests, courses)  # Fill the cache
+            start = time.perf_counter()
+            for user, interests, courses in profiles:
+                recommend_events(store, user, interests, courses)
+            cached_ms = (time.perf_counter() - start) * 1000 / len(profiles)
+
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(f"{count:>8} {build_ms:>9.0f} {statistics.median(timings):>12.2f} {p95:>12.2f} {cached_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
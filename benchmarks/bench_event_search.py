@@ -0,0 +1,95 @@
+"""Event search latency against catalog size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_event_search [--events 10000 50000]
+
+Builds a catalog of synthetic events, times the first search (which indexes
+the whole catalog) and incremental re-indexing after one new event, then times
+ranked keyword and prefix queries with the result cache disabled, reporting
+median and 95th percentile latency.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app.utils.event_store import EVENT_CATEGORIES, EventStore
+
+WORDS = ("machine learning robotics hackathon startup pitch poetry slam debate chess jazz choir dance "
+         "photography film cricket football basketball marathon yoga meditation volunteering blood donation "
+         "career resume interview internship alumni networking calculus physics chemistry biology history "
+         "economics finance investing coding python java web design entrepreneurship quiz treasure hunt").split()
+PLACES = ["Library Room 204", "CS Building Room 101", "Student Center", "Sports Complex", "Main Auditorium",
+          "Student Lounge", "Innovation Lab", "Open Air Theatre"]
+
+
+def make_events(count, days=365):
+    today = date.today()
+    return [
+        {
+            "title": " ".join(random.sample(WORDS, 3)).title(),
+            "category": random.choice(EVENT_CATEGORIES),
+            "date": (today + timedelta(days=random.randrange(days))).isoformat(),
+            "time": f"{random.randrange(8, 22):02d}:00",
+            "location": random.choice(PLACES),
+            "description": " ".join(random.choices(WORDS, k=20)),
+            "max_capacity": 100,
+            "tags": random.sample(WORDS, 3),
+        }
+        for _ in range(count)
+    ]
+
+
+def make_queries(count):
+    queries = []
+    for _ in range(count):
+        kind = random.choice(["keyword", "prefix", "two words"])
+        word = random.choice(WORDS)
+        if kind == "keyword":
+            queries.append((kind, word))
+        elif kind == "prefix":
+            queries.append((kind, word[:3]))
+        else:
+            queries.append((kind, f"{word} {random.choice(WORDS)[:4]}"))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'build ms':>9} {'add ms':>7} {'kind':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for count in args.events:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = EventStore(os.path.join(tmp, "events.db"), seed=False)
+            store.add_many(make_events(count))
+            store.cache_size = 0  # Measure the index, not the result cache
+
+            start = time.perf_counter()
+            store.search("warm up")
+            build_ms = (time.perf_counter() - start) * 1000
+            store.add(make_events(1)[0])
+            start = time.perf_counter()
+            store.search("warm up")
+            add_ms = (time.perf_counter() - start) * 1000
+
+            timings = {}
+            for kind, text in make_queries(args.queries):
+                start = time.perf_counter()
+                store.search(text, limit=20)
+                timings.setdefault(kind, []).append((time.perf_counter() - start) * 1000)
+
+            for kind, samples in sorted(timings.items()):
+                p95 = statistics.quantiles(samples, n=20)[-1]
+                print(f"{count:>8} {build_ms:>9.0f} {add_ms:>7.1f} {kind:>10} "
+                      f"{statistics.median(samples):>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
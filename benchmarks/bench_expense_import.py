@@ -0,0 +1,66 @@
+"""Bank statement import throughput, and ids when two users import one file.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_expense_import [--rows 50000]
+
+Imports a generated CSV statement into a fresh local expense store, then
+imports it again, which must add nothing. A second user then imports the
+same file, and every row must get an id of its own: transaction ids are
+unique across users in the API database.
+"""
+import argparse
+import io
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app.utils.expense_import import import_statement
+from app.utils.expense_ledger import ExpenseLedger
+from app.utils.expense_store import DEFAULT_CATEGORIES, LogExpenseStore
+
+DESCRIPTIONS = ["Coffee shop", "Campus bookstore", "Bus pass", "Grocery market", "Cinema", "Pharmacy", "Rent"]
+
+
+def make_statement(rows):
+    start = date.today() - timedelta(days=365)
+    lines = ["Date,Description,Amount"]
+    for _ in range(rows):
+        day = start + timedelta(days=random.randrange(365))
+        lines.append(f"{day.isoformat()},{random.choice(DESCRIPTIONS)},-{random.uniform(1, 200):.2f}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def run_import(store, user, data):
+    ledger = ExpenseLedger(store.load(user)["transactions"])
+    start = time.perf_counter()
+    stats = import_statement(store, user, ledger, io.BytesIO(data), "statement.csv", DEFAULT_CATEGORIES)
+    return stats, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    data = make_statement(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LogExpenseStore(tmp, tmp + "/budgets")
+        first, first_s = run_import(store, "a@x.edu", data)
+        again, again_s = run_import(store, "a@x.edu", data)
+        other, _ = run_import(store, "b@x.edu", data)
+        ids = {user: {t["id"] for t in store.load(user)["transactions"]} for user in ("a@x.edu", "b@x.edu")}
+
+    shared = len(ids["a@x.edu"] & ids["b@x.edu"])
+    print(f"rows={args.rows}")
+    print(f"first import:   {first['imported']} imported in {first_s:.2f} s ({args.rows / first_s:,.0f} rows/s)")
+    print(f"second import:  {again['imported']} imported, {again['duplicates']} duplicates in {again_s:.2f} s")
+    print(f"other user:     {other['imported']} imported, {shared} ids shared with the first user")
+    if again["imported"] or shared or other["imported"] != first["imported"]:
+        raise SystemExit("FAILED: re-import added rows, or two users' imports share ids")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Month-view latency of the expense ledger for a heavy user.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_expense_ledger [--transactions 100000]
+
+Times what the Monthly Overview and Budget Planning tabs compute for one
+month (the slice, its total, per-category and per-day totals), and the
+history-wide trends from the analytics engine, cold and cached.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from app.utils.expense_analytics import FREQUENCIES, get_analytics
+from app.utils.expense_ledger import ExpenseLedger
+from app.utils.expense_store import DEFAULT_CATEGORIES, new_transaction_id
+
+
+def make_transactions(count, years=4):
+    start = date.today() - timedelta(days=365 * years)
+    return [
+        {
+            "id": new_transaction_id(),
+            "date": (start + timedelta(days=random.randrange(365 * years))).isoformat(),
+            "category": random.choice(DEFAULT_CATEGORIES),
+            "amount": round(random.uniform(10, 2000), 2),
+            "description": f"Expense {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.transactions)
+    start = time.perf_counter()
+    ledger = ExpenseLedger(transactions)
+    ledger.month("0000-00")  # Sort once, as the first rerun would
+    build_ms = (time.perf_counter() - start) * 1000
+
+    months = sorted({t["date"][:7] for t in transactions})
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        month = random.choice(months)
+        ledger.month_total(month)
+        ledger.category_totals(month, DEFAULT_CATEGORIES)
+        ledger.daily_totals(month)
+    view_ms = (time.perf_counter() - start) * 1000 / args.repeats
+
+    def trends():
+        analytics = get_analytics("bench", ledger)
+        for freq in FREQUENCIES.values():
+            analytics.totals(freq)
+            analytics.by_category(freq)
+        analytics.year_over_year()
+
+    start = time.perf_counter()
+    trends()
+    trends_cold_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        trends()
+    trends_cached_ms = (time.perf_counter() - start) * 1000 / args.repeats
+
+    print(f"transactions={args.transactions} months={len(months)}")
+    print(f"build: {build_ms:.1f} ms (once per session)")
+    print(f"month view: {view_ms:.2f} ms")
+    print(f"trends: {trends_cold_ms:.1f} ms cold, {trends_cached_ms:.3f} ms cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Login throughput of the password hashing pool, in logins per second per core.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_password_hashing [--iterations 100000] [--clients 64]
+
+A burst of concurrent clients each verify one password through the shared
+pool. Logins turned away by the queue limit are counted separately.
+"""
+import argparse
+import os
+import threading
+import time
+
+from app.utils import hashing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=hashing.PASSWORD_HASH_ITERATIONS)
+    parser.add_argument("--workers", type=int, default=hashing.HASH_WORKERS)
+    parser.add_argument("--queue-limit", type=int, default=hashing.HASH_QUEUE_LIMIT)
+    parser.add_argument("--clients", type=int, default=64)
+    args = parser.parse_args()
+
+    hashing.PASSWORD_HASH_ITERATIONS = args.iterations
+    hashing._pool = hashing.HashPool(workers=args.workers, queue_limit=args.queue_limit)
+    stored = hashing.hash_password("correct horse battery staple")
+
+    results = {"ok": 0, "busy": 0}
+    lock = threading.Lock()
+
+    def login():
+        try:
+            assert hashing.verify_password(stored, "correct horse battery staple")
+            outcome = "ok"
+        except hashing.HashPoolBusy:
+            outcome = "busy"
+        with lock:
+            results[outcome] += 1
+
+    clients = [threading.Thread(target=login) for _ in range(args.clients)]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    cores = min(args.workers, os.cpu_count() or 1)
+    rate = results["ok"] / elapsed
+    print(f"iterations={args.iterations} workers={args.workers} cores={cores} clients={args.clients}")
+    print(f"logins: {results['ok']} ok, {results['busy']} turned away in {elapsed:.2f}s")
+    print(f"throughput: {rate:.1f} logins/s, {rate / cores:.1f} logins/s/core")
+
+
+if __name__ == "__main__":
+    main()
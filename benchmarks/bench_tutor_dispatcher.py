@@ -0,0 +1,138 @@
+"""Smart Tutor dispatcher under a class-sized burst, against a fake local model server.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_tutor_dispatcher [--students 40] [--batch-sizes 1 8]
+
+Starts a fake OpenAI-compatible completions server that behaves like a
+single-GPU model server: it runs one batch at a time, each batch costs a
+fixed prefill time plus a per-token time, and every prompt in a batch is
+generated together. Then every student asks a question at once through a
+TutorDispatcher using the "local" provider, once per batch size, and the
+dispatcher's queue-wait and latency histograms are reported with the
+observed time to first token.
+
+To try the app against the fake server instead:
+
+    python -m benchmarks.bench_tutor_dispatcher --serve 8001
+    TUTOR_PROVIDER=local TUTOR_BASE_URL=http://localhost:8001/v1 streamlit run app.py
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.models.tutor import LocalProvider, build_messages
+from app.models.tutor_dispatcher import TutorDispatcher
+
+
+class FakeModelServer(ThreadingHTTPServer):
+    """Streams canned completions, one batch at a time, recording batch sizes"""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, prefill_ms=150, token_ms=10, tokens=40):
+        super().__init__(("127.0.0.1", port), FakeModelHandler)
+        self.prefill = prefill_ms / 1000
+        self.token_time = token_ms / 1000
+        self.tokens = tokens
+        self.batch_sizes = Counter()
+        self.gpu = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class FakeModelHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompts = body["prompt"] if isinstance(body["prompt"], list) else [body["prompt"]]
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        with server.gpu:
+            server.batch_sizes[len(prompts)] += 1
+            time.sleep(server.prefill)
+            for n in range(server.tokens):
+                time.sleep(server.token_time)
+                choices = [{"index": i, "text": f" word{n}", "logprobs": None,
+                            "finish_reason": "length" if n == server.tokens - 1 else None}
+                           for i in range(len(prompts))]
+                chunk = {"id": "cmpl-fake", "object": "text_completion", "created": 0, "model": body["model"],
+                         "choices": choices}
+                try:
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def burst(dispatcher, students):
+    first, total = [], []
+    lock = threading.Lock()
+
+    def ask(n):
+        messages = build_messages("MATH 101", "Calculus", f"Question {n}: how do I integrate x^{n}?")
+        start = time.perf_counter()
+        ttft = None
+        for _ in dispatcher.stream(f"student{n}@campus.edu", messages):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+        with lock:
+            first.append(ttft * 1000)
+            total.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=ask, args=(n,)) for n in range(students)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, first, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--serve", type=int, metavar="PORT", help="only run the fake server on PORT")
+    args = parser.parse_args()
+
+    if args.serve:
+        print(f"fake model server on http://127.0.0.1:{args.serve}/v1")
+        FakeModelServer(args.serve).serve_forever()
+        return
+
+    for size in args.batch_sizes:
+        server = FakeModelServer()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        provider = LocalProvider(model="fake", base_url=server.base_url, batch_size=size)
+        dispatcher = TutorDispatcher(provider, max_in_flight=args.max_in_flight)
+        elapsed, first, total = burst(dispatcher, args.students)
+        stats = dispatcher.stats()
+        dispatcher.close()
+        server.shutdown()
+        print(f"batch size {size}: {args.students} answers in {elapsed:.1f}s, "
+              f"batches {dict(sorted(server.batch_sizes.items()))}")
+        print(f"  first token p50 / p95   {statistics.median(first):7.0f} / "
+              f"{statistics.quantiles(first, n=20)[-1]:7.0f} ms")
+        print(f"  full answer p50 / p95   {statistics.median(total):7.0f} / "
+              f"{statistics.quantiles(total, n=20)[-1]:7.0f} ms")
+        for name in ("queue_wait", "latency"):
+            h = stats[name]
+            print(f"  {name:<12} histogram  p50 <= {h['p50_ms']:g} ms, p95 <= {h['p95_ms']:g} ms, "
+                  f"mean {h['mean_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
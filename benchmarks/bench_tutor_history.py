@@ -0,0 +1,84 @@
+"""Smart Tutor history: prompt size and store latency at campus scale.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_tutor_history [--users 500] [--conversations 20] [--exchanges 5]
+
+Fills a throwaway store with every user's past conversations, then reports
+how long loading a page of conversations, searching one user's history and
+building the prompt history take, and how many characters of history a
+long conversation sends with the running summary compared to resending
+every message.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.utils.conversation_store import ConversationStore
+
+WORDS = ["derivative", "integral", "limit", "series", "vector", "matrix", "proof", "essay", "thesis", "force",
+         "energy", "entropy", "recursion", "pointer", "graph", "sorting", "treaty", "empire", "revolution"]
+
+
+def text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def timed(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return f"{statistics.median(timings):.2f} / {statistics.quantiles(timings, n=20)[-1]:.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--exchanges", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        store = ConversationStore(os.path.join(directory, "history.db"))
+        start = time.perf_counter()
+        for u in range(args.users):
+            email = f"student{u}@campus.edu"
+            for _ in range(args.conversations):
+                conversation = store.start(email, "MATH 101", "Calculus", text(rng, 8))
+                for _ in range(args.exchanges):
+                    store.add_messages(email, conversation, [{"role": "user", "content": text(rng, 12)},
+                                                             {"role": "assistant", "content": text(rng, 150)}])
+        messages = args.users * args.conversations * args.exchanges * 2
+        print(f"{messages} messages stored in {time.perf_counter() - start:.1f}s")
+
+        users = [f"student{rng.randrange(args.users)}@campus.edu" for _ in range(200)]
+        print(f"page of conversations p50 / p95  {timed(lambda: store.conversations(rng.choice(users)), 200)}")
+        print(f"search p50 / p95                 "
+              f"{timed(lambda: store.search(rng.choice(users), rng.choice(WORDS)[:5]), 200)}")
+
+        # One long conversation: the prompt history after each new exchange
+        email = "long@campus.edu"
+        conversation = store.start(email, "MATH 101", "Calculus", "A long session")
+        full, sent, timings = 0, 0, []
+        for n in range(40):
+            store.add_messages(email, conversation, [{"role": "user", "content": text(rng, 12)},
+                                                     {"role": "assistant", "content": text(rng, 150)}])
+            start = time.perf_counter()
+            summary, recent = store.prompt_history(email, conversation)
+            timings.append((time.perf_counter() - start) * 1000)
+            sent += len(summary) + sum(len(m["content"]) for m in recent)
+            full += sum(len(m["content"]) for m in store.messages(email, conversation))
+        print(f"prompt history p50 / p95        {statistics.median(timings):.2f} / "
+              f"{statistics.quantiles(timings, n=20)[-1]:.2f} ms")
+        print(f"history sent over 40 exchanges   {sent:,} chars with summary, {full:,} resending everything "
+              f"({sent / full:.0%})")
+
+
+if __name__ == "__main__":
+    main()
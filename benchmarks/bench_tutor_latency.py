@@ -0,0 +1,51 @@
+"""Smart Tutor time to first token and to the full answer.
+
+Run from the repository root, with the provider configured as for the app
+(TUTOR_PROVIDER, OPENAI_API_KEY, TUTOR_MODEL, TUTOR_BASE_URL):
+
+    python -m benchmarks.bench_tutor_latency [--questions 10]
+
+Time to first token is how long the page waits before text appears, since
+answers are streamed into it.
+"""
+import argparse
+import statistics
+import time
+
+from app.models.tutor import build_messages, get_tutor_provider
+
+QUESTIONS = [
+    ("MATH 101", "Calculus", "How do I find the derivative of x^2 sin(x)?"),
+    ("PHYS 120", "Mechanics", "Why does a heavier object not fall faster in a vacuum?"),
+    ("CS 150", "Data Structures", "When should I use a hash map instead of a list?"),
+    ("HIST 205", "Modern History", "What were the main causes of World War I?"),
+    ("ENG 110", "Writing", "How do I write a strong thesis statement?"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=10)
+    args = parser.parse_args()
+
+    provider = get_tutor_provider()
+    first, total, chunks = [], [], []
+    for i in range(args.questions):
+        messages = build_messages(*QUESTIONS[i % len(QUESTIONS)])
+        start = time.perf_counter()
+        count = 0
+        for _ in provider.stream(messages):
+            if count == 0:
+                first.append((time.perf_counter() - start) * 1000)
+            count += 1
+        total.append((time.perf_counter() - start) * 1000)
+        chunks.append(count)
+
+    print(f"provider: {provider.name}")
+    print(f"time to first token  p50 {statistics.median(first):9.1f} ms  max {max(first):9.1f} ms")
+    print(f"time to full answer  p50 {statistics.median(total):9.1f} ms  max {max(total):9.1f} ms")
+    print(f"chunks per answer    p50 {statistics.median(chunks):9.0f}")
+
+
+if __name__ == "__main__":
+    main()
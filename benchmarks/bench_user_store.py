@@ -0,0 +1,84 @@
+"""Login and registration latency against user count for each user store backend.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_user_store [--sizes 1000 10000 50000]
+
+Password hashing is excluded: it costs the same for every backend, so the
+numbers isolate the cost of finding and writing the user record.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.utils.user_store import JSONUserStore, SQLiteUserStore, migrate_json_to_sqlite
+
+DUMMY_HASH = "0" * 64 + "f" * 128
+
+
+def make_users(count):
+    return [
+        {
+            "full_name": f"Student {i}",
+            "email": f"student{i}@campus.edu",
+            "password": DUMMY_HASH,
+            "created_at": "2024-01-01T00:00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def time_lookups(store, count, lookups):
+    emails = [f"Student{random.randrange(count)}@campus.edu" for _ in range(lookups)]
+    start = time.perf_counter()
+    for email in emails:
+        assert store.get_user(email) is not None
+    return (time.perf_counter() - start) / lookups * 1000
+
+
+def time_registrations(store, writes):
+    start = time.perf_counter()
+    for i in range(writes):
+        assert store.add_user({
+            "full_name": "New Student",
+            "email": f"new{i}@campus.edu",
+            "password": DUMMY_HASH,
+            "created_at": "2024-01-01T00:00:00",
+        })
+    return (time.perf_counter() - start) / writes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--writes", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'json ms/login':>14} {'sqlite ms/login':>16} "
+          f"{'json ms/register':>17} {'migrate s':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, "users.json")
+            db_path = os.path.join(tmp, "users.db")
+            json_store = JSONUserStore(json_path)
+            json_store.save({"users": make_users(size)})
+
+            start = time.perf_counter()
+            migrate_json_to_sqlite(json_path, db_path)
+            migrate_seconds = time.perf_counter() - start
+
+            sqlite_store = SQLiteUserStore(db_path)
+
+            json_ms = time_lookups(json_store, size, args.lookups)
+            sqlite_ms = time_lookups(sqlite_store, size, args.lookups)
+            # Registrations append to the journal, so this should stay flat as size grows
+            write_ms = time_registrations(json_store, args.writes)
+            print(f"{size:>8} {json_ms:>14.3f} {sqlite_ms:>16.3f} "
+                  f"{write_ms:>17.3f} {migrate_seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
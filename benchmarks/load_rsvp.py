@@ -0,0 +1,114 @@
+"""Load test for RSVPs: a burst of concurrent RSVPs and cancellations on one event.
+
+Run from the repository root:
+
+    python -m benchmarks.load_rsvp [--users 5000 --capacity 500 --processes 4 --threads 16]
+
+Every user RSVPs (some of them twice, to exercise idempotency) from many
+threads in several processes at once, and a share of them then cancel.
+Afterwards the script checks that the event was never overbooked, that the
+attendee count matches the RSVP rows, that nobody holds two RSVPs, and that
+nobody is left on the waitlist while a seat is free. It exits non-zero on a
+violation.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from app.utils.event_store import EventStore
+
+
+def worker(path, event_id, emails, cancel, threads, barrier):
+    store = EventStore(path, seed=False)
+    barrier.wait()  # Start every process at the same moment
+
+    def act(email):
+        store.rsvp(event_id, email)
+        if email in cancel:
+            store.cancel_rsvp(event_id, email)
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(act, emails))
+
+
+def check(store, event_id, users, cancelled):
+    conn = store._connect()
+    event = conn.execute("SELECT attendees, max_capacity FROM events WHERE id = ?", (event_id,)).fetchone()
+    rows = conn.execute("SELECT user_email, status FROM rsvps WHERE event_id = ? ORDER BY id",
+                        (event_id,)).fetchall()
+    going = [r["user_email"] for r in rows if r["status"] == "going"]
+    waitlist = [r["user_email"] for r in rows if r["status"] == "waitlist"]
+    expected = set(users) - cancelled
+
+    problems = []
+    if event["attendees"] > event["max_capacity"]:
+        problems.append(f"overbooked: {event['attendees']} > {event['max_capacity']}")
+    if event["attendees"] != len(going):
+        problems.append(f"attendee count {event['attendees']} != {len(going)} going rows")
+    if len(rows) != len({r["user_email"] for r in rows}):
+        problems.append("a user holds more than one RSVP")
+    if set(going) | set(waitlist) != expected:
+        problems.append(f"{len(expected)} users should hold an RSVP, {len(rows)} do")
+    if waitlist and len(going) < event["max_capacity"]:
+        problems.append(f"{len(waitlist)} waiting while {event['max_capacity'] - len(going)} seats are free")
+    return event, len(going), len(waitlist), problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--capacity", type=int, default=500)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="Share of users who RSVP twice")
+    parser.add_argument("--cancel", type=float, default=0.1, help="Share of users who cancel afterwards")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    users = [f"student{i}@campus.edu" for i in range(args.users)]
+    requests = users + random.sample(users, int(args.users * args.duplicates))
+    random.shuffle(requests)
+    cancelled = set(random.sample(users, int(args.users * args.cancel)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.db")
+        store = EventStore(path, seed=False)
+        event_id = store.add({"title": "Popular Event", "category": "Social", "date": date.today().isoformat(),
+                              "time": "18:00", "max_capacity": args.capacity})
+
+        # A user's RSVPs and cancellation stay in one process so they happen in order
+        shards = [[] for _ in range(args.processes)]
+        for email in requests:
+            shards[hash(email) % args.processes].append(email)
+        barrier = multiprocessing.Barrier(args.processes)
+        processes = [
+            multiprocessing.Process(target=worker, args=(path, event_id, shard, cancelled, args.threads, barrier))
+            for shard in shards
+        ]
+        start = time.perf_counter()
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        event, going, waiting, problems = check(store, event_id, users, cancelled)
+
+    operations = len(requests) + len(cancelled)
+    print(f"{operations} operations from {args.processes}x{args.threads} workers in {elapsed:.1f} s "
+          f"({operations / elapsed:.0f}/s)")
+    print(f"capacity={event['max_capacity']} attendees={event['attendees']} going={going} waitlist={waiting}")
+    for problem in problems:
+        print("FAIL:", problem)
+    if problems:
+        sys.exit(1)
+    print("OK: no overbooking, no lost updates, no duplicate RSVPs")
+
+
+if __name__ == "__main__":
+    main()